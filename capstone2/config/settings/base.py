@@ -130,3 +130,89 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
 }
+
+# Cache
+# 매칭 랭킹 캐시, 코호트 버전, 피드 스냅샷은 모든 gunicorn 워커가 같은 값을 봐야 합니다.
+# (Django 기본값인 LocMemCache는 프로세스마다 따로라서 invalidate_cohort가 한 워커에만 반영됨)
+# 기본은 DB 캐시이며 배포 시 `python manage.py createcachetable`로 테이블을 만듭니다.
+# Redis를 쓰려면 CACHE_BACKEND=django.core.cache.backends.redis.RedisCache,
+# CACHE_LOCATION=redis://127.0.0.1:6379/1 처럼 환경변수로 바꿉니다.
+CACHE_BACKEND = config('CACHE_BACKEND', default='django.core.cache.backends.db.DatabaseCache')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': config('CACHE_LOCATION', default='django_cache'),
+    }
+}
+if CACHE_BACKEND.endswith('DatabaseCache'):
+    # 기본값(300)이면 사용자별 랭킹/스냅샷이 쌓일 때 코호트 버전 키까지 무작위로 지워짐
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=50000, cast=int)}
+
+# Matching
+# AI 랭킹 결과 캐시 유지 시간(초). 코호트 내 프로필/기숙사 정보가 바뀌면 즉시 무효화됨
+MATCHING_RANKING_CACHE_TTL = config('MATCHING_RANKING_CACHE_TTL', default=600, cast=int)
+
+# 매칭 랭킹 엔진: 'remote'(AI 서버) 또는 'local'(users.scoring의 NumPy 엔진)
+MATCHING_RANKER = config('MATCHING_RANKER', default='remote')
+# AI 서버 호출이 실패하면 로컬 엔진으로 대신 랭킹
+MATCHING_LOCAL_FALLBACK = config('MATCHING_LOCAL_FALLBACK', default=True, cast=bool)
+# 로컬 엔진 가중치 덮어쓰기 (e.g., {'smoking_type': 5.0}, {('bed_time', 'wake_up_time'): 3.0})
+MATCHING_LOCAL_FIELD_WEIGHTS = {}
+MATCHING_LOCAL_CROSS_WEIGHTS = {}
+
+# 코호트 일괄 랭킹(users.prerank): 타깃별 저장 후보 수, rank_cohorts --loop 반복 주기(초)
+# (--loop는 전용 프로세스 하나에서만 실행. 웹 워커에서는 실행하지 않음)
+MATCHING_PRERANK_TOP_K = config('MATCHING_PRERANK_TOP_K', default=50, cast=int)
+MATCHING_PRERANK_INTERVAL = config('MATCHING_PRERANK_INTERVAL', default=3600, cast=int)
+
+# AI 랭킹 서버 (users.ai_client): 연결/응답 타임아웃(초), keep-alive 커넥션 풀 크기
+AI_SERVER_URL = config('AI_SERVER_URL', default='')
+AI_API_KEY = config('AI_API_KEY', default='')
+AI_CONNECT_TIMEOUT = config('AI_CONNECT_TIMEOUT', default=3.05, cast=float)
+AI_READ_TIMEOUT = config('AI_READ_TIMEOUT', default=10, cast=float)
+AI_POOL_MAXSIZE = config('AI_POOL_MAXSIZE', default=10, cast=int)
+# 랭킹 요청 본문 형식: 'json'(기존) / 'compact'(users.ranking_codec) / 'auto'(랭커가 지원을 알리면 compact)
+AI_PAYLOAD_FORMAT = config('AI_PAYLOAD_FORMAT', default='auto')
+AI_PAYLOAD_MSGPACK = config('AI_PAYLOAD_MSGPACK', default=False, cast=bool)
+# 'full': 후보 프로필 전체 전송 / 'id': target id + 코호트 키만 전송 (AI_PROFILE_SYNC_ENABLED로 레지스트리 동기화 필요)
+AI_RANKING_PROTOCOL = config('AI_RANKING_PROTOCOL', default='full')
+# 프로필 변경을 아웃박스(ProfileOutbox)에 기록하고 push_profile_outbox로 AI 랭커에 전송
+AI_PROFILE_SYNC_ENABLED = config('AI_PROFILE_SYNC_ENABLED', default=False, cast=bool)
+# 매칭 피드 세션 스냅샷(cursor) 유지 시간(초)
+MATCHING_FEED_SNAPSHOT_TTL = config('MATCHING_FEED_SNAPSHOT_TTL', default=1800, cast=int)
+# AI 랭킹 서버 서킷 브레이커: 최근 WINDOW초 동안 MINIMUM_CALLS건 이상 중 실패 비율이 FAILURE_RATE 이상이면
+# OPEN_SECONDS 동안 호출을 차단하고, 이후 HALF_OPEN_CALLS건만 시험 호출
+AI_BREAKER_FAILURE_RATE = config('AI_BREAKER_FAILURE_RATE', default=0.5, cast=float)
+AI_BREAKER_MINIMUM_CALLS = config('AI_BREAKER_MINIMUM_CALLS', default=5, cast=int)
+AI_BREAKER_WINDOW_SECONDS = config('AI_BREAKER_WINDOW_SECONDS', default=30, cast=float)
+AI_BREAKER_OPEN_SECONDS = config('AI_BREAKER_OPEN_SECONDS', default=30, cast=float)
+AI_BREAKER_HALF_OPEN_CALLS = config('AI_BREAKER_HALF_OPEN_CALLS', default=1, cast=int)
+# AI 서버 장애 시 stale 응답에 사용하는 '마지막 정상 랭킹' 유지 시간(초), 백그라운드 갱신 스레드 수
+MATCHING_LAST_KNOWN_TTL = config('MATCHING_LAST_KNOWN_TTL', default=86400, cast=int)
+MATCHING_REFRESH_WORKERS = config('MATCHING_REFRESH_WORKERS', default=2, cast=int)
+
+# Messages
+# 쪽지 실시간 전달(SSE, users.realtime): pub/sub 백엔드, 구독자별 대기 이벤트 수, heartbeat 주기(초)
+MESSAGE_BROKER_BACKEND = config('MESSAGE_BROKER_BACKEND', default='users.realtime.InProcessBroker')
+MESSAGE_STREAM_QUEUE_SIZE = config('MESSAGE_STREAM_QUEUE_SIZE', default=100, cast=int)
+MESSAGE_STREAM_HEARTBEAT = config('MESSAGE_STREAM_HEARTBEAT', default=15, cast=float)
+# SSE 연결은 끝나지 않는 요청이므로 gunicorn 동기(WSGI) 워커에서는 연결마다 워커 하나를 점유합니다.
+# ASGI 서버(uvicorn 워커 등)로 배포한 뒤에만 켭니다. 꺼져 있으면 messages/stream/은 404 (클라이언트는 after cursor 폴링)
+MESSAGE_STREAM_ENABLED = config('MESSAGE_STREAM_ENABLED', default=False, cast=bool)
+# 읽음 cursor 쓰기를 묶는 시간(초): 이 시간 안에 같은 대화방을 여러 번 읽어도 한 번만 기록
+MESSAGE_READ_DEBOUNCE_SECONDS = config('MESSAGE_READ_DEBOUNCE_SECONDS', default=2, cast=float)
+# 여러 명에게 쪽지 보내기(bulk-send): 일반 사용자의 한 번 최대 받는 사람 수 (운영진은 제한 없음)
+MESSAGE_BULK_MAX_RECIPIENTS = config('MESSAGE_BULK_MAX_RECIPIENTS', default=50, cast=int)
+# 오래된 쪽지 보관(archive_messages): 보관 기준(일), 압축 단위(대화방별 쪽지 수)
+MESSAGE_ARCHIVE_AFTER_DAYS = config('MESSAGE_ARCHIVE_AFTER_DAYS', default=180, cast=int)
+MESSAGE_ARCHIVE_CHUNK_SIZE = config('MESSAGE_ARCHIVE_CHUNK_SIZE', default=500, cast=int)
+
+# Dorm verification (OCR)
+# 기숙사 인증 OCR 작업 큐(users.ocr_jobs): 백엔드, 동시 처리 수, 대기 가능 작업 수(초과 시 503)
+DORM_OCR_JOB_BACKEND = config('DORM_OCR_JOB_BACKEND', default='users.ocr_jobs.InProcessOcrJobQueue')
+DORM_OCR_WORKERS = config('DORM_OCR_WORKERS', default=4, cast=int)
+DORM_OCR_QUEUE_SIZE = config('DORM_OCR_QUEUE_SIZE', default=50, cast=int)
+# 작업 제한 시간(초, 넘으면 조회 시 실패 처리), 결과 보관 시간(초), 클라이언트 조회 간격(Retry-After, 초)
+DORM_OCR_JOB_TIMEOUT = config('DORM_OCR_JOB_TIMEOUT', default=60, cast=int)
+DORM_OCR_JOB_RETENTION = config('DORM_OCR_JOB_RETENTION', default=3600, cast=int)
+DORM_OCR_POLL_INTERVAL = config('DORM_OCR_POLL_INTERVAL', default=1, cast=int)
@@ -0,0 +1,20 @@
+# config/settings/test.py
+# python manage.py test --settings=config.settings.test
+import os
+
+# 테스트에서는 외부 서비스를 호출하지 않으므로 필수 환경변수가 없어도 실행되도록 기본값을 채웁니다.
+os.environ.setdefault('SECRET_KEY', 'test-secret-key')
+os.environ.setdefault('CLOVA_OCR_APIGW_URL', 'http://127.0.0.1:9/ocr')
+os.environ.setdefault('CLOVA_OCR_SECRET_KEY', 'test')
+
+from .base import *
+
+ALLOWED_HOSTS = ['*']
+
+# users 앱은 마이그레이션 파일을 저장소에 두지 않으므로 테스트 DB는 모델에서 바로 테이블을 만듭니다.
+MIGRATION_MODULES = {'users': None}
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+MATCHING_RANKER = 'local'
+DORM_OCR_JOB_BACKEND = 'users.ocr_jobs.EagerOcrJobQueue'
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.admin import ModelAdmin
 from django.contrib.auth.admin import UserAdmin
 
-from users.models import User, DormInfo, Profile
+from users.models import User, DormInfo, DormVerificationJob, Profile, MatchScore, Conversation, UnreadCounter
 
 class CustomUserAdmin(UserAdmin):
     list_display = ('nickname', 'application_order', 'is_staff')
@@ -23,4 +23,8 @@ class CustomUserAdmin(UserAdmin):
 admin.site.register(User, CustomUserAdmin)
 
 admin.site.register(DormInfo)
-admin.site.register(Profile)
\ No newline at end of file
+admin.site.register(DormVerificationJob)
+admin.site.register(Profile)
+admin.site.register(MatchScore)
+admin.site.register(Conversation)
+admin.site.register(UnreadCounter)
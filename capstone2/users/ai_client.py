@@ -0,0 +1,262 @@
+"""
+AI 랭킹 서버(/v1/rank/topk) 클라이언트.
+
+요청마다 새 TCP/TLS 연결을 맺지 않도록 keep-alive 커넥션 풀을 가진 세션을
+프로세스 단위로 재사용합니다.
+비동기 클라이언트(AsyncRankingClient)는 httpx가 설치된 경우에만 사용 가능하며, 현재는 코호트 일괄 랭킹
+(users.prerank, rank_cohorts 명령)에서 타깃별 호출을 동시에 보낼 때만 사용합니다.
+서버가 gunicorn(WSGI) 동기 워커로 배포되므로 요청 처리 중의 호출(MatchingFeedView 등)은 RankingClient를 그대로 사용합니다.
+"""
+import asyncio
+import threading
+import weakref
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from users.circuit_breaker import CircuitBreaker
+from users.ranking_codec import (
+    ACCEPT_PAYLOAD_FORMATS_HEADER, COMPACT_FORMAT, PAYLOAD_FORMAT_HEADER, dump_payload, encode_compact,
+)
+from users.serializers import ProfileSerializer
+
+try:
+    import httpx
+except ImportError:  # 비동기 클라이언트는 선택 기능
+    httpx = None
+
+RANK_TOPK_PATH = '/v1/rank/topk'
+RANK_TOPK_BY_ID_PATH = '/v1/rank/topk-by-id'
+
+def build_rank_request(my_profile, candidate_profiles, k):
+    # (AI 요청 데이터) AI 팀의 API 명세에 맞게 최종 요청 데이터 생성
+    return {
+        "target": ProfileSerializer(my_profile).data,
+        "candidates": [ProfileSerializer(profile).data for profile in candidate_profiles],
+        "k": k
+    }
+
+def build_rank_by_id_request(target_id, cohort_key, k):
+    # 후보 프로필은 AI 랭커의 레지스트리(users.profile_sync)에 이미 동기화되어 있음
+    return {"target_id": target_id, "cohort": cohort_key, "k": k}
+
+def parse_rank_response(ai_response_data):
+    """
+    반환: (AI가 정렬한 후보 user_id 리스트, {user_id: match_percent})
+    """
+    ai_ordered_user_ids = []
+    ai_match_data = {}
+    results = ai_response_data.get('result', [])
+    for item in results:
+        user_id = item['candidate_id']
+        match_percent = item.get('match_percent')  # .get()으로 안전하게 접근
+
+        ai_ordered_user_ids.append(user_id)
+        if match_percent is not None:
+            ai_match_data[user_id] = match_percent
+
+    return ai_ordered_user_ids, ai_match_data
+
+
+class PayloadNegotiator:
+    """
+    요청 본문 형식 결정 (AI_PAYLOAD_FORMAT)
+    - 'json': 기존 형식(ProfileSerializer)만 사용
+    - 'compact': 항상 compact-v1 사용
+    - 'auto': 랭커가 응답 헤더로 compact-v1 지원을 알리면 그때부터 사용
+    어느 경우든 랭커가 415로 거절하면 기존 형식으로 되돌아갑니다.
+    """
+
+    def __init__(self, mode, use_msgpack):
+        self.mode = mode
+        self.use_msgpack = use_msgpack
+        self.compact_supported = (mode == 'compact')
+
+    def use_compact(self):
+        return self.mode != 'json' and self.compact_supported
+
+    def build(self, my_profile, candidate_profiles, k, compact):
+        if not compact:
+            return {'json': build_rank_request(my_profile, candidate_profiles, k)}
+
+        body, content_type = dump_payload(encode_compact(my_profile, candidate_profiles, k), self.use_msgpack)
+        return {
+            'data': body,
+            'headers': {'Content-Type': content_type, PAYLOAD_FORMAT_HEADER: COMPACT_FORMAT},
+        }
+
+    def observe(self, headers):
+        if self.mode == 'auto' and COMPACT_FORMAT in headers.get(ACCEPT_PAYLOAD_FORMATS_HEADER, ''):
+            self.compact_supported = True
+
+    def reject(self):
+        self.compact_supported = False
+
+
+class RankingClient:
+    def __init__(self, base_url, api_key, connect_timeout, read_timeout, pool_maxsize, payload_format='json', use_msgpack=False):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.negotiator = PayloadNegotiator(payload_format, use_msgpack)
+
+        self.session = requests.Session()
+        self.session.headers.update({'x-api-key': api_key})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def post(self, path, **kwargs):
+        response = self.session.post(self.base_url + path, timeout=self.timeout, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def rank(self, my_profile, candidate_profiles, k):
+        compact = self.negotiator.use_compact()
+        try:
+            response = self.post(RANK_TOPK_PATH, **self.negotiator.build(my_profile, candidate_profiles, k, compact))
+        except requests.exceptions.HTTPError as e:
+            if not compact or e.response.status_code != 415:
+                raise
+            self.negotiator.reject()
+            response = self.post(RANK_TOPK_PATH, **self.negotiator.build(my_profile, candidate_profiles, k, False))
+
+        self.negotiator.observe(response.headers)
+        return parse_rank_response(response.json())
+
+    def rank_by_id(self, target_id, cohort_key, k):
+        response = self.post(RANK_TOPK_BY_ID_PATH, json=build_rank_by_id_request(target_id, cohort_key, k))
+        return parse_rank_response(response.json())
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncRankingClient:
+    """
+    httpx.AsyncClient 기반 비동기 클라이언트. 이벤트 루프마다 하나씩 만들어 재사용합니다.
+    (asyncio.gather를 이용한 동시 호출. 동시 연결 수는 pool_maxsize로 제한)
+    """
+
+    def __init__(self, base_url, api_key, connect_timeout, read_timeout, pool_maxsize, payload_format='json', use_msgpack=False):
+        if httpx is None:
+            raise RuntimeError("AsyncRankingClient를 사용하려면 httpx 패키지가 필요합니다.")
+        self.client = httpx.AsyncClient(
+            base_url=base_url.rstrip('/'),
+            headers={'x-api-key': api_key},
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize),
+        )
+        self.negotiator = PayloadNegotiator(payload_format, use_msgpack)
+
+    async def post(self, path, **kwargs):
+        response = await self.client.post(path, **kwargs)
+        response.raise_for_status()
+        return response
+
+    async def rank(self, my_profile, candidate_profiles, k):
+        compact = self.negotiator.use_compact()
+        kwargs = self.negotiator.build(my_profile, candidate_profiles, k, compact)
+        try:
+            response = await self.post(RANK_TOPK_PATH, **_to_httpx_kwargs(kwargs))
+        except httpx.HTTPStatusError as e:
+            if not compact or e.response.status_code != 415:
+                raise
+            self.negotiator.reject()
+            kwargs = self.negotiator.build(my_profile, candidate_profiles, k, False)
+            response = await self.post(RANK_TOPK_PATH, **_to_httpx_kwargs(kwargs))
+
+        self.negotiator.observe(response.headers)
+        return parse_rank_response(response.json())
+
+    async def rank_by_id(self, target_id, cohort_key, k):
+        response = await self.post(RANK_TOPK_BY_ID_PATH, json=build_rank_by_id_request(target_id, cohort_key, k))
+        return parse_rank_response(response.json())
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+def _to_httpx_kwargs(kwargs):
+    # requests의 data=bytes는 httpx에서 content=bytes
+    kwargs = dict(kwargs)
+    if 'data' in kwargs:
+        kwargs['content'] = kwargs.pop('data')
+    return kwargs
+
+def _client_options():
+    return {
+        'base_url': settings.AI_SERVER_URL,
+        'api_key': settings.AI_API_KEY,
+        'connect_timeout': settings.AI_CONNECT_TIMEOUT,
+        'read_timeout': settings.AI_READ_TIMEOUT,
+        'pool_maxsize': settings.AI_POOL_MAXSIZE,
+        'payload_format': settings.AI_PAYLOAD_FORMAT,
+        'use_msgpack': settings.AI_PAYLOAD_MSGPACK,
+    }
+
+_client = None
+_client_lock = threading.Lock()
+_breaker = None
+_async_clients = weakref.WeakKeyDictionary()
+
+def get_ranking_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = RankingClient(**_client_options())
+    return _client
+
+def get_ranker_breaker():
+    """
+    AI 랭킹 서버 호출(동기/비동기 공통)에 쓰이는 서킷 브레이커.
+    """
+    global _breaker
+    if _breaker is None:
+        with _client_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker(
+                    'ranker',
+                    failure_rate=settings.AI_BREAKER_FAILURE_RATE,
+                    minimum_calls=settings.AI_BREAKER_MINIMUM_CALLS,
+                    window_seconds=settings.AI_BREAKER_WINDOW_SECONDS,
+                    open_seconds=settings.AI_BREAKER_OPEN_SECONDS,
+                    half_open_max_calls=settings.AI_BREAKER_HALF_OPEN_CALLS,
+                )
+    return _breaker
+
+def get_async_ranking_client():
+    # httpx.AsyncClient는 생성된 이벤트 루프에 묶이므로 루프별로 관리
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncRankingClient(**_client_options())
+    return client
+
+async def aclose_async_ranking_client():
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+def request_ai_ranking(my_profile, candidate_profiles, k, cohort_key=None):
+    """
+    AI 서버에 랭킹을 요청합니다.
+    AI_RANKING_PROTOCOL='id'이고 cohort_key가 주어지면 id만 보내고(/v1/rank/topk-by-id),
+    아니면 후보 프로필 전체를 보냅니다(/v1/rank/topk).
+    서킷이 열려 있으면 호출하지 않고 CircuitOpenError를 발생시킵니다.
+    반환: (AI가 정렬한 후보 user_id 리스트, {user_id: match_percent})
+    """
+    client = get_ranking_client()
+    if settings.AI_RANKING_PROTOCOL == 'id' and cohort_key:
+        return get_ranker_breaker().call(client.rank_by_id, my_profile.user_id, cohort_key, k)
+    return get_ranker_breaker().call(client.rank, my_profile, candidate_profiles, k)
+
+async def arequest_ai_ranking(my_profile, candidate_profiles, k, cohort_key=None):
+    """
+    request_ai_ranking의 비동기 버전. (프로필은 미리 로드되어 있어야 함: 내부에서 DB 조회 없음)
+    """
+    client = get_async_ranking_client()
+    if settings.AI_RANKING_PROTOCOL == 'id' and cohort_key:
+        return await get_ranker_breaker().acall(client.rank_by_id, my_profile.user_id, cohort_key, k)
+    return await get_ranker_breaker().acall(client.rank, my_profile, candidate_profiles, k)
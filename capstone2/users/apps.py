@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "users"
+
+    def ready(self):
+        # 매칭 랭킹 캐시 무효화 등 signal 핸들러 등록
+        from users import signals  # noqa: F401
+
+        # 쪽지 검색용 FTS 테이블/트리거 생성 (migrate 직후)
+        post_migrate.connect(signals.install_message_search, sender=self)
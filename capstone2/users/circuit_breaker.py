@@ -0,0 +1,114 @@
+"""
+외부 서버 호출용 서킷 브레이커.
+
+- CLOSED: 정상. 최근 window_seconds 동안의 호출 중 실패 비율이 failure_rate 이상이면(최소 minimum_calls건) OPEN
+- OPEN: open_seconds 동안 호출을 바로 거절(CircuitOpenError) -> 워커가 타임아웃까지 묶이지 않음
+- HALF_OPEN: open_seconds가 지나면 half_open_max_calls건만 시험 호출을 허용. 성공하면 CLOSED, 실패하면 다시 OPEN
+"""
+import threading
+import time
+from collections import deque
+
+from users import metrics
+
+class CircuitOpenError(Exception):
+    pass
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_rate=0.5, minimum_calls=5, window_seconds=30, open_seconds=30, half_open_max_calls=1):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.minimum_calls = minimum_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._outcomes = deque()  # (monotonic 시각, 성공 여부)
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+
+        metrics.register_gauge(f"{name}.breaker.state", lambda: self.state)
+
+    @property
+    def state(self):
+        with self._lock:
+            self._refresh_state()
+            return self._state
+
+    def _refresh_state(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._half_open_calls = 0
+
+    def _trim(self, now):
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+    def _open(self, now):
+        self._state = self.OPEN
+        self._opened_at = now
+        self._outcomes.clear()
+        metrics.incr(f"{self.name}.breaker.opened")
+
+    def allow_request(self):
+        with self._lock:
+            self._refresh_state()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return True
+
+        metrics.incr(f"{self.name}.breaker.rejected")
+        return False
+
+    def record_success(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._state == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._outcomes.clear()
+            self._outcomes.append((now, True))
+            self._trim(now)
+        metrics.incr(f"{self.name}.calls.success")
+
+    def record_failure(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._state == self.HALF_OPEN:
+                self._open(now)
+            else:
+                self._outcomes.append((now, False))
+                self._trim(now)
+                failures = sum(1 for _, ok in self._outcomes if not ok)
+                if len(self._outcomes) >= self.minimum_calls and failures / len(self._outcomes) >= self.failure_rate:
+                    self._open(now)
+        metrics.incr(f"{self.name}.calls.failure")
+
+    def call(self, func, *args, **kwargs):
+        if not self.allow_request():
+            raise CircuitOpenError(f"{self.name} 서킷이 열려 있습니다.")
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    async def acall(self, func, *args, **kwargs):
+        if not self.allow_request():
+            raise CircuitOpenError(f"{self.name} 서킷이 열려 있습니다.")
+        try:
+            result = await func(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
@@ -0,0 +1,44 @@
+from users.models import DormInfo, Profile
+
+def get_cohort_key(dorm_info):
+    """
+    매칭 후보군을 나누는 기준(성별, 건물, 호실, 거주 기간)을 하나의 문자열 키로 만듭니다.
+    e.g., "MALE:MYEONGDEOK:DOUBLE:SEMESTER"
+    """
+    return ':'.join([dorm_info.sex, dorm_info.building, dorm_info.room, dorm_info.residency_period])
+
+def get_feed_cohort_key(dorm_info, has_profile):
+    """
+    매칭 피드에 노출될 수 있는 사용자(프로필 작성 완료 + 선발)만 코호트 키를 가집니다.
+    DormInfo.cohort_key 컬럼에 저장되는 값이며, 대상이 아니면 None.
+    """
+    if not has_profile or dorm_info.is_accepted != DormInfo.AcceptanceChoices.ACCEPTED:
+        return None
+    return get_cohort_key(dorm_info)
+
+def refresh_cohort_key(user_id):
+    """
+    Profile 생성/삭제처럼 DormInfo 밖의 변경으로 자격이 바뀐 경우 코호트 키를 다시 계산합니다.
+    (update()를 사용하므로 DormInfo의 save signal은 발생하지 않음)
+    반환: (DormInfo 또는 None, 코호트 키가 바뀌었는지)
+    """
+    dorm_info = DormInfo.objects.filter(user_id=user_id).first()
+    if not dorm_info:
+        return None, False
+
+    has_profile = Profile.objects.filter(user_id=user_id).exists()
+    cohort_key = get_feed_cohort_key(dorm_info, has_profile)
+    changed = cohort_key != dorm_info.cohort_key
+    if changed:
+        DormInfo.objects.filter(pk=dorm_info.pk).update(cohort_key=cohort_key)
+        dorm_info.cohort_key = cohort_key
+    return dorm_info, changed
+
+def get_cohort_candidate_profiles(cohort_key, exclude_user_id=None):
+    """
+    코호트의 매칭 후보 프로필 목록. 인덱스가 걸린 cohort_key 컬럼 하나로 조회합니다.
+    """
+    queryset = Profile.objects.filter(user__dorminfo__cohort_key=cohort_key).select_related('user')
+    if exclude_user_id is not None:
+        queryset = queryset.exclude(user_id=exclude_user_id)
+    return queryset
@@ -0,0 +1,335 @@
+import atexit
+import base64
+import binascii
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from users import metrics
+from users.message_archive import fill_from_archive
+from users.models import Conversation, Message, UnreadCounter
+from users.realtime import publish_read_receipt
+
+def get_user_pair(user_id, other_id):
+    """
+    대화방 키 (작은 id, 큰 id)
+    """
+    return (user_id, other_id) if user_id < other_id else (other_id, user_id)
+
+def get_side(conversation_low_id, user_id):
+    """
+    대화방에서 user의 자리 ('low' / 'high'). 참여자별 컬럼 이름의 접두사로 사용
+    """
+    return 'low' if conversation_low_id == user_id else 'high'
+
+def change_unread_counter(user_id, amount):
+    """
+    사용자의 전체 안 읽은 쪽지 수를 amount만큼 바꿉니다. (0 미만으로 내려가지 않음)
+    """
+    updates = {'unread_count': Greatest(F('unread_count') + amount, 0)}
+    if not UnreadCounter.objects.filter(user_id=user_id).update(**updates):
+        UnreadCounter.objects.get_or_create(user_id=user_id)
+        UnreadCounter.objects.filter(user_id=user_id).update(**updates)
+
+def record_message(message):
+    """
+    새 쪽지를 대화방 요약에 반영합니다. (마지막 쪽지 갱신, 받는 사람의 대화방/전체 안 읽은 수 +1)
+    쪽지 저장과 같은 트랜잭션 안에서 호출해야 합니다.
+    """
+    low_id, high_id = get_user_pair(message.sender_id, message.recipient_id)
+    unread_field = f'{get_side(low_id, message.recipient_id)}_unread_count'
+
+    # 잠금 순서는 읽음 처리(_advance_read_cursor)와 같게: 대화방 -> 전체 안 읽은 수
+    with transaction.atomic():
+        conversation, created = Conversation.objects.select_for_update().get_or_create(
+            user_low_id=low_id, user_high_id=high_id,
+            defaults={'last_message': message, 'last_timestamp': message.timestamp, unread_field: 1},
+        )
+        if not created:
+            # 동시에 보낸 쪽지가 먼저 반영된 경우 마지막 쪽지는 더 최신(id가 큰) 것을 유지
+            updates = {unread_field: F(unread_field) + 1}
+            if conversation.last_message_id is None or conversation.last_message_id < message.id:
+                updates.update(last_message=message, last_timestamp=message.timestamp)
+            Conversation.objects.filter(pk=conversation.pk).update(**updates)
+
+        change_unread_counter(message.recipient_id, 1)
+    return conversation
+
+def record_messages_bulk(sender_id, messages):
+    """
+    한 사람이 여러 명에게 보낸 쪽지(받는 사람별 1건)를 대화방 요약에 한 번에 반영합니다.
+    기존 대화방 조회 1번 + bulk_update + bulk_create, 전체 안 읽은 수는 2번의 쿼리로 처리합니다.
+    쪽지 저장과 같은 트랜잭션 안에서 호출해야 합니다.
+    """
+    messages_by_opponent = {message.recipient_id: message for message in messages}
+    if not messages_by_opponent:
+        return
+
+    with transaction.atomic():
+        existing = {
+            conversation.opponent_id_for(sender_id): conversation
+            for conversation in Conversation.objects.select_for_update().filter(
+                Q(user_low_id=sender_id, user_high_id__in=messages_by_opponent) |
+                Q(user_high_id=sender_id, user_low_id__in=messages_by_opponent)
+            )
+        }
+
+        created = []
+        for opponent_id, message in messages_by_opponent.items():
+            low_id, high_id = get_user_pair(sender_id, opponent_id)
+            unread_field = f'{get_side(low_id, opponent_id)}_unread_count'
+            conversation = existing.get(opponent_id)
+            if conversation is None:
+                created.append(Conversation(
+                    user_low_id=low_id, user_high_id=high_id,
+                    last_message=message, last_timestamp=message.timestamp, **{unread_field: 1}
+                ))
+                continue
+
+            setattr(conversation, unread_field, getattr(conversation, unread_field) + 1)
+            if conversation.last_message_id is None or conversation.last_message_id < message.id:
+                conversation.last_message = message
+                conversation.last_timestamp = message.timestamp
+
+        Conversation.objects.bulk_update(
+            existing.values(), ['last_message', 'last_timestamp', 'low_unread_count', 'high_unread_count']
+        )
+        Conversation.objects.bulk_create(created)
+
+        # 전체 안 읽은 수: 없는 카운터를 만든 뒤 한 번에 +1
+        UnreadCounter.objects.bulk_create(
+            [UnreadCounter(user_id=opponent_id) for opponent_id in messages_by_opponent], ignore_conflicts=True
+        )
+        UnreadCounter.objects.filter(user_id__in=messages_by_opponent).update(unread_count=F('unread_count') + 1)
+
+def get_conversation(user_id, opponent_id):
+    low_id, high_id = get_user_pair(user_id, opponent_id)
+    return Conversation.objects.filter(user_low_id=low_id, user_high_id=high_id).first()
+
+def _advance_read_cursor(conversation_id, side, reader_id, last_read_message_id):
+    """
+    읽음 cursor를 마지막 쪽지까지 올리고 대화방의 안 읽은 수를 0으로, 전체 안 읽은 수는 그만큼 줄입니다.
+    그 사이 새 쪽지가 와서 마지막 쪽지가 바뀌었으면 갱신하지 않음 (다음 조회 때 다시 반영)
+    """
+    with transaction.atomic():
+        unread_count = Conversation.objects.select_for_update().filter(
+            pk=conversation_id,
+            last_message_id=last_read_message_id,
+            **{f'{side}_last_read_message_id__lt': last_read_message_id},
+        ).values_list(f'{side}_unread_count', flat=True).first()
+        if unread_count is None:
+            return False
+
+        Conversation.objects.filter(pk=conversation_id).update(
+            **{f'{side}_last_read_message_id': last_read_message_id, f'{side}_unread_count': 0}
+        )
+        if unread_count:
+            change_unread_counter(reader_id, -unread_count)
+    return True
+
+
+class ReadCursorBuffer:
+    """
+    읽음 cursor 쓰기를 대화방 참여자별로 묶습니다.
+    window초 안에 처음 읽으면 바로 쓰고, 그 안에 반복된 읽음은 모아서 window가 끝날 때 한 번만 씁니다.
+    (프로세스 단위. 쓰기가 반영되면 상대방에게 읽음 확인을 발행)
+    - 프로세스가 정상 종료되면 대기 중인 읽음을 flush_all()로 바로 씁니다. (atexit)
+    - 강제 종료로 대기 중인 읽음이 유실되면 읽음 cursor가 그만큼 늦게 남을 뿐, 안 읽은 수는 cursor 기준으로 맞게 유지됩니다.
+      다음에 대화방을 조회하면 다시 기록되고, 어긋난 카운터는 reconcile_unread_counters로 보정합니다.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._lock = threading.Lock()
+        self._last_written = OrderedDict()  # (conversation_id, side) -> monotonic 시각 (오래된 순)
+        self._pending = {}  # (conversation_id, side) -> (reader_id, opponent_id, last_read_message_id)
+
+    def _touch(self, key, now):
+        self._last_written[key] = now
+        self._last_written.move_to_end(key)
+        # window가 지난 기록은 더 이상 쓰기를 묶는 데 쓰이지 않으므로 정리 (오래된 순이라 앞에서부터)
+        while self._last_written:
+            oldest_key, written_at = next(iter(self._last_written.items()))
+            if now - written_at < self.window or oldest_key in self._pending:
+                break
+            del self._last_written[oldest_key]
+
+    def mark(self, conversation_id, side, reader_id, opponent_id, last_read_message_id):
+        key = (conversation_id, side)
+        with self._lock:
+            if key in self._pending:
+                self._pending[key] = (reader_id, opponent_id, last_read_message_id)
+                metrics.incr('messages.read_cursor.coalesced')
+                return False
+
+            now = time.monotonic()
+            elapsed = now - self._last_written.get(key, float('-inf'))
+            if elapsed < self.window:
+                self._pending[key] = (reader_id, opponent_id, last_read_message_id)
+                timer = threading.Timer(self.window - elapsed, self._flush, args=(key,))
+                timer.daemon = True
+                timer.start()
+                metrics.incr('messages.read_cursor.coalesced')
+                return False
+
+            self._touch(key, now)
+        self._write(key, reader_id, opponent_id, last_read_message_id)
+        return True
+
+    def _write(self, key, reader_id, opponent_id, last_read_message_id):
+        conversation_id, side = key
+        if _advance_read_cursor(conversation_id, side, reader_id, last_read_message_id):
+            metrics.incr('messages.read_cursor.writes')
+            publish_read_receipt(reader_id, opponent_id, last_read_message_id)
+
+    def _flush(self, key):
+        with self._lock:
+            pending = self._pending.pop(key, None)
+            self._touch(key, time.monotonic())
+        if pending is None:
+            return
+        try:
+            self._write(key, *pending)
+        except Exception as e:
+            print(f"Read Cursor Flush Error ({key}): {e}")
+        finally:
+            connection.close()  # 타이머 스레드의 DB 연결 정리
+
+    def flush_all(self):
+        """
+        대기 중인 읽음을 모두 바로 씁니다. (프로세스 종료 시)
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for key, args in pending.items():
+            try:
+                self._write(key, *args)
+            except Exception as e:
+                print(f"Read Cursor Flush Error ({key}): {e}")
+        return len(pending)
+
+    def pending_count(self):
+        return len(self._pending)
+
+_read_cursor_buffer = None
+
+def get_read_cursor_buffer():
+    global _read_cursor_buffer
+    if _read_cursor_buffer is None:
+        _read_cursor_buffer = ReadCursorBuffer(settings.MESSAGE_READ_DEBOUNCE_SECONDS)
+        atexit.register(_read_cursor_buffer.flush_all)
+    return _read_cursor_buffer
+
+def mark_conversation_read(conversation, user_id):
+    """
+    user가 대화방의 마지막 쪽지까지 읽었음을 기록합니다.
+    이미 읽은 상태면 쓰지 않고, 짧은 시간 안의 반복 조회는 한 번의 쓰기로 묶습니다.
+    메모리상의 conversation은 바로 읽은 상태로 바꿔서 같은 응답의 is_read/unread_count에 반영합니다.
+    """
+    side = get_side(conversation.user_low_id, user_id)
+    last_message_id = conversation.last_message_id
+    if last_message_id is None or getattr(conversation, f'{side}_last_read_message_id') >= last_message_id:
+        return
+
+    get_read_cursor_buffer().mark(
+        conversation.pk, side, user_id, conversation.opponent_id_for(user_id), last_message_id
+    )
+    setattr(conversation, f'{side}_last_read_message_id', last_message_id)
+    setattr(conversation, f'{side}_unread_count', 0)
+
+metrics.register_gauge(
+    'messages.read_cursor.pending',
+    lambda: _read_cursor_buffer.pending_count() if _read_cursor_buffer else 0
+)
+
+def get_inbox_page(user_id, limit, before=None):
+    """
+    사용자가 참여한 대화방을 (last_timestamp, id) 내림차순 keyset으로 limit건 조회합니다.
+    내 자리(low/high)별로 인덱스 conversation_*_inbox_idx 구간을 limit + 1건만 읽고 합치며,
+    상대 닉네임은 같은 쿼리에서 join으로 가져옵니다. (대화 상대 수와 관계없이 쿼리 2번)
+    반환: (대화방 리스트, 더 오래된 대화방이 있는지 여부)
+    """
+    conversations = []
+    for side, opponent_side in (('low', 'high'), ('high', 'low')):
+        queryset = Conversation.objects.filter(**{f'user_{side}_id': user_id})
+        if before is not None:
+            timestamp, conversation_id = before
+            queryset = queryset.filter(last_timestamp__lte=timestamp).exclude(
+                last_timestamp=timestamp, id__gte=conversation_id
+            )
+        queryset = queryset.select_related('last_message').annotate(
+            opponent_nickname=F(f'user_{opponent_side}__nickname')
+        ).order_by('-last_timestamp', '-id')
+        conversations.extend(queryset[:limit + 1])
+
+    conversations.sort(key=lambda conversation: (conversation.last_timestamp, conversation.id), reverse=True)
+    return conversations[:limit], len(conversations) > limit
+
+def encode_cursor(timestamp, pk):
+    raw = f"{timestamp.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def encode_message_cursor(message):
+    return encode_cursor(message.timestamp, message.id)
+
+def encode_conversation_cursor(conversation):
+    return encode_cursor(conversation.last_timestamp, conversation.id)
+
+def decode_cursor(cursor):
+    """
+    반환: (timestamp, id). 잘못된 cursor면 ValueError
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        timestamp, message_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(timestamp), int(message_id)
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(str(e))
+
+def get_directed_messages(sender_id, recipient_id, before=None, after=None, using=DEFAULT_DB_ALIAS):
+    """
+    한 방향(sender -> recipient) 쪽지의 keyset 구간. after면 오래된 순, 그 외에는 최신 순으로 정렬됩니다.
+    """
+    queryset = Message.objects.using(using).filter(sender_id=sender_id, recipient_id=recipient_id)
+    if after is not None:
+        timestamp, message_id = after
+        queryset = queryset.filter(timestamp__gte=timestamp).exclude(timestamp=timestamp, id__lte=message_id)
+        return queryset.order_by('timestamp', 'id')
+
+    if before is not None:
+        timestamp, message_id = before
+        queryset = queryset.filter(timestamp__lte=timestamp).exclude(timestamp=timestamp, id__gte=message_id)
+    return queryset.order_by('-timestamp', '-id')
+
+def get_pair_messages_page(
+    user_id, opponent_id, limit, before=None, after=None, using=DEFAULT_DB_ALIAS, conversation=None
+):
+    """
+    두 사용자 간 쪽지를 (timestamp, id) 기준 keyset으로 limit건 조회합니다.
+    - before: 이 위치보다 오래된 쪽지 중 최신 limit건 (위로 스크롤)
+    - after: 이 위치보다 최신 쪽지 중 오래된 순 limit건 (새 쪽지 확인)
+    - 둘 다 없으면 가장 최신 limit건
+    방향별(보낸/받은)로 인덱스 message_pair_timeline_idx 구간을 limit + 1건만 읽고 합치므로
+    대화 길이와 관계없이 비용이 일정합니다.
+    conversation을 주면 cursor가 Message에 남은 구간을 넘어갈 때만 보관된 쪽지(users.message_archive)로 이어서 채웁니다.
+    반환: (시간순 쪽지 리스트, 해당 방향으로 더 있는지 여부)
+    """
+    newest_first = after is None
+    messages = []
+    for sender_id, recipient_id in ((user_id, opponent_id), (opponent_id, user_id)):
+        queryset = get_directed_messages(sender_id, recipient_id, before=before, after=after, using=using)
+        messages.extend(queryset.select_related('sender', 'recipient')[:limit + 1])
+    messages = fill_from_archive(conversation, messages, limit, before=before, after=after)
+
+    messages.sort(key=lambda message: (message.timestamp, message.id), reverse=newest_first)
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    if newest_first:
+        messages.reverse()
+    return messages, has_more
@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.conversations import get_user_pair
+from users.message_archive import archive_conversation
+from users.models import Conversation, Message
+
+class Command(BaseCommand):
+    help = (
+        "오래된 쪽지를 대화방별로 묶어 압축한 뒤 보관 테이블(MessageArchiveChunk)로 옮깁니다. "
+        "보관된 쪽지는 대화방을 위로 스크롤해 Message에 남은 구간을 넘어가면 조회되며, 쪽지 검색 대상에서는 빠집니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.MESSAGE_ARCHIVE_AFTER_DAYS, help="보관 기준 (일)")
+        parser.add_argument('--chunk-size', type=int, default=settings.MESSAGE_ARCHIVE_CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="옮기지 않고 대상 대화방/쪽지 수만 출력")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        old_messages = Message.objects.filter(timestamp__lt=cutoff)
+
+        pairs = {get_user_pair(*pair) for pair in old_messages.values_list('sender_id', 'recipient_id').distinct()}
+        conversation_ids = [
+            conversation_id
+            for conversation_id, low_id, high_id in Conversation.objects.values_list('pk', 'user_low_id', 'user_high_id')
+            if (low_id, high_id) in pairs
+        ]
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(
+                f"{cutoff:%Y-%m-%d %H:%M} 이전 쪽지 {old_messages.count()}건 / 대화방 {len(conversation_ids)}개 "
+                "(대화방별 마지막 쪽지는 제외)"
+            ))
+            return
+
+        # 대화방 단위 트랜잭션: 오래 잠그지 않도록 한 대화방씩 옮김
+        archived = 0
+        for conversation_id in conversation_ids:
+            archived += archive_conversation(conversation_id, cutoff, options['chunk_size'])
+
+        self.stdout.write(self.style.SUCCESS(f"대화방 {len(conversation_ids)}개에서 쪽지 {archived}건을 보관했습니다."))
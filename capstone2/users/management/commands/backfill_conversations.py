@@ -0,0 +1,84 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from users.conversations import get_side, get_user_pair
+from users.models import Conversation, Message
+
+class Command(BaseCommand):
+    help = (
+        "기존 쪽지(Message)로 대화방 요약(Conversation)을 다시 만듭니다. (테이블 추가 직후 또는 데이터 보정용) "
+        "이미 있는 대화방의 읽음 cursor는 뒤로 돌리지 않으며, 끝나면 전체 안 읽은 수(UnreadCounter)도 다시 맞춥니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        # 이미 있는 대화방의 읽음 cursor (읽음 처리는 이제 cursor만 올리고 쪽지별 is_read는 쓰지 않음)
+        existing_cursors = {
+            (low_id, high_id): {'low': low_cursor, 'high': high_cursor}
+            for low_id, high_id, low_cursor, high_cursor in Conversation.objects.values_list(
+                'user_low_id', 'user_high_id', 'low_last_read_message_id', 'high_last_read_message_id'
+            ).iterator(chunk_size=batch_size)
+        }
+
+        # 쪽지를 id 순으로 한 번만 훑으면서 대화방별 마지막 쪽지와 참여자별로
+        # - is_read 기준 cursor(이전 버전 데이터: 마지막으로 읽은 쪽지)와 그 이후 쪽지 수
+        # - 기존 cursor 이후 쪽지 수
+        # 를 집계하고, 더 앞선 cursor를 기준으로 안 읽은 수를 정함
+        summaries = {}
+        messages = Message.objects.order_by('id').values_list(
+            'id', 'sender_id', 'recipient_id', 'timestamp', 'is_read'
+        )
+        for message_id, sender_id, recipient_id, timestamp, is_read in messages.iterator(chunk_size=batch_size):
+            pair = get_user_pair(sender_id, recipient_id)
+            summary = summaries.get(pair)
+            if summary is None:
+                cursors = existing_cursors.get(pair, {'low': 0, 'high': 0})
+                summary = summaries[pair] = {
+                    side: {'existing_cursor': cursors[side], 'read_cursor': 0, 'since_read': 0, 'since_existing': 0}
+                    for side in ('low', 'high')
+                }
+            summary['last_message_id'] = message_id
+            summary['last_timestamp'] = timestamp
+
+            side = summary[get_side(pair[0], recipient_id)]
+            if is_read:
+                side['read_cursor'] = message_id
+                side['since_read'] = 0
+            else:
+                side['since_read'] += 1
+            if message_id > side['existing_cursor']:
+                side['since_existing'] += 1
+
+        conversations = []
+        for (low_id, high_id), summary in summaries.items():
+            fields = {'last_message_id': summary['last_message_id'], 'last_timestamp': summary['last_timestamp']}
+            for side_name in ('low', 'high'):
+                side = summary[side_name]
+                if side['read_cursor'] >= side['existing_cursor']:
+                    fields[f'{side_name}_last_read_message_id'] = side['read_cursor']
+                    fields[f'{side_name}_unread_count'] = side['since_read']
+                else:
+                    fields[f'{side_name}_last_read_message_id'] = side['existing_cursor']
+                    fields[f'{side_name}_unread_count'] = side['since_existing']
+            conversations.append(Conversation(user_low_id=low_id, user_high_id=high_id, **fields))
+
+        with transaction.atomic():
+            Conversation.objects.bulk_create(
+                conversations,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['user_low', 'user_high'],
+                update_fields=[
+                    'last_message', 'last_timestamp', 'low_last_read_message_id', 'high_last_read_message_id',
+                    'low_unread_count', 'high_unread_count',
+                ],
+            )
+            # 대화방별 안 읽은 수가 바뀌었으므로 사용자별 합계도 같은 트랜잭션에서 맞춤
+            call_command('reconcile_unread_counters', batch_size=batch_size, stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(f"대화방 {len(conversations)}개를 갱신했습니다."))
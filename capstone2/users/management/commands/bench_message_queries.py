@@ -0,0 +1,153 @@
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from users.conversations import get_directed_messages, get_pair_messages_page
+from users.models import Message, User
+from users.views import ConversationDetailView
+
+BENCH_DB_ALIAS = 'message_bench'
+
+class Command(BaseCommand):
+    help = (
+        "별도 SQLite 파일에 쪽지를 대량 생성하고, 대화방 조회 쿼리의 실행 계획(EXPLAIN)과 지연 시간을 "
+        "Message 인덱스 추가 전/후로 비교합니다. --check를 주면 인덱스를 사용하지 않는 쿼리가 있을 때 실패합니다. "
+        "(자동 실행되는 CI는 없으며, manage.py test 실행 시 users.tests.test_message_indexes가 작은 데이터로 확인)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=2_000_000)
+        parser.add_argument('--users', type=int, default=5000)
+        parser.add_argument('--partners', type=int, default=10, help="사용자 한 명이 쪽지를 주고받는 상대 수")
+        parser.add_argument('--hot-pair-messages', type=int, default=20000, help="긴 대화방(사용자 1, 2)의 쪽지 수")
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--db-path', help="벤치마크용 SQLite 파일 경로 (기본: 임시 파일, 기존 파일은 덮어씀)")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--check', action='store_true', help="인덱스 추가 후 실행 계획에 기대한 인덱스가 없으면 실패")
+
+    def _open_connection(self, path):
+        # 기본 DB와 분리된 SQLite 연결을 런타임에 등록
+        connections.settings[BENCH_DB_ALIAS] = connections.configure_settings({
+            'default': {},
+            BENCH_DB_ALIAS: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path},
+        })[BENCH_DB_ALIAS]
+        return connections[BENCH_DB_ALIAS]
+
+    def _seed(self, connection, options):
+        rnd = random.Random(options['seed'])
+        user_count = options['users']
+
+        User.objects.using(BENCH_DB_ALIAS).bulk_create(
+            [User(id=user_id, nickname=f"bench{user_id}", password='') for user_id in range(1, user_count + 1)],
+            batch_size=1000,
+        )
+        partners = {
+            user_id: rnd.sample(range(1, user_count + 1), min(options['partners'], user_count - 1))
+            for user_id in range(1, user_count + 1)
+        }
+
+        started_at = datetime(2024, 1, 1)
+        # hot_every건마다 한 건씩 긴 대화방 쪽지로 생성
+        hot_pair_messages = options['hot_pair_messages']
+        hot_every = max(options['messages'] // hot_pair_messages, 1) if hot_pair_messages else 0
+
+        def rows():
+            for index in range(options['messages']):
+                if hot_every and index % hot_every == 0:
+                    sender_id, recipient_id = rnd.choice([(1, 2), (2, 1)])
+                else:
+                    sender_id = rnd.randint(1, user_count)
+                    recipient_id = rnd.choice(partners[sender_id])
+                    if recipient_id == sender_id:
+                        recipient_id = sender_id % user_count + 1
+                timestamp = started_at + timedelta(seconds=index)
+                yield sender_id, recipient_id, 'bench', timestamp.isoformat(' '), rnd.random() < 0.9
+
+        with transaction.atomic(using=BENCH_DB_ALIAS), connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {Message._meta.db_table} (sender_id, recipient_id, content, timestamp, is_read) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                rows(),
+            )
+
+    def _cases(self):
+        # (이름, 실행 계획 확인용 QuerySet, 실행 함수, 기대 인덱스) - messages_views와 같은 쿼리
+        def detail(user_id, opponent_id):
+            # 대화방 첫 화면(최신 PAGE_SIZE건). 실행 계획은 한 방향 구간 쿼리 기준
+            page_size = ConversationDetailView.PAGE_SIZE
+            queryset = get_directed_messages(user_id, opponent_id, using=BENCH_DB_ALIAS)[:page_size + 1]
+            return queryset, lambda: get_pair_messages_page(user_id, opponent_id, page_size, using=BENCH_DB_ALIAS)
+
+        cold_user_id = 3
+        cold_opponent_id = Message.objects.using(BENCH_DB_ALIAS).filter(
+            sender_id=cold_user_id
+        ).values_list('recipient_id', flat=True).first() or 4
+
+        return [
+            ('대화방 조회 (긴 대화방)', *detail(1, 2), 'message_pair_timeline_idx'),
+            ('대화방 조회 (일반 대화방)', *detail(cold_user_id, cold_opponent_id), 'message_pair_timeline_idx'),
+        ]
+
+    def _measure(self, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def _report(self, title, cases, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n[{title}]"))
+        plans = {}
+        for name, queryset, run, _ in cases:
+            plans[name] = queryset.explain()
+            elapsed_ms = self._measure(run, repeat)
+            self.stdout.write(f"- {name}: {elapsed_ms:.2f} ms (중앙값)")
+            for line in plans[name].splitlines():
+                self.stdout.write(f"    {line}")
+        return plans
+
+    def handle(self, *args, **options):
+        path = options['db_path'] or os.path.join(tempfile.gettempdir(), 'message_bench.sqlite3')
+        if os.path.exists(path):
+            os.remove(path)
+
+        connection = self._open_connection(path)
+        try:
+            with connection.schema_editor() as editor:
+                editor.create_model(User)
+                editor.create_model(Message)
+            # 인덱스는 스키마 편집기를 빠져나올 때 만들어지므로 별도 블록에서 제거
+            with connection.schema_editor() as editor:
+                for index in Message._meta.indexes:
+                    editor.remove_index(Message, index)
+
+            started = time.perf_counter()
+            self._seed(connection, options)
+            self.stdout.write(f"쪽지 {options['messages']:,}건 생성: {time.perf_counter() - started:.1f}s ({path})")
+
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+            cases = self._cases()
+            self._report("인덱스 추가 전 (FK 기본 인덱스만)", cases, options['repeat'])
+
+            with connection.schema_editor() as editor:
+                for index in Message._meta.indexes:
+                    editor.add_index(Message, index)
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+            plans = self._report("인덱스 추가 후", cases, options['repeat'])
+        finally:
+            connection.close()
+
+        if options['check']:
+            missing = [name for name, _, _, index_name in cases if index_name not in plans[name]]
+            if missing:
+                raise CommandError(f"기대한 인덱스를 사용하지 않는 쿼리가 있습니다: {', '.join(missing)}")
+            self.stdout.write(self.style.SUCCESS("모든 쿼리가 기대한 인덱스를 사용합니다."))
@@ -0,0 +1,108 @@
+import json
+import os
+import random
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.ocr_service import HEADER_KEYWORDS, process_ocr_response_with_coords
+
+class Command(BaseCommand):
+    help = (
+        "저장해 둔 Clova OCR 응답(JSON) 모음으로 표 재구성(process_ocr_response_with_coords) 처리량을 측정합니다. "
+        "파일은 응답 하나 또는 응답 리스트(.json), 한 줄에 응답 하나(.jsonl)이며 디렉터리는 하위 파일을 모두 읽습니다. "
+        "--min-throughput을 주면 초당 처리 건수가 기준보다 낮을 때 실패합니다. (CI용) "
+        "익명화된 샘플(여러 행 포함): users/fixtures/ocr_responses"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help="응답 파일 또는 디렉터리")
+        parser.add_argument('--synthetic', type=int, default=0, help="합성 응답 N건을 추가 (녹화된 응답이 없을 때)")
+        parser.add_argument('--rows', type=int, default=1, help="합성 응답의 데이터 행 수")
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--min-throughput', type=float, help="최소 처리량 (응답/초)")
+
+    def _load_file(self, path):
+        with open(path, encoding='utf-8') as f:
+            if path.endswith('.jsonl'):
+                return [json.loads(line) for line in f if line.strip()]
+            data = json.load(f)
+        return data if isinstance(data, list) else [data]
+
+    def _load(self, paths):
+        responses = []
+        for path in paths:
+            if os.path.isdir(path):
+                for root, _, names in os.walk(path):
+                    for name in sorted(names):
+                        if name.endswith(('.json', '.jsonl')):
+                            responses.extend(self._load_file(os.path.join(root, name)))
+            elif os.path.isfile(path):
+                responses.extend(self._load_file(path))
+            else:
+                raise CommandError(f"파일을 찾을 수 없습니다: {path}")
+        return responses
+
+    def _synthetic_response(self, rnd, row_count):
+        # 기숙사 포털 결과 화면과 같은 배치: 헤더 8열, 행별 값(합격여부는 두 줄), 하단 저작권 문구, 잡음 필드
+        def field(text, x, y):
+            width = 14 * len(text)
+            vertices = [{'x': x, 'y': y}, {'x': x + width, 'y': y}, {'x': x + width, 'y': y + 20}, {'x': x, 'y': y + 20}]
+            return {'inferText': text, 'boundingPoly': {'vertices': vertices}}
+
+        columns_x = [100 + index * 130 for index in range(len(HEADER_KEYWORDS))]
+        fields = [field(f"메뉴{index}", 40 + index * 90, 60) for index in range(rnd.randint(5, 15))]
+        fields.extend(field(header, x, 200) for header, x in zip(HEADER_KEYWORDS, columns_x))
+
+        y = 260
+        for _ in range(row_count):
+            values = [
+                str(rnd.randint(60150000, 60259999)), '-', rnd.choice(['홍길동', '김철수', '이영희']),
+                rnd.choice(['남자', '여자']), rnd.choice(['명덕관', '명현관', '3동']), rnd.choice(['2인실', '4인실']),
+                '선발', '등록',
+            ]
+            for value, x in zip(values, columns_x):
+                fields.append(field(value, x + rnd.randint(-6, 6), y + rnd.randint(-3, 3)))
+            fields.append(field('25-1학기(학기)', columns_x[6], y + 24))
+            y += 80
+
+        fields.append(field('TEL. 02-000-0000', 100, y + 60))
+        fields.append(field('Copyright All rights reserved', 400, y + 60))
+        rnd.shuffle(fields)
+        return {'images': [{'inferResult': 'SUCCESS', 'fields': fields}]}
+
+    def handle(self, *args, **options):
+        responses = self._load(options['paths'])
+        rnd = random.Random(options['seed'])
+        responses.extend(self._synthetic_response(rnd, options['rows']) for _ in range(options['synthetic']))
+        if not responses:
+            raise CommandError("측정할 응답이 없습니다. 파일 경로 또는 --synthetic을 지정해주세요.")
+
+        outcomes = Counter()
+        row_counts = Counter()
+        for response in responses:
+            result = process_ocr_response_with_coords(response)
+            if result['success']:
+                outcomes['성공'] += 1
+                row_counts[len(result['rows'])] += 1
+            else:
+                outcomes[result['error'][:40]] += 1
+
+        started = time.perf_counter()
+        for _ in range(options['repeat']):
+            for response in responses:
+                process_ocr_response_with_coords(response)
+        elapsed = time.perf_counter() - started
+        throughput = len(responses) * options['repeat'] / elapsed
+
+        self.stdout.write(f"응답 {len(responses):,}건 x {options['repeat']}회: {elapsed:.2f}s, {throughput:,.0f} 응답/초")
+        for outcome, count in outcomes.most_common():
+            self.stdout.write(f"- {outcome}: {count:,}건")
+        self.stdout.write(f"- 행 수 분포: {dict(sorted(row_counts.items()))}")
+
+        if options['min_throughput'] is not None:
+            if throughput < options['min_throughput']:
+                raise CommandError(f"처리량 {throughput:,.0f} 응답/초가 기준 {options['min_throughput']:,.0f}보다 낮습니다.")
+            self.stdout.write(self.style.SUCCESS(f"처리량 기준({options['min_throughput']:,.0f} 응답/초)을 만족합니다."))
@@ -0,0 +1,81 @@
+import os
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users import ocr_service
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tif', '.tiff')
+
+class Command(BaseCommand):
+    help = (
+        "샘플 스크린샷으로 OCR 전처리(users.ocr_service.preprocess_image)의 크기 감소와 처리 시간을 측정합니다. "
+        "--e2e를 주면 Clova OCR을 전처리 없이/전처리 후 각각 호출해 전체 지연 시간과 파싱 결과 일치 여부를 비교합니다. "
+        "익명화된 샘플: users/fixtures/ocr_screenshots"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help="이미지 파일 또는 이미지가 들어 있는 디렉터리")
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--e2e', action='store_true', help="실제 Clova OCR API 호출 (API 키 필요, 호출 비용 발생)")
+
+    def _collect(self, paths):
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                files.extend(
+                    os.path.join(path, name) for name in sorted(os.listdir(path))
+                    if name.lower().endswith(IMAGE_EXTENSIONS)
+                )
+            elif os.path.isfile(path):
+                files.append(path)
+            else:
+                raise CommandError(f"파일을 찾을 수 없습니다: {path}")
+        if not files:
+            raise CommandError("측정할 이미지가 없습니다.")
+        return files
+
+    def _median_ms(self, func, repeat):
+        timings = []
+        result = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), result
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        total_before = total_after = 0
+
+        for path in self._collect(options['paths']):
+            with open(path, 'rb') as f:
+                image_bytes = f.read()
+
+            elapsed_ms, preprocessed = self._median_ms(lambda: ocr_service.preprocess_image(image_bytes), repeat)
+            bytes_after = preprocessed.bytes_after if preprocessed else len(image_bytes)
+            total_before += len(image_bytes)
+            total_after += bytes_after
+            scale = f"x{preprocessed.scale:.2f}" if preprocessed else "원본 전송"
+            self.stdout.write(
+                f"- {os.path.basename(path)}: {len(image_bytes):,} -> {bytes_after:,} bytes "
+                f"({bytes_after / len(image_bytes):.0%}, {scale}), 전처리 {elapsed_ms:.1f} ms"
+            )
+
+            if options['e2e']:
+                raw_ms, raw_result = self._median_ms(lambda: ocr_service.call_clova_ocr(
+                    image_bytes, preprocess=False, use_cache=False
+                ), repeat)
+                pre_ms, pre_result = self._median_ms(lambda: ocr_service.call_clova_ocr(
+                    image_bytes, preprocess=True, use_cache=False
+                ), repeat)
+                same = raw_result.get('data') == pre_result.get('data')
+                self.stdout.write(
+                    f"    OCR 전체 지연: {raw_ms:.0f} ms -> {pre_ms:.0f} ms, "
+                    + ("파싱 결과 일치" if same else self.style.WARNING(f"파싱 결과 다름: {raw_result} / {pre_result}"))
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"합계: {total_before:,} -> {total_after:,} bytes ({total_after / total_before:.0%})"
+        ))
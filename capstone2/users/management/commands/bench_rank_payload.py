@@ -0,0 +1,60 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.ai_client import build_rank_request
+from users.models import Profile, User
+from users.ranking_codec import dump_payload, encode_compact, msgpack
+
+class Command(BaseCommand):
+    help = "랭킹 요청 본문 형식별(기존 JSON / compact JSON / compact msgpack) 크기와 인코딩 시간을 비교합니다. (DB 사용 안 함)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--candidates', type=int, nargs='+', default=[100, 1000, 5000])
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def _make_profiles(self, count, rnd):
+        choice_fields = [f for f in Profile._meta.fields if f.choices]
+        profiles = []
+        for user_id in range(1, count + 1):
+            profile = Profile(user=User(id=user_id, nickname=f"bench{user_id}"))
+            for field in choice_fields:
+                setattr(profile, field.name, rnd.choice(field.choices)[0])
+            profiles.append(profile)
+        return profiles
+
+    def _measure(self, encode, repeat):
+        best = float('inf')
+        body = b''
+        for _ in range(repeat):
+            started = time.perf_counter()
+            body = encode()
+            best = min(best, time.perf_counter() - started)
+        return len(body), best * 1000
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        formats = {
+            'json (ProfileSerializer)': lambda t, c: json.dumps(build_rank_request(t, c, 50)).encode('utf-8'),
+            'compact-v1 json': lambda t, c: dump_payload(encode_compact(t, c, 50))[0],
+        }
+        if msgpack is not None:
+            formats['compact-v1 msgpack'] = lambda t, c: dump_payload(encode_compact(t, c, 50), use_msgpack=True)[0]
+        else:
+            self.stdout.write(self.style.WARNING("msgpack이 설치되어 있지 않아 msgpack 측정은 건너뜁니다."))
+
+        self.stdout.write(f"{'후보 수':>8} | {'형식':<26} | {'크기(bytes)':>12} | {'인코딩(ms)':>10} | {'크기 비율':>8}")
+        for count in options['candidates']:
+            profiles = self._make_profiles(count + 1, rnd)
+            target, candidates = profiles[0], profiles[1:]
+
+            baseline_size = None
+            for name, encode in formats.items():
+                size, elapsed_ms = self._measure(lambda: encode(target, candidates), options['repeat'])
+                baseline_size = baseline_size or size
+                self.stdout.write(
+                    f"{count:>8} | {name:<26} | {size:>12,} | {elapsed_ms:>10.2f} | {size / baseline_size:>8.1%}"
+                )
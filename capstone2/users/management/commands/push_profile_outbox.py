@@ -0,0 +1,40 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.profile_sync import enqueue_full_sync, purge_sent_outbox, push_outbox_batch
+
+class Command(BaseCommand):
+    help = "ProfileOutbox에 쌓인 프로필 변경 이벤트를 AI 랭커의 프로필 레지스트리(/v1/profiles/sync)로 전송합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--loop', action='store_true', help="종료하지 않고 --interval 초마다 반복 전송")
+        parser.add_argument('--interval', type=float, default=5.0)
+        parser.add_argument(
+            '--full', action='store_true',
+            help="전송 전에 모든 프로필을 UPSERT 이벤트로 넣어 레지스트리를 처음부터 채움 (동기화를 처음 켤 때)"
+        )
+        parser.add_argument('--purge-days', type=int, default=7, help="전송 완료 후 이 기간이 지난 이벤트 삭제")
+
+    def handle(self, *args, **options):
+        if options['full']:
+            queued = enqueue_full_sync()
+            self.stdout.write(f"전체 동기화 이벤트 {queued}건 추가")
+
+        while True:
+            total = 0
+            while True:
+                sent = push_outbox_batch(options['batch_size'])
+                total += sent
+                if sent < options['batch_size']:
+                    break
+
+            purged = purge_sent_outbox(timezone.now() - timedelta(days=options['purge_days']))
+            self.stdout.write(f"전송 {total}건, 정리 {purged}건")
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
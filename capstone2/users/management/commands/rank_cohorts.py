@@ -0,0 +1,47 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from users.prerank import get_active_cohort_keys, rank_cohort
+
+class Command(BaseCommand):
+    help = (
+        "코호트 단위로 매칭 랭킹을 미리 계산해 MatchScore 테이블에 저장합니다. "
+        "--loop를 주면 MATCHING_PRERANK_INTERVAL초마다 반복합니다. (cron 대신 전용 프로세스 하나로 실행할 때)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cohort', action='append', help="특정 코호트만 계산 (e.g., MALE:MYEONGDEOK:DOUBLE:SEMESTER). 여러 번 지정 가능")
+        parser.add_argument('--ranker', choices=['local', 'remote'], help="랭킹 엔진 (기본값: settings.MATCHING_RANKER)")
+        parser.add_argument('--top-k', type=int, help="타깃별로 저장할 후보 수 (기본값: settings.MATCHING_PRERANK_TOP_K)")
+        parser.add_argument('--loop', action='store_true', help="MATCHING_PRERANK_INTERVAL초마다 반복 실행")
+
+    def handle(self, *args, **options):
+        if not options['loop']:
+            return self.rank(options)
+
+        interval = settings.MATCHING_PRERANK_INTERVAL
+        while True:
+            started = time.monotonic()
+            try:
+                self.rank(options)
+            except Exception as e:
+                print(f"Prerank Loop Error: {e}")
+            finally:
+                connection.close()  # 다음 주기까지 DB 연결을 잡고 있지 않음
+            time.sleep(max(interval - (time.monotonic() - started), 0))
+
+    def rank(self, options):
+        cohort_keys = options['cohort'] or get_active_cohort_keys()
+
+        total = 0
+        for cohort_key in cohort_keys:
+            started = time.perf_counter()
+            saved = rank_cohort(cohort_key, ranker=options['ranker'], k=options['top_k'])
+            elapsed = time.perf_counter() - started
+            total += saved
+            self.stdout.write(f"{cohort_key}: {saved}건 저장 ({elapsed:.2f}s)")
+
+        self.stdout.write(self.style.SUCCESS(f"코호트 {len(cohort_keys)}개, 총 {total}건을 저장했습니다."))
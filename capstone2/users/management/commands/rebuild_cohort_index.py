@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from users.cohort import get_feed_cohort_key
+from users.models import DormInfo, Profile
+
+class Command(BaseCommand):
+    help = "DormInfo.cohort_key(매칭 후보 코호트 인덱스)를 전체 재계산합니다. (컬럼 추가 직후 또는 데이터 보정용)"
+
+    def handle(self, *args, **options):
+        profile_user_ids = set(Profile.objects.values_list('user_id', flat=True))
+
+        changed = []
+        for dorm_info in DormInfo.objects.all().iterator():
+            cohort_key = get_feed_cohort_key(dorm_info, dorm_info.user_id in profile_user_ids)
+            if cohort_key != dorm_info.cohort_key:
+                dorm_info.cohort_key = cohort_key
+                changed.append(dorm_info)
+
+        DormInfo.objects.bulk_update(changed, ['cohort_key'], batch_size=500)
+        self.stdout.write(self.style.SUCCESS(f"코호트 키 {len(changed)}건을 갱신했습니다."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.message_search import install_message_fts, rebuild_message_fts
+
+class Command(BaseCommand):
+    help = "쪽지 검색용 FTS 테이블/트리거를 만들고 기존 쪽지 전체를 다시 색인합니다. (SQLite 전용)"
+
+    def handle(self, *args, **options):
+        if not install_message_fts():
+            raise CommandError("현재 DB는 FTS5(trigram)를 지원하지 않습니다. 검색은 icontains 대체 경로로 동작합니다.")
+
+        count = rebuild_message_fts()
+        self.stdout.write(self.style.SUCCESS(f"쪽지 {count}건을 색인했습니다."))
@@ -0,0 +1,81 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+
+from users.conversations import get_side, get_user_pair
+from users.models import Conversation, Message, UnreadCounter
+
+class Command(BaseCommand):
+    help = (
+        "사용자별 전체 안 읽은 쪽지 수(UnreadCounter)를 대화방별 안 읽은 수의 합으로 다시 맞춥니다. "
+        "--recount-conversations를 주면 대화방별 안 읽은 수도 읽음 cursor 기준으로 쪽지를 세어 다시 계산합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recount-conversations', action='store_true')
+        parser.add_argument('--dry-run', action='store_true', help="보정하지 않고 어긋난 건수만 출력")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def _recount_conversations(self, batch_size, dry_run):
+        conversations = {
+            (conversation.user_low_id, conversation.user_high_id): conversation
+            for conversation in Conversation.objects.all().iterator(chunk_size=batch_size)
+        }
+
+        # 읽음 cursor 이후 상대가 보낸 쪽지 수
+        counts = Counter()
+        messages = Message.objects.values_list('id', 'sender_id', 'recipient_id')
+        for message_id, sender_id, recipient_id in messages.iterator(chunk_size=batch_size):
+            conversation = conversations.get(get_user_pair(sender_id, recipient_id))
+            if conversation and message_id > conversation.last_read_message_id_for(recipient_id):
+                counts[(conversation.pk, get_side(conversation.user_low_id, recipient_id))] += 1
+
+        changed = []
+        for conversation in conversations.values():
+            low_count, high_count = counts[(conversation.pk, 'low')], counts[(conversation.pk, 'high')]
+            if (conversation.low_unread_count, conversation.high_unread_count) != (low_count, high_count):
+                conversation.low_unread_count, conversation.high_unread_count = low_count, high_count
+                changed.append(conversation)
+
+        if not dry_run:
+            Conversation.objects.bulk_update(changed, ['low_unread_count', 'high_unread_count'], batch_size=batch_size)
+        self.stdout.write(f"대화방별 안 읽은 수 불일치: {len(changed)}건")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        with transaction.atomic():
+            if options['recount_conversations']:
+                self._recount_conversations(batch_size, dry_run)
+
+            expected = Counter()
+            for user_id, total in Conversation.objects.values('user_low').annotate(
+                total=Sum('low_unread_count')
+            ).values_list('user_low', 'total'):
+                expected[user_id] += total
+            for user_id, total in Conversation.objects.values('user_high').annotate(
+                total=Sum('high_unread_count')
+            ).values_list('user_high', 'total'):
+                expected[user_id] += total
+
+            current = dict(UnreadCounter.objects.values_list('user_id', 'unread_count'))
+            drifted = [
+                UnreadCounter(user_id=user_id, unread_count=expected.get(user_id, 0))
+                for user_id in set(expected) | set(current)
+                if expected.get(user_id, 0) != current.get(user_id, 0)
+            ]
+
+            if not dry_run:
+                UnreadCounter.objects.bulk_create(
+                    drifted,
+                    batch_size=batch_size,
+                    update_conflicts=True,
+                    unique_fields=['user'],
+                    update_fields=['unread_count'],
+                )
+
+        message = f"전체 안 읽은 수 불일치: {len(drifted)}건"
+        self.stdout.write(self.style.WARNING(message) if dry_run else self.style.SUCCESS(f"{message} (보정 완료)"))
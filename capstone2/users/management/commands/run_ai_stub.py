@@ -0,0 +1,164 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from users.ranking_codec import (
+    ACCEPT_PAYLOAD_FORMATS_HEADER, COMPACT_FORMAT, PAYLOAD_FORMAT_HEADER, decode_compact, load_payload,
+)
+from users.scoring import encode_profile, encode_profiles, get_local_ranker
+from users.serializers.auth_serializers import PROFILE_REVERSE_MAPS
+
+def _to_codes(profile_data):
+    # ProfileSerializer가 보낸 '한글' 값을 다시 '코드'로 변환
+    return {
+        field_name: reverse_map.get(profile_data.get(field_name), profile_data.get(field_name))
+        for field_name, reverse_map in PROFILE_REVERSE_MAPS.items()
+    }
+
+def rank_payload(payload):
+    """
+    /v1/rank/topk 요청 본문(기존 형식 또는 compact-v1)을 로컬 엔진으로 랭킹해 AI 서버와 같은 형식으로 응답합니다.
+    """
+    if payload.get('format') == COMPACT_FORMAT:
+        _target_id, target_codes, candidates, k = decode_compact(payload)
+    else:
+        target_codes = _to_codes(payload['target'])
+        candidates = [(c['student_id'], _to_codes(c)) for c in payload.get('candidates', [])]
+        k = payload.get('k')
+
+    return _rank(target_codes, candidates, k)
+
+def _rank(target_codes, candidates, k):
+    ranker = get_local_ranker()
+    if not candidates:
+        return {'result': []}
+
+    candidate_ids = np.array([candidate_id for candidate_id, _ in candidates])
+    gather_index = ranker.build_gather_index(encode_profiles([codes for _, codes in candidates]))
+    scores = ranker.score_codes(np.array(encode_profile(target_codes)), gather_index)
+    top = ranker.top_k(scores, k or len(candidates))
+    return {
+        'result': [
+            {'candidate_id': int(candidate_ids[i]), 'match_percent': int(scores[i])}
+            for i in top
+        ]
+    }
+
+def _decode_ordinals(fields, dictionary, ordinals):
+    return {
+        field_name: dictionary[field_name][ordinal - 1] if ordinal else None
+        for field_name, ordinal in zip(fields, ordinals)
+    }
+
+class ProfileRegistry:
+    """
+    /v1/profiles/sync로 받은 프로필을 보관하는 AI 랭커 레지스트리 흉내. {user_id: (cohort, 코드 dict)}
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.profiles = {}
+
+    def sync(self, payload):
+        fields, dictionary = payload['fields'], payload['dictionary']
+        with self.lock:
+            for item in payload.get('upserts', []):
+                self.profiles[item['id']] = (item['cohort'], _decode_ordinals(fields, dictionary, item['codes']))
+            for user_id in payload.get('deletes', []):
+                self.profiles.pop(user_id, None)
+        return {'upserted': len(payload.get('upserts', [])), 'deleted': len(payload.get('deletes', []))}
+
+    def rank_by_id(self, payload):
+        target_id, cohort_key = payload['target_id'], payload['cohort']
+        with self.lock:
+            if target_id not in self.profiles:
+                return None
+            target_codes = self.profiles[target_id][1]
+            candidates = [
+                (user_id, codes) for user_id, (cohort, codes) in self.profiles.items()
+                if cohort == cohort_key and user_id != target_id
+            ]
+        return _rank(target_codes, candidates, payload.get('k'))
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive 동작 확인용
+    delay = 0.0
+    fail_rate = 0.0
+    api_key = None
+    accept_compact = True
+    registry = None
+
+    def _send_json(self, status_code, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        if self.accept_compact:
+            self.send_header(ACCEPT_PAYLOAD_FORMATS_HEADER, f"json, {COMPACT_FORMAT}")
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+
+        if self.api_key and self.headers.get('x-api-key') != self.api_key:
+            return self._send_json(401, {'detail': 'invalid api key'})
+        if self.path == '/v1/profiles/sync':
+            return self._send_json(200, self.registry.sync(json.loads(body)))
+        if self.path not in ('/v1/rank/topk', '/v1/rank/topk-by-id'):
+            return self._send_json(404, {'detail': 'not found'})
+
+        if self.delay:
+            time.sleep(self.delay)
+        if random.random() < self.fail_rate:
+            return self._send_json(500, {'detail': 'stub failure'})
+
+        if self.headers.get(PAYLOAD_FORMAT_HEADER) == COMPACT_FORMAT and not self.accept_compact:
+            return self._send_json(415, {'detail': 'unsupported payload format'})
+
+        if self.path == '/v1/rank/topk-by-id':
+            result = self.registry.rank_by_id(json.loads(body))
+            if result is None:
+                return self._send_json(404, {'detail': 'unknown target_id'})
+            return self._send_json(200, result)
+
+        self._send_json(200, rank_payload(load_payload(body, self.headers.get('Content-Type'))))
+
+    def log_message(self, format, *args):
+        pass
+
+class Command(BaseCommand):
+    help = "테스트/개발용 로컬 AI 랭킹 서버(/v1/rank/topk, /v1/rank/topk-by-id, /v1/profiles/sync)를 실행합니다. 랭킹은 users.scoring 로컬 엔진으로 계산합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8001)
+        parser.add_argument('--api-key', help="지정하면 x-api-key 헤더를 검사합니다.")
+        parser.add_argument('--delay', type=float, default=0.0, help="응답 지연(초). 타임아웃 테스트용")
+        parser.add_argument('--fail-rate', type=float, default=0.0, help="500 응답 비율 (0~1). 장애 테스트용")
+        parser.add_argument('--no-compact', action='store_true', help="compact-v1 본문을 415로 거절 (구버전 랭커 흉내)")
+
+    def handle(self, *args, **options):
+        handler = type('ConfiguredStubHandler', (StubHandler,), {
+            'delay': options['delay'],
+            'fail_rate': options['fail_rate'],
+            'api_key': options['api_key'],
+            'accept_compact': not options['no_compact'],
+            'registry': ProfileRegistry(),
+        })
+        server = ThreadingHTTPServer((options['host'], options['port']), handler)
+        self.stdout.write(self.style.SUCCESS(
+            f"AI stub server: http://{options['host']}:{options['port']} (AI_SERVER_URL로 지정해서 사용)"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,142 @@
+"""
+오래된 쪽지 보관 (cold storage).
+
+archive_messages 명령이 MESSAGE_ARCHIVE_AFTER_DAYS보다 오래된 쪽지를 대화방별로 시간순
+MESSAGE_ARCHIVE_CHUNK_SIZE건씩 묶어 zlib 압축 후 MessageArchiveChunk 한 행에 저장하고, Message에서는 삭제합니다.
+- 대화방의 마지막 쪽지(Conversation.last_message)는 쪽지 리스트 표시를 위해 보관하지 않습니다.
+- 보관 기준이 시각이므로 한 대화방에서 보관된 쪽지는 항상 Message에 남은 쪽지보다 오래된 쪽지입니다.
+  Conversation.archived_until_*에 보관된 가장 최신 쪽지 위치를 기록해 두고,
+  대화방 조회(get_pair_messages_page)는 cursor가 이 위치를 넘어갈 때만 보관 테이블을 읽습니다.
+- 보관된 쪽지는 Message 삭제 트리거로 검색 색인(users.message_search)에서도 빠집니다.
+"""
+import json
+import zlib
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Q
+
+from users.models import Conversation, Message, MessageArchiveChunk, User
+
+def pack_chunk(rows):
+    """
+    rows: [(id, sender_id, timestamp, content), ...] (시간순) -> 압축된 payload
+    """
+    data = [[message_id, sender_id, timestamp.isoformat(), content] for message_id, sender_id, timestamp, content in rows]
+    return zlib.compress(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+def unpack_chunk(payload):
+    """
+    payload -> [(id, sender_id, timestamp, content), ...] (시간순)
+    """
+    data = json.loads(zlib.decompress(bytes(payload)).decode('utf-8'))
+    return [
+        (message_id, sender_id, datetime.fromisoformat(timestamp), content)
+        for message_id, sender_id, timestamp, content in data
+    ]
+
+def _pair_filter(conversation):
+    low_id, high_id = conversation.user_low_id, conversation.user_high_id
+    return Q(sender_id=low_id, recipient_id=high_id) | Q(sender_id=high_id, recipient_id=low_id)
+
+def archive_conversation(conversation_id, cutoff, chunk_size):
+    """
+    한 대화방에서 cutoff보다 오래된 쪽지를 보관 테이블로 옮깁니다. 반환: 보관한 쪽지 수
+    """
+    with transaction.atomic():
+        # 쪽지 전송(record_message)과 같은 순서로 대화방 행을 먼저 잠금
+        conversation = Conversation.objects.select_for_update().get(pk=conversation_id)
+        messages = Message.objects.filter(_pair_filter(conversation), timestamp__lt=cutoff)
+        if conversation.last_message_id is not None:
+            messages = messages.exclude(pk=conversation.last_message_id)
+
+        rows = list(messages.order_by('timestamp', 'id').values_list('id', 'sender_id', 'timestamp', 'content'))
+        if not rows:
+            return 0
+
+        MessageArchiveChunk.objects.bulk_create([
+            MessageArchiveChunk(
+                conversation=conversation,
+                first_message_id=chunk[0][0],
+                first_timestamp=chunk[0][2],
+                last_message_id=chunk[-1][0],
+                last_timestamp=chunk[-1][2],
+                message_count=len(chunk),
+                payload=pack_chunk(chunk),
+            )
+            for chunk in (rows[start:start + chunk_size] for start in range(0, len(rows), chunk_size))
+        ])
+        messages.delete()
+
+        conversation.archived_until_message_id = rows[-1][0]
+        conversation.archived_until_timestamp = rows[-1][2]
+        conversation.save(update_fields=['archived_until_message_id', 'archived_until_timestamp'])
+        return len(rows)
+
+def _has_archive(conversation):
+    return conversation is not None and conversation.archived_until_timestamp is not None
+
+def _archived_after(conversation, position):
+    # position(timestamp, id)보다 최신인 보관 쪽지가 있는지
+    return _has_archive(conversation) and (
+        (conversation.archived_until_timestamp, conversation.archived_until_message_id) > position
+    )
+
+def _build_messages(conversation, rows, users):
+    messages = []
+    for message_id, sender_id, timestamp, content in rows:
+        recipient_id = conversation.opponent_id_for(sender_id)
+        message = Message(
+            id=message_id, sender_id=sender_id, recipient_id=recipient_id, content=content, timestamp=timestamp
+        )
+        # 직렬화할 때 쪽지마다 사용자를 조회하지 않도록 미리 채움
+        message.sender, message.recipient = users[sender_id], users[recipient_id]
+        messages.append(message)
+    return messages
+
+def get_archived_messages(conversation, limit, before=None, after=None):
+    """
+    보관된 쪽지를 (timestamp, id) keyset으로 최대 limit건 조회합니다. get_directed_messages와 같은 정렬:
+    after면 오래된 순, 그 외에는 최신 순. 보관 테이블에서 읽은 쪽지는 저장되지 않은 Message 인스턴스입니다.
+    """
+    chunks = MessageArchiveChunk.objects.filter(conversation=conversation)
+    if after is not None:
+        chunks = chunks.filter(last_timestamp__gte=after[0]).order_by('last_timestamp', 'last_message_id')
+    else:
+        if before is not None:
+            chunks = chunks.filter(first_timestamp__lte=before[0])
+        chunks = chunks.order_by('-last_timestamp', '-last_message_id')
+
+    rows = []
+    # 필요한 만큼의 chunk만 순서대로 압축 해제
+    for payload in chunks.values_list('payload', flat=True).iterator(chunk_size=1):
+        chunk_rows = unpack_chunk(payload)
+        if after is not None:
+            rows.extend(row for row in chunk_rows if (row[2], row[0]) > after)
+        else:
+            rows.extend(row for row in reversed(chunk_rows) if before is None or (row[2], row[0]) < before)
+        if len(rows) >= limit:
+            break
+    rows = rows[:limit]
+    if not rows:
+        return []
+
+    users = User.objects.in_bulk([conversation.user_low_id, conversation.user_high_id])
+    return _build_messages(conversation, rows, users)
+
+def fill_from_archive(conversation, messages, limit, before=None, after=None):
+    """
+    Message에서 읽은 쪽지(get_directed_messages 정렬, limit + 1건까지)가 부족할 때만 보관된 쪽지로 이어 채웁니다.
+    - 최신 순(before/첫 화면): Message에 남은 구간을 다 읽었으면 그보다 오래된 보관 쪽지를 뒤에 이어 붙임
+    - 오래된 순(after): cursor가 보관 구간 안에 있으면 보관 쪽지를 앞에 두고 Message 쪽지를 이어 붙임
+    """
+    if after is not None:
+        if not _archived_after(conversation, after):
+            return messages
+        return get_archived_messages(conversation, limit + 1, after=after) + messages
+
+    # Message 쪽지가 limit건 이하면 두 방향 모두 Message에 남은 구간을 다 읽은 것
+    if len(messages) > limit or not _has_archive(conversation):
+        return messages
+    boundary = min((message.timestamp, message.id) for message in messages) if messages else before
+    return messages + get_archived_messages(conversation, limit + 1 - len(messages), before=boundary)
@@ -0,0 +1,120 @@
+"""
+쪽지 내용 검색.
+
+SQLite(FTS5 + trigram 토크나이저 지원)에서는 FTS5 가상 테이블 users_message_fts를 사용합니다.
+- content: 쪽지 내용 (trigram이라 한국어도 3글자 이상 부분 문자열로 검색 가능)
+- participants: "<보낸 사람 id> <받는 사람 id>" (내가 참여한 대화방의 쪽지만 색인 단계에서 거르기 위함)
+Message INSERT/UPDATE/DELETE 트리거로 동기화되므로 bulk_create 등 signal이 발생하지 않는 경로도 반영됩니다.
+테이블/트리거는 migrate 직후(post_migrate) 생성되며, 기존 쪽지는 rebuild_message_search로 색인합니다.
+
+그 외 DB이거나 검색어가 3글자 미만이면 내가 참여한 쪽지 범위에서 icontains로 찾습니다. (최신순)
+"""
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db.models import Q
+
+from users.models import Message
+
+FTS_TABLE = 'users_message_fts'
+FTS_MIN_QUERY_LENGTH = 3  # trigram 토크나이저는 3글자 미만 검색어를 색인으로 찾지 못함
+
+_PARTICIPANTS_SQL = "'<' || {row}.sender_id || '> <' || {row}.recipient_id || '>'"
+
+def _fts_statements():
+    message_table = Message._meta.db_table
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(content, participants, tokenize='trigram')",
+        f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {message_table} BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, content, participants)
+            VALUES (new.id, new.content, {_PARTICIPANTS_SQL.format(row='new')});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {message_table} BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF content ON {message_table} BEGIN
+            UPDATE {FTS_TABLE} SET content = new.content WHERE rowid = old.id;
+        END""",
+    ]
+
+_fts_ready = {}
+
+def fts_available(using=DEFAULT_DB_ALIAS):
+    """
+    FTS 테이블이 준비된 SQLite DB인지 (프로세스별로 한 번만 확인)
+    """
+    if using not in _fts_ready:
+        connection = connections[using]
+        ready = False
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+                ready = cursor.fetchone() is not None
+        _fts_ready[using] = ready
+    return _fts_ready[using]
+
+def install_message_fts(using=DEFAULT_DB_ALIAS):
+    """
+    FTS 테이블과 동기화 트리거를 만듭니다. (이미 있으면 그대로) 지원하지 않는 DB면 False
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    try:
+        with connection.cursor() as cursor:
+            for statement in _fts_statements():
+                cursor.execute(statement)
+    except OperationalError as e:  # FTS5/trigram을 지원하지 않는 SQLite 빌드
+        print(f"Message Search FTS Install Error: {e}")
+        return False
+    _fts_ready.pop(using, None)
+    return True
+
+def rebuild_message_fts(using=DEFAULT_DB_ALIAS):
+    """
+    기존 쪽지 전체를 다시 색인합니다. 반환: 색인한 쪽지 수
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, content, participants) "
+            f"SELECT id, content, {_PARTICIPANTS_SQL.format(row='m')} FROM {Message._meta.db_table} AS m"
+        )
+        cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}")
+        return cursor.fetchone()[0]
+
+def _quote(term):
+    # 사용자 입력을 FTS5 문법이 아닌 하나의 문구로 검색
+    return '"' + term.replace('"', '""') + '"'
+
+def _search_fts(user_id, query, limit, offset):
+    match = f"content : {_quote(query)} AND participants : {_quote(f'<{user_id}>')}"
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY rank, rowid DESC LIMIT %s OFFSET %s",
+            [match, limit, offset]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+def _search_fallback(user_id, query, limit, offset):
+    return list(
+        Message.objects.filter(Q(sender_id=user_id) | Q(recipient_id=user_id), content__icontains=query)
+        .order_by('-id').values_list('id', flat=True)[offset:offset + limit]
+    )
+
+def search_messages(user_id, query, limit, offset=0):
+    """
+    user가 보내거나 받은 쪽지 중 query를 포함하는 것을 관련도순(FTS bm25, 대체 경로는 최신순)으로 조회합니다.
+    반환: (쪽지 리스트, 다음 페이지가 있는지 여부)
+    """
+    query = query.strip()
+    if not query:
+        return [], False
+
+    if fts_available() and len(query) >= FTS_MIN_QUERY_LENGTH:
+        message_ids = _search_fts(user_id, query, limit + 1, offset)
+    else:
+        message_ids = _search_fallback(user_id, query, limit + 1, offset)
+
+    has_next = len(message_ids) > limit
+    message_ids = message_ids[:limit]
+    messages_map = Message.objects.select_related('sender', 'recipient').in_bulk(message_ids)
+    return [messages_map[message_id] for message_id in message_ids if message_id in messages_map], has_next
@@ -0,0 +1,40 @@
+"""
+프로세스 단위의 간단한 운영 지표 저장소.
+카운터는 incr()로 올리고, 소요 시간 같은 값은 observe()로 건수/합계/최댓값을 기록하며, 게이지는 조회 시점에 값을 계산하는 함수로 등록합니다.
+(워커 프로세스마다 값이 따로 집계됨)
+"""
+import threading
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+
+def incr(name, amount=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+def observe(name, value):
+    """
+    소요 시간 등 분포 값 기록: <name>.count / <name>.sum / <name>.max
+    """
+    with _lock:
+        _counters[f"{name}.count"] = _counters.get(f"{name}.count", 0) + 1
+        _counters[f"{name}.sum"] = _counters.get(f"{name}.sum", 0) + value
+        _counters[f"{name}.max"] = max(_counters.get(f"{name}.max", value), value)
+
+def get_counter(name):
+    return _counters.get(name, 0)
+
+def register_gauge(name, func):
+    _gauges[name] = func
+
+def snapshot():
+    with _lock:
+        data = dict(_counters)
+
+    for name, func in _gauges.items():
+        try:
+            data[name] = func()
+        except Exception as e:
+            data[name] = f"error: {e}"
+    return dict(sorted(data.items()))
@@ -1,3 +1,5 @@
+import uuid
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
@@ -62,10 +64,34 @@ class DormInfo(models.Model):
     residency_period = models.CharField("거주 기간", max_length=20, choices=ResidencyPeriodChoices.choices)
     selected_semester = models.CharField("선발 학기", max_length=20, null=True, blank=True)
     is_accepted = models.CharField("합격 여부", max_length=20, choices=AcceptanceChoices.choices)
+    # 매칭 피드 후보 조회용 비정규화 컬럼 (users.cohort 참고). 프로필 작성 + 선발된 사용자만 값을 가짐
+    cohort_key = models.CharField("매칭 코호트", max_length=100, null=True, blank=True, db_index=True, editable=False)
 
     def __str__(self):
         return f"{self.user.nickname}님의 기숙사 지원 정보"
 
+class DormVerificationJob(models.Model):
+    """
+    기숙사 인증(OCR) 작업. 업로드 요청은 작업만 만들고 바로 응답하며, OCR/검증은 작업 큐에서 실행됩니다. (users.ocr_jobs)
+    가입 전 단계라 사용자와 연결하지 않고, 추측할 수 없는 UUID로만 조회합니다.
+    """
+    class StatusChoices(models.TextChoices):
+        PENDING = 'PENDING', '대기'
+        RUNNING = 'RUNNING', '처리 중'
+        SUCCEEDED = 'SUCCEEDED', '성공'
+        FAILED = 'FAILED', '실패'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField("상태", max_length=10, choices=StatusChoices.choices, default=StatusChoices.PENDING)
+    result = models.JSONField("인증 결과", null=True, blank=True)  # 성공 시 DormVerificationSerializer 검증 결과
+    errors = models.JSONField("오류", null=True, blank=True)  # 실패 시 serializer.errors와 같은 형식
+    created_at = models.DateTimeField("생성 시각", auto_now_add=True, db_index=True)
+    started_at = models.DateTimeField("시작 시각", null=True, blank=True)
+    finished_at = models.DateTimeField("완료 시각", null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.id} ({self.status})"
+
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
 
@@ -161,4 +187,138 @@ class Message(models.Model):
     recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='received_messages')
     content = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
-    is_read = models.BooleanField(default=False)
\ No newline at end of file
+    # 이전 버전의 쪽지별 읽음 여부 (backfill_conversations에서 읽음 cursor를 만들 때만 사용, 더 이상 갱신하지 않음)
+    # 읽음 여부는 Conversation의 참여자별 last_read_message_id로 판단
+    is_read = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            # 대화방 조회: (보낸 사람, 받는 사람) 쌍별로 시간순 정렬
+            models.Index(fields=['sender', 'recipient', 'timestamp', 'id'], name='message_pair_timeline_idx'),
+        ]
+
+class Conversation(models.Model):
+    """
+    두 사용자 간 대화방 요약 (쪽지 리스트용). 한 쌍당 한 행이며 user_low.id < user_high.id 입니다.
+    쪽지를 보낼 때(users.conversations.record_message) 같은 트랜잭션에서 갱신됩니다.
+    """
+    user_low = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    user_high = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    last_message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, related_name='+')
+    last_timestamp = models.DateTimeField("마지막 쪽지 시각", null=True)
+    # 참여자별 읽음 cursor: 상대가 보낸 쪽지 중 id가 이 값 이하인 것은 읽은 것으로 봄
+    low_last_read_message_id = models.PositiveBigIntegerField("user_low가 마지막으로 읽은 쪽지 id", default=0)
+    high_last_read_message_id = models.PositiveBigIntegerField("user_high가 마지막으로 읽은 쪽지 id", default=0)
+    # 참여자별 cursor 이후 상대가 보낸 쪽지 수
+    low_unread_count = models.PositiveIntegerField("user_low가 읽지 않은 쪽지 수", default=0)
+    high_unread_count = models.PositiveIntegerField("user_high가 읽지 않은 쪽지 수", default=0)
+    # 보관(MessageArchiveChunk)으로 옮긴 가장 최신 쪽지의 (timestamp, id). 이보다 오래된 쪽지는 보관 테이블에만 있음
+    archived_until_timestamp = models.DateTimeField("보관된 마지막 쪽지 시각", null=True, blank=True)
+    archived_until_message_id = models.PositiveBigIntegerField("보관된 마지막 쪽지 id", default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user_low', 'user_high'], name='unique_conversation_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['user_low', '-last_timestamp', '-id'], name='conversation_low_inbox_idx'),
+            models.Index(fields=['user_high', '-last_timestamp', '-id'], name='conversation_high_inbox_idx'),
+        ]
+
+    def opponent_id_for(self, user_id):
+        return self.user_high_id if self.user_low_id == user_id else self.user_low_id
+
+    def opponent_for(self, user_id):
+        return self.user_high if self.user_low_id == user_id else self.user_low
+
+    def unread_count_for(self, user_id):
+        return self.low_unread_count if self.user_low_id == user_id else self.high_unread_count
+
+    def last_read_message_id_for(self, user_id):
+        return self.low_last_read_message_id if self.user_low_id == user_id else self.high_last_read_message_id
+
+    def is_read(self, message):
+        # 받는 사람의 읽음 cursor 기준
+        return message.id <= self.last_read_message_id_for(message.recipient_id)
+
+    def __str__(self):
+        return f"{self.user_low_id} <-> {self.user_high_id}"
+
+class MessageArchiveChunk(models.Model):
+    """
+    오래된 쪽지 보관 (archive_messages). 대화방별로 시간순 최대 MESSAGE_ARCHIVE_CHUNK_SIZE건을 zlib 압축해 한 행에 저장합니다.
+    payload: [[id, sender_id, timestamp(ISO), content], ...]를 JSON으로 직렬화 후 압축 (users.message_archive)
+    """
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='archive_chunks')
+    first_message_id = models.PositiveBigIntegerField()
+    first_timestamp = models.DateTimeField()
+    last_message_id = models.PositiveBigIntegerField()
+    last_timestamp = models.DateTimeField()
+    message_count = models.PositiveIntegerField()
+    payload = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['conversation', '-last_timestamp', '-last_message_id'], name='message_archive_chunk_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.conversation_id}: {self.first_message_id}~{self.last_message_id} ({self.message_count}건)"
+
+class UnreadCounter(models.Model):
+    """
+    사용자별 전체 안 읽은 쪽지 수 (탭 배지용). 모든 대화방의 내 쪽 unread_count 합과 같게 유지됩니다.
+    쪽지를 받으면 +1, 읽음 cursor가 올라가면 해당 대화방에서 읽은 수만큼 -1 (어긋나면 reconcile_unread_counters로 보정)
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='unread_counter')
+    unread_count = models.PositiveIntegerField("안 읽은 쪽지 수", default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread_count}"
+
+class MatchScore(models.Model):
+    """
+    코호트 일괄 랭킹 결과. user(타깃) 기준으로 candidate의 적합도와 순위를 미리 계산해 둡니다.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='match_scores')
+    candidate = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    cohort_key = models.CharField("매칭 코호트", max_length=100)
+    percent = models.FloatField("적합도")
+    rank = models.PositiveIntegerField("순위")
+    computed_at = models.DateTimeField("계산 시각")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'candidate'], name='unique_match_score_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'cohort_key', 'rank'], name='match_score_feed_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.candidate_id} ({self.rank}위, {self.percent}%)"
+
+class ProfileOutbox(models.Model):
+    """
+    AI 랭커의 프로필 레지스트리 동기화용 아웃박스.
+    변경 '사실'만 기록하고, 전송 시점에 최신 프로필을 읽어 사용자별로 합쳐서 보냅니다. (users.profile_sync)
+    """
+    class EventChoices(models.TextChoices):
+        UPSERT = 'UPSERT', '생성/수정'
+        DELETE = 'DELETE', '삭제'
+
+    user_id = models.BigIntegerField("사용자 ID")  # 삭제 이벤트도 보내야 하므로 FK를 걸지 않음
+    event = models.CharField("이벤트", max_length=10, choices=EventChoices.choices)
+    created_at = models.DateTimeField("생성 시각", auto_now_add=True)
+    sent_at = models.DateTimeField("전송 시각", null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sent_at', 'id'], name='profile_outbox_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.event}"
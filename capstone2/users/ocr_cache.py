@@ -0,0 +1,57 @@
+"""
+OCR 파싱 결과 캐시.
+
+같은 스크린샷으로 인증을 다시 시도하는 경우(학번 중복, 건물/성별 불일치 등으로 실패한 뒤 재시도)
+Clova 호출 없이 이전 파싱 결과를 사용합니다. 키는 원본 이미지 바이트의 SHA-256이며,
+프로세스별로 최대 OCR_RESULT_CACHE_SIZE건을 LRU로 유지하고 OCR_RESULT_CACHE_TTL초가 지나면 버립니다.
+성공한 결과만 저장합니다. (네트워크 오류 등 일시적인 실패는 다시 호출)
+
+프로세스(gunicorn 워커)마다 따로 유지되므로 재시도 요청이 다른 워커로 가면 캐시를 쓰지 못하고 Clova를 다시 호출합니다.
+공유 캐시(settings.CACHES, DB 테이블)에는 두지 않습니다. 파싱 결과에 학번/이름이 들어 있어 DB에 남기지 않기 위함이며,
+워커 수만큼 적중률이 떨어지는 대신 재시작하면 모두 사라집니다.
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+def image_digest(image_bytes):
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+class OcrResultCache:
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # digest -> (만료 시각, 결과), 오래 사용하지 않은 순
+
+    def get(self, digest):
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            expires_at, result = entry
+            if expires_at <= time.monotonic():
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+        # 호출한 쪽에서 결과를 수정해도 캐시에 영향이 없도록 복사본 반환
+        return copy.deepcopy(result)
+
+    def set(self, digest, result):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[digest] = (time.monotonic() + self.ttl, copy.deepcopy(result))
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
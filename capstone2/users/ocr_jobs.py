@@ -0,0 +1,168 @@
+"""
+기숙사 인증 OCR 작업 큐.
+
+업로드 요청(DormVerificationView)은 이미지 바이트를 메모리로 읽어 작업에 넘기고(디스크 임시 파일 없음)
+DormVerificationJob을 만든 뒤 바로 job id를 응답합니다.
+OCR 호출(call_clova_ocr, 최대 10초)과 검증(build_dorm_data)은 DORM_OCR_WORKERS개의 작업 스레드에서 실행되고,
+클라이언트는 verify-dorm/<job_id>/를 조회해 결과를 받습니다.
+- 대기 중인 작업이 DORM_OCR_QUEUE_SIZE를 넘으면 새 업로드를 거절합니다. (OcrQueueFullError -> 503)
+- 작업 상태/결과는 DB에 저장되므로 어느 워커 프로세스에서든 조회할 수 있습니다.
+- 기본 백엔드(InProcessOcrJobQueue)는 업로드를 받은 프로세스의 스레드 풀에서 실행합니다.
+  EagerOcrJobQueue는 submit 시점에 바로 실행합니다. (테스트/로컬용)
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+
+from users import metrics
+from users.models import DormVerificationJob
+from users.ocr_service import call_clova_ocr
+from users.serializers.auth_serializers import build_dorm_data
+
+Status = DormVerificationJob.StatusChoices
+
+class OcrQueueFullError(Exception):
+    pass
+
+
+class InProcessOcrJobQueue:
+    def __init__(self):
+        self.max_workers = settings.DORM_OCR_WORKERS
+        self.max_queued = settings.DORM_OCR_QUEUE_SIZE
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='dorm-ocr')
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+
+    def submit(self, func, *args):
+        with self._lock:
+            if self._queued >= self.max_queued:
+                raise OcrQueueFullError()
+            self._queued += 1
+        self._executor.submit(self._run, func, args)
+
+    def _run(self, func, args):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            func(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+            connection.close()  # 작업 스레드의 DB 연결 정리
+
+    def queued_count(self):
+        return self._queued
+
+    def running_count(self):
+        return self._running
+
+
+class EagerOcrJobQueue:
+    """
+    submit을 호출한 스레드에서 바로 실행합니다. (테스트/로컬용)
+    """
+
+    def submit(self, func, *args):
+        func(*args)
+
+    def queued_count(self):
+        return 0
+
+    def running_count(self):
+        return 0
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_ocr_job_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = import_string(settings.DORM_OCR_JOB_BACKEND)()
+    return _queue
+
+def _elapsed_ms(start, end):
+    return (end - start).total_seconds() * 1000
+
+def run_dorm_verification_job(job_id, image_bytes):
+    # 제한 시간이 지나 이미 실패 처리된 작업은 건너뜀
+    started_at = timezone.now()
+    if not DormVerificationJob.objects.filter(pk=job_id, status=Status.PENDING).update(
+        status=Status.RUNNING, started_at=started_at
+    ):
+        metrics.incr('ocr.jobs.expired')
+        return
+
+    try:
+        ocr_result = call_clova_ocr(image_bytes)
+        if not ocr_result.get("success"):
+            raise serializers.ValidationError(f"OCR API 실패: {ocr_result.get('error')}")
+        fields = {'status': Status.SUCCEEDED, 'result': build_dorm_data(ocr_result.get("data"))}
+    except serializers.ValidationError as e:
+        fields = {'status': Status.FAILED, 'errors': serializers.as_serializer_error(e)}
+    except Exception as e:
+        print(f"Dorm Verification Job Error (job_id={job_id}): {e}")
+        fields = {'status': Status.FAILED, 'errors': {"detail": "인증 처리 중 오류가 발생했습니다."}}
+
+    finished_at = timezone.now()
+    DormVerificationJob.objects.filter(pk=job_id, status=Status.RUNNING).update(finished_at=finished_at, **fields)
+    metrics.incr('ocr.jobs.succeeded' if fields['status'] == Status.SUCCEEDED else 'ocr.jobs.failed')
+    metrics.observe('ocr.jobs.run_ms', _elapsed_ms(started_at, finished_at))
+
+    # 인증 결과(이름, 학번)는 보관 시간이 지나면 삭제
+    DormVerificationJob.objects.filter(
+        created_at__lt=finished_at - timedelta(seconds=settings.DORM_OCR_JOB_RETENTION)
+    ).delete()
+
+def _run_job(job_id, image_bytes, submitted_at):
+    metrics.observe('ocr.jobs.wait_ms', (time.monotonic() - submitted_at) * 1000)
+    run_dorm_verification_job(job_id, image_bytes)
+
+def submit_dorm_verification(image):
+    """
+    업로드 이미지를 OCR 작업 큐에 넣습니다. 반환: DormVerificationJob
+    큐가 가득 차면 OcrQueueFullError
+    """
+    # 업로드 파일(메모리 또는 Django 업로드 임시 파일)은 요청이 끝나면 닫히므로 작업에는 바이트로 넘김
+    image.seek(0)
+    image_bytes = image.read()
+    job = DormVerificationJob.objects.create()
+    try:
+        get_ocr_job_queue().submit(_run_job, job.pk, image_bytes, time.monotonic())
+    except OcrQueueFullError:
+        job.delete()
+        metrics.incr('ocr.jobs.rejected')
+        raise
+
+    metrics.incr('ocr.jobs.submitted')
+    return job
+
+def expire_if_timed_out(job):
+    """
+    DORM_OCR_JOB_TIMEOUT이 지나도록 끝나지 않은 작업(프로세스 재시작 등으로 유실)을 실패로 처리합니다.
+    """
+    if job.status not in (Status.PENDING, Status.RUNNING):
+        return job
+    if timezone.now() - job.created_at < timedelta(seconds=settings.DORM_OCR_JOB_TIMEOUT):
+        return job
+
+    errors = {"detail": "인증 처리 시간이 초과되었습니다. 다시 시도해주세요."}
+    if DormVerificationJob.objects.filter(pk=job.pk, status=job.status).update(
+        status=Status.FAILED, errors=errors, finished_at=timezone.now()
+    ):
+        metrics.incr('ocr.jobs.timed_out')
+    job.refresh_from_db()
+    return job
+
+metrics.register_gauge('ocr.jobs.queued', lambda: get_ocr_job_queue().queued_count())
+metrics.register_gauge('ocr.jobs.running', lambda: get_ocr_job_queue().running_count())
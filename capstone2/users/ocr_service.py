@@ -1,15 +1,40 @@
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 
+import bisect
+import io
+import re
 import requests
 import json
 import uuid
 import time
 import os
 from decouple import config
+from PIL import Image, ImageChops, ImageOps, UnidentifiedImageError
+
+from users import metrics
+from users.ocr_cache import OcrResultCache, image_digest
 
 API_URL = config('CLOVA_OCR_APIGW_URL')
 SECRET_KEY = config('CLOVA_OCR_SECRET_KEY')
 
+# OCR 전송 전 이미지 전처리 (preprocess_image)
+# 스크린샷에는 실제 DPI 정보가 없으므로 가로 픽셀 수를 기준으로 축소 (확대는 하지 않음)
+OCR_PREPROCESS_ENABLED = config('OCR_PREPROCESS_ENABLED', default=True, cast=bool)
+OCR_PREPROCESS_MAX_WIDTH = config('OCR_PREPROCESS_MAX_WIDTH', default=1080, cast=int)
+OCR_PREPROCESS_GRAYSCALE = config('OCR_PREPROCESS_GRAYSCALE', default=True, cast=bool)
+OCR_PREPROCESS_FORMAT = config('OCR_PREPROCESS_FORMAT', default='jpeg')  # 'jpeg' / 'png' (Clova는 WebP 미지원)
+OCR_PREPROCESS_JPEG_QUALITY = config('OCR_PREPROCESS_JPEG_QUALITY', default=85, cast=int)
+# 배경색과 같은 가장자리 여백을 잘라냄 (결과 표 주변 여백)
+OCR_PREPROCESS_AUTOCROP = config('OCR_PREPROCESS_AUTOCROP', default=False, cast=bool)
+OCR_PREPROCESS_AUTOCROP_THRESHOLD = 16
+
+# 같은 이미지(SHA-256) 재시도 시 파싱 결과 재사용 (users.ocr_cache): 유지 시간(초), 프로세스별 최대 건수
+OCR_RESULT_CACHE_TTL = config('OCR_RESULT_CACHE_TTL', default=600, cast=int)
+OCR_RESULT_CACHE_SIZE = config('OCR_RESULT_CACHE_SIZE', default=256, cast=int)
+
+ocr_result_cache = OcrResultCache(OCR_RESULT_CACHE_SIZE, OCR_RESULT_CACHE_TTL)
+metrics.register_gauge('ocr.cache.size', lambda: len(ocr_result_cache))
+
 HEADER_KEYWORDS = ['학번', '학년', '이름', '성별', '지원건물', '지원호실구분', '합격여부', '등록여부']
 STOP_KEYWORDS = [
     'TEL.', 'FAX.', 'Copyright', 'All rights reserved',
@@ -20,12 +45,21 @@ Y_STOP_PADDING = 5
 Y_DATA_MAX_HEIGHT = 400
 HEADER_Y_TOLERANCE = 10
 
+STOP_PATTERN = re.compile('|'.join(re.escape(stop_word) for stop_word in STOP_KEYWORDS))
+HEADER_KEYWORD_SET = frozenset(HEADER_KEYWORDS)
+ROW_ANCHOR_HEADER = '학번'  # 행마다 한 줄로 인식되는 열. 이 열의 값마다 한 행으로 나눔
+
+def _find_row(row_boundaries, y_center):
+    # 행 기준점(학번) 사이 중간값 경계로 가장 가까운 행을 찾음 (여러 줄로 나뉜 셀도 같은 행에 들어감)
+    return bisect.bisect_right(row_boundaries, y_center)
+
 def process_ocr_response_with_coords(result):
     """
     General OCR V2 응답의 'fields'와 'boundingPoly' 좌표를 기반으로
-    수동으로 테이블을 재구성합니다. (v9.1 - Stop Boundary Padding)
+    수동으로 테이블을 재구성합니다. (v10 - Multi Row)
 
     서비스에 맞게 print() 대신 dict를 return 합니다.
+    data는 첫 번째 행(딕셔너리), rows는 위에서부터 모든 행의 리스트입니다.
     """
 
     try:
@@ -43,13 +77,13 @@ def process_ocr_response_with_coords(result):
             continue
 
         vertices = field['boundingPoly']['vertices']
-        y_center = sum(v['y'] for v in vertices) / 4
-        x_start = min(v['x'] for v in vertices)
-        x_end = max(v['x'] for v in vertices)
+        xs = [v.get('x', 0) for v in vertices]
+        x_start = min(xs)
+        x_end = max(xs)
 
         all_fields.append({
             'text': field['inferText'].strip(),
-            'y_center': y_center,
+            'y_center': sum(v.get('y', 0) for v in vertices) / 4,
             'x_start': x_start,
             'x_end': x_end,
             'x_center': (x_start + x_end) / 2
@@ -65,7 +99,7 @@ def process_ocr_response_with_coords(result):
     header_line_texts_map = defaultdict(list)
 
     for field in all_fields:
-        if field['text'] in HEADER_KEYWORDS:
+        if field['text'] in HEADER_KEYWORD_SET:
             y_group = round(field['y_center'] / HEADER_Y_TOLERANCE) * HEADER_Y_TOLERANCE
             y_header_counts[y_group] += 1
             header_line_texts_map[y_group].append(field)
@@ -88,61 +122,138 @@ def process_ocr_response_with_coords(result):
 
     headers = [f['text'] for f in header_line]
 
-    # 열(Column) 경계(Bins) 설정
+    # 열(Column) 경계 설정: 인접한 헤더 중심의 중간값. column_edges[i] <= x < column_edges[i+1]이면 i번째 열
     header_x_centers = [f['x_center'] for f in header_line]
-    column_bins = []
-    for i, header_name in enumerate(headers):
-        bin_start = header_line[i]['x_start'] - X_TOLERANCE if i == 0 else (header_x_centers[i-1] + header_x_centers[i]) / 2
-        bin_end = header_line[i]['x_end'] + X_TOLERANCE if i == len(headers) - 1 else (header_x_centers[i] + header_x_centers[i+1]) / 2
-        column_bins.append({'name': header_name, 'x_start': bin_start, 'x_end': bin_end})
+    column_edges = [header_line[0]['x_start'] - X_TOLERANCE]
+    column_edges.extend((header_x_centers[i] + header_x_centers[i + 1]) / 2 for i in range(len(headers) - 1))
+    column_edges.append(header_line[-1]['x_end'] + X_TOLERANCE)
 
     # 스톱 '기준점(Anchor)' 찾기
-    Y_STOP = float('inf')
-    found_stop_keyword = False
+    y_data_start = Y_HEADER + HEADER_Y_TOLERANCE
+    Y_STOP = Y_HEADER + Y_DATA_MAX_HEIGHT
     for field in all_fields:
-        if (field['y_center'] > Y_HEADER + HEADER_Y_TOLERANCE) and any(stop_word in field['text'] for stop_word in STOP_KEYWORDS):
+        if field['y_center'] > y_data_start and STOP_PATTERN.search(field['text']):
             Y_STOP = field['y_center'] - Y_STOP_PADDING
-            found_stop_keyword = True
             break
 
-    if not found_stop_keyword:
-        Y_STOP = Y_HEADER + Y_DATA_MAX_HEIGHT
-
-    # Y좌표로 데이터 필터링 및 병합
-    data_rows = []
-    current_row_dict = {header: "" for header in headers}
-
+    # Y좌표로 데이터 필터링 후 열 배정
+    data_fields = []
     for field in all_fields:
-        if (field['y_center'] > Y_HEADER + HEADER_Y_TOLERANCE) and (field['y_center'] < Y_STOP):
-            target_col_name = None
-            for bin in column_bins:
-                if (field['x_center'] >= bin['x_start']) and (field['x_center'] < bin['x_end']):
-                    target_col_name = bin['name']
-                    break
-
-            if target_col_name:
-                if current_row_dict[target_col_name]:
-                    current_row_dict[target_col_name] += " " + field['text']
-                else:
-                    current_row_dict[target_col_name] = field['text']
-
-    if any(current_row_dict.values()):
-        data_rows.append(current_row_dict)
-
+        if y_data_start < field['y_center'] < Y_STOP:
+            column_index = bisect.bisect_right(column_edges, field['x_center']) - 1
+            if 0 <= column_index < len(headers):
+                data_fields.append((headers[column_index], field))
+
+    # 행 나누기: 행 기준 열의 값들 사이 중간값을 경계로 사용 (기준 열 값이 하나 이하면 한 행)
+    anchor_ys = [field['y_center'] for header, field in data_fields if header == ROW_ANCHOR_HEADER]
+    row_boundaries = [(anchor_ys[i] + anchor_ys[i + 1]) / 2 for i in range(len(anchor_ys) - 1)]
+
+    data_rows = [{header: "" for header in headers} for _ in range(len(row_boundaries) + 1)]
+    for header, field in data_fields:
+        row = data_rows[_find_row(row_boundaries, field['y_center'])]
+        if row[header]:
+            row[header] += " " + field['text']
+        else:
+            row[header] = field['text']
+
+    data_rows = [row for row in data_rows if any(row.values())]
     if not data_rows:
         return {"success": False, "error": "데이터 행을 재구성하지 못했습니다."}
 
     # 후처리 필터 (학년이 '-' 이면 빈칸으로)
-    final_data_row = data_rows[0]
-    if final_data_row.get('학년') == '-':
-        final_data_row['학년'] = ''
+    for row in data_rows:
+        if row.get('학년') == '-':
+            row['학년'] = ''
+
+    return {"success": True, "data": data_rows[0], "rows": data_rows}
+
+# 매직 바이트 -> (Clova 'format', MIME). Clova General OCR이 지원하는 형식만
+IMAGE_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'png', 'image/png'),
+    (b'\xff\xd8\xff', 'jpg', 'image/jpeg'),
+    (b'%PDF-', 'pdf', 'application/pdf'),
+    (b'II*\x00', 'tiff', 'image/tiff'),
+    (b'MM\x00*', 'tiff', 'image/tiff'),
+]
+SIGNATURE_LENGTH = max(len(signature) for signature, _, _ in IMAGE_SIGNATURES)
+
+def detect_image_format(header):
+    """
+    파일 앞부분 바이트로 형식을 판별합니다. (확장자는 보지 않음) 반환: (format, MIME) 또는 (None, None)
+    """
+    for signature, file_format, mime_type in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return file_format, mime_type
+    return None, None
+
+class UnsupportedImageFormatError(ValueError):
+    pass
 
-    return {"success": True, "data": final_data_row} # ⭐️ 리스트가 아닌 딕셔너리(첫 번째 행) 반환
+# data: 전처리된 이미지, scale/offset: 원본 좌표 = 전처리 좌표 / scale + offset
+PreprocessResult = namedtuple('PreprocessResult', ['data', 'scale', 'offset_x', 'offset_y', 'bytes_before', 'bytes_after'])
 
-def call_clova_ocr(image_file_path):
+def _autocrop_box(image):
+    # 왼쪽 위 픽셀을 배경색으로 보고, 배경과 충분히 다른 픽셀이 있는 영역
+    background = Image.new(image.mode, image.size, image.getpixel((0, 0)))
+    diff = ImageChops.difference(image, background).convert('L')
+    return diff.point(lambda value: 255 if value > OCR_PREPROCESS_AUTOCROP_THRESHOLD else 0).getbbox()
+
+def preprocess_image(image_bytes):
     """
-    네이버 클로바 'General OCR' API를 호출하고, AI 팀의 파싱 로직을 실행하는 함수.
+    OCR 전송용으로 이미지를 축소(OCR_PREPROCESS_MAX_WIDTH) -> 흑백 -> JPEG/PNG 재압축하고, 설정 시 여백을 잘라냅니다.
+    Pillow로 열 수 없는 형식(PDF 등)이거나, 축소/자르기 없이 재압축만 한 결과가 원본보다 크면 None (원본 그대로 전송)
+    (축소한 경우에는 크기가 커지더라도 전처리 결과를 보냄. 단색 위주의 스크린샷은 PNG 원본보다 JPEG가 클 수 있음)
+    """
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+        image = ImageOps.exif_transpose(image)
+    except (UnidentifiedImageError, OSError):
+        return None
+
+    image = image.convert('L' if OCR_PREPROCESS_GRAYSCALE else 'RGB')
+
+    offset_x = offset_y = 0
+    if OCR_PREPROCESS_AUTOCROP:
+        box = _autocrop_box(image)
+        if box:
+            offset_x, offset_y = box[0], box[1]
+            image = image.crop(box)
+
+    scale = 1.0
+    if image.width > OCR_PREPROCESS_MAX_WIDTH:
+        scale = OCR_PREPROCESS_MAX_WIDTH / image.width
+        image = image.resize((OCR_PREPROCESS_MAX_WIDTH, max(round(image.height * scale), 1)), Image.LANCZOS)
+
+    output = io.BytesIO()
+    if OCR_PREPROCESS_FORMAT == 'png':
+        image.save(output, 'PNG', optimize=True)
+    else:
+        image.save(output, 'JPEG', quality=OCR_PREPROCESS_JPEG_QUALITY, optimize=True)
+
+    data = output.getvalue()
+    if len(data) >= len(image_bytes) and scale == 1.0 and not (offset_x or offset_y):
+        return None
+    return PreprocessResult(data, scale, offset_x, offset_y, len(image_bytes), len(data))
+
+def _restore_coordinates(result, preprocessed):
+    # 파서의 좌표 기준값(X_TOLERANCE 등)은 원본 해상도 기준이므로 응답 좌표를 원본 좌표로 되돌림
+    for image in result.get('images', []):
+        for field in image.get('fields', []):
+            for vertex in field.get('boundingPoly', {}).get('vertices', []):
+                vertex['x'] = vertex.get('x', 0) / preprocessed.scale + preprocessed.offset_x
+                vertex['y'] = vertex.get('y', 0) / preprocessed.scale + preprocessed.offset_y
+    return result
+
+def _request_clova_ocr(image_file, file_name):
     """
+    Clova OCR 원본 응답(JSON)을 반환합니다.
+    """
+    header = image_file.read(SIGNATURE_LENGTH)
+    image_file.seek(0)
+    file_format, file_mime_type = detect_image_format(header)
+    if file_format is None:
+        raise UnsupportedImageFormatError()
+
     message = {
         'version': 'V2',
         'requestId': str(uuid.uuid4()),
@@ -150,7 +261,7 @@ def call_clova_ocr(image_file_path):
         'lang': 'ko',
         'images': [
             {
-                'format': os.path.splitext(image_file_path)[1].lstrip('.').lower(),
+                'format': file_format,
                 'name': 'dorm_verification_image'
             }
         ],
@@ -161,24 +272,66 @@ def call_clova_ocr(image_file_path):
         'X-OCR-SECRET': SECRET_KEY
     }
 
-    try:
-        with open(image_file_path, 'rb') as f:
-            file_format = message['images'][0]['format']
-            file_mime_type = 'image/png' if file_format == 'png' else 'image/jpeg'
-
-            files = {
-                'file': (os.path.basename(image_file_path), f, file_mime_type),
-                'message': (None, json.dumps(message), 'application/json')
-            }
+    # 파일 객체를 그대로 multipart 본문에 넣으므로 디스크에 임시 저장하지 않음
+    files = {
+        'file': (file_name, image_file, file_mime_type),
+        'message': (None, json.dumps(message), 'application/json')
+    }
 
-            response = requests.post(API_URL, headers=headers, files=files, timeout=10)
-            response.raise_for_status()
-            result = response.json()
+    response = requests.post(API_URL, headers=headers, files=files, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+def _call_clova_ocr(image_file, file_name, preprocess, use_cache):
+    digest = None
+    if use_cache or preprocess:
+        image_bytes = image_file.read()
+        image_file.seek(0)
+
+    if use_cache:
+        digest = image_digest(image_bytes)
+        cached = ocr_result_cache.get(digest)
+        if cached is not None:
+            metrics.incr('ocr.cache.hit')
+            return cached
+        metrics.incr('ocr.cache.miss')
+
+    preprocessed = None
+    if preprocess:
+        preprocessed = preprocess_image(image_bytes)
+        if preprocessed:
+            image_file = io.BytesIO(preprocessed.data)
+
+    result = _request_clova_ocr(image_file, file_name)
+    if preprocessed:
+        result = _restore_coordinates(result, preprocessed)
+    parsed = process_ocr_response_with_coords(result)
+
+    if digest and parsed.get("success"):
+        ocr_result_cache.set(digest, parsed)
+    return parsed
+
+def call_clova_ocr(image, preprocess=OCR_PREPROCESS_ENABLED, use_cache=True):
+    """
+    네이버 클로바 'General OCR' API를 호출하고, AI 팀의 파싱 로직을 실행하는 함수.
+    image: bytes, 파일 객체(UploadedFile 등 read/seek 가능한 객체) 또는 파일 경로
+    preprocess: 전송 전 preprocess_image 적용 여부
+    use_cache: 같은 이미지의 이전 파싱 결과(ocr_result_cache)가 있으면 API를 호출하지 않음
+    """
+    try:
+        if isinstance(image, (str, os.PathLike)):
+            with open(image, 'rb') as f:
+                return _call_clova_ocr(f, os.path.basename(image), preprocess, use_cache)
 
-        return process_ocr_response_with_coords(result)
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            image = io.BytesIO(image)
+        file_name = os.path.basename(getattr(image, 'name', None) or 'dorm_verification_image')
+        return _call_clova_ocr(image, file_name, preprocess, use_cache)
 
+    except UnsupportedImageFormatError:
+        return {"success": False, "error": "지원하지 않는 이미지 형식입니다. (PNG, JPEG, PDF, TIFF)"}
     except FileNotFoundError:
-        return {"success": False, "error": f"파일을 찾을 수 없습니다: {image_file_path}"}
+        return {"success": False, "error": f"파일을 찾을 수 없습니다: {image}"}
     except requests.exceptions.RequestException as e:
         return {"success": False, "error": f"API 요청 중 오류 발생: {e}"}
     except Exception as e:
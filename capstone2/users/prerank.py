@@ -0,0 +1,342 @@
+"""
+코호트 단위 일괄 랭킹(사전 계산). 결과는 MatchScore 테이블에 저장되고,
+MatchingFeedView는 요청 시점에 AI 서버를 호출하는 대신 이 테이블을 순위 순으로 읽습니다.
+"""
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from users import metrics
+from users.ai_client import aclose_async_ranking_client, arequest_ai_ranking, httpx, request_ai_ranking
+from users.models import DormInfo, MatchScore, Profile
+from users.ranking_cache import clear_prerank_stale, invalidate_cohort, is_prerank_stale, mark_prerank_stale
+from users.scoring import encode_profiles, get_local_ranker
+
+# 로컬 엔진에서 한 번에 점수 행렬을 계산할 타깃 수 (메모리: 배치 x 코호트 크기)
+TARGET_BATCH_SIZE = 256
+
+def get_active_cohort_keys():
+    return list(
+        DormInfo.objects.exclude(cohort_key=None).values_list('cohort_key', flat=True).distinct()
+    )
+
+def _rank_cohort_locally(profiles, k):
+    """
+    코호트 전체를 (타깃 배치 x 후보) 점수 행렬로 계산해 타깃별 상위 k명을 반환합니다.
+    반환: {target_user_id: [(candidate_user_id, percent), ...]}
+    """
+    ranker = get_local_ranker()
+    user_ids = np.array([p.user_id for p in profiles])
+    codes = encode_profiles(profiles)
+    gather_index = ranker.build_gather_index(codes)
+
+    rankings = {}
+    for start in range(0, len(profiles), TARGET_BATCH_SIZE):
+        stop = min(start + TARGET_BATCH_SIZE, len(profiles))
+        scores = ranker.score_matrix(codes[start:stop], gather_index).astype(np.int32)
+        # 자기 자신은 후보에서 제외
+        scores[np.arange(stop - start), np.arange(start, stop)] = -1
+
+        for row, target_index in enumerate(range(start, stop)):
+            top = ranker.top_k(scores[row], min(k, len(profiles) - 1))
+            rankings[int(user_ids[target_index])] = list(zip(user_ids[top].tolist(), scores[row][top].tolist()))
+    return rankings
+
+async def _rank_cohort_remotely_async(cohort_key, profiles, k):
+    # 커넥션 풀 크기만큼 동시에 호출
+    semaphore = asyncio.Semaphore(settings.AI_POOL_MAXSIZE)
+
+    async def rank_one(target):
+        async with semaphore:
+            # 후보 목록은 실제로 호출할 차례에만 만들어서 대기 중인 타깃마다 N개씩 쌓이지 않게 함
+            candidates = [p for p in profiles if p.user_id != target.user_id]
+            return await arequest_ai_ranking(target, candidates, k, cohort_key=cohort_key)
+
+    try:
+        # 한 타깃의 실패가 코호트 전체 결과를 버리지 않도록 예외도 결과로 받음
+        results = await asyncio.gather(*(rank_one(target) for target in profiles), return_exceptions=True)
+    finally:
+        await aclose_async_ranking_client()
+    return {target.user_id: result for target, result in zip(profiles, results)}
+
+def _rank_one_remotely(cohort_key, profiles, target, k):
+    try:
+        return request_ai_ranking(target, [p for p in profiles if p.user_id != target.user_id], k, cohort_key=cohort_key)
+    except Exception as e:
+        return e
+
+def _rank_cohort_remotely(cohort_key, profiles, k):
+    """
+    AI 서버 API는 타깃 1명 단위(/v1/rank/topk)이므로 타깃마다 호출합니다. (httpx가 있으면 동시 호출)
+    실패한 타깃은 결과에서 빠지며 기존 MatchScore 행이 그대로 남습니다.
+    """
+    if httpx is not None:
+        results = asyncio.run(_rank_cohort_remotely_async(cohort_key, profiles, k))
+    else:
+        results = {target.user_id: _rank_one_remotely(cohort_key, profiles, target, k) for target in profiles}
+
+    rankings = {}
+    for target_id, result in results.items():
+        if isinstance(result, Exception):
+            metrics.incr('matching.prerank.remote_failed')
+            print(f"Prerank Error (cohort={cohort_key}, user_id={target_id}): {result}")
+            continue
+        ordered_ids, match_data = result
+        rankings[target_id] = [(user_id, match_data.get(user_id)) for user_id in ordered_ids]
+    return rankings
+
+def save_match_scores(cohort_key, rankings):
+    computed_at = timezone.now()
+    rows = [
+        MatchScore(
+            user_id=target_id, candidate_id=candidate_id, cohort_key=cohort_key,
+            percent=percent if percent is not None else 0, rank=rank, computed_at=computed_at,
+        )
+        for target_id, ranked in rankings.items()
+        for rank, (candidate_id, percent) in enumerate(ranked, start=1)
+    ]
+    with transaction.atomic():
+        MatchScore.objects.filter(user_id__in=list(rankings)).delete()
+        MatchScore.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+def rank_cohort(cohort_key, ranker=None, k=None):
+    """
+    코호트 하나를 일괄 랭킹하고 저장합니다. 저장된 행 수를 반환합니다.
+    """
+    ranker = ranker or settings.MATCHING_RANKER
+    k = k or settings.MATCHING_PRERANK_TOP_K
+
+    profiles = list(
+        Profile.objects.filter(user__dorminfo__cohort_key=cohort_key).select_related('user').order_by('user_id')
+    )
+    if len(profiles) < 2:
+        MatchScore.objects.filter(user_id__in=[p.user_id for p in profiles]).delete()
+        return 0
+
+    if ranker == 'local':
+        rankings = _rank_cohort_locally(profiles, k)
+    else:
+        rankings = _rank_cohort_remotely(cohort_key, profiles, k)
+
+    saved = save_match_scores(cohort_key, rankings)
+    if len(rankings) == len(profiles):
+        _clear_stale(cohort_key)
+    else:
+        # 일부 타깃의 원격 랭킹이 실패하면 다음 전체 계산까지 재계산 대상으로 남김
+        _mark_stale(cohort_key)
+    # 사전 계산 결과가 바로 피드에 반영되도록 요청 단위 랭킹 캐시를 비움
+    invalidate_cohort(cohort_key)
+    return saved
+
+def rank_all_cohorts(ranker=None, k=None):
+    results = {}
+    for cohort_key in get_active_cohort_keys():
+        results[cohort_key] = rank_cohort(cohort_key, ranker=ranker, k=k)
+    return results
+
+def load_precomputed_ranking(user_id, cohort_key):
+    """
+    사전 계산된 랭킹을 (정렬된 후보 user_id 리스트, {user_id: percent}) 형태로 반환합니다.
+    없거나 코호트가 재계산 대기(stale) 중이면 None (피드는 실시간 랭킹을 사용).
+    """
+    if is_prerank_stale(cohort_key):
+        metrics.incr('matching.prerank.stale_skipped')
+        return None
+
+    rows = list(
+        MatchScore.objects.filter(user_id=user_id, cohort_key=cohort_key)
+        .order_by('rank').values_list('candidate_id', 'percent')
+    )
+    if not rows:
+        return None
+    return [candidate_id for candidate_id, _ in rows], dict(rows)
+
+
+# ---------------------------------------------------------------------------
+# 증분 재계산: 프로필 하나가 바뀌면 그 사람이 포함된 쌍(행 + 열)만 다시 계산
+# ---------------------------------------------------------------------------
+
+_rescore_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='rescore')
+_rescore_lock = threading.Lock()
+_pending_rescores = {}      # user_id -> 요청 시각(monotonic)
+_stale_cohorts = set()      # 증분 재계산이 불가능해 전체 재계산이 필요한 코호트 (이 프로세스 기준, 게이지용)
+_last_rescore_lag = [0.0]   # 마지막 재계산의 (요청 -> 완료) 지연 시간
+
+def _mark_stale(cohort_key):
+    _stale_cohorts.add(cohort_key)
+    mark_prerank_stale(cohort_key)
+
+def _clear_stale(cohort_key):
+    _stale_cohorts.discard(cohort_key)
+    clear_prerank_stale(cohort_key)
+
+def _insert_position(percents, percent):
+    # 같은 점수끼리는 기존 순서를 유지 (새 항목은 동점 중 마지막)
+    position = 0
+    while position < len(percents) and percents[position] >= percent:
+        position += 1
+    return position
+
+def rescore_profile(user_id, k=None):
+    """
+    user_id의 프로필이 바뀌었을 때 MatchScore를 패치합니다.
+    - 행: user_id가 타깃인 랭킹을 다시 계산 (후보 N명 점수 1회)
+    - 열: 코호트의 다른 타깃들이 user_id를 볼 때의 점수를 다시 계산해 순위에 끼워 넣음
+    변경/생성/삭제된 행 수를 반환합니다.
+    """
+    k = k or settings.MATCHING_PRERANK_TOP_K
+    cohort_key = DormInfo.objects.filter(user_id=user_id).values_list('cohort_key', flat=True).first()
+
+    if cohort_key is None:
+        # 피드 노출 대상에서 빠진 경우 (다음 전체 계산에서 빈자리가 채워짐)
+        deleted, _ = MatchScore.objects.filter(Q(user_id=user_id) | Q(candidate_id=user_id)).delete()
+        return deleted
+
+    # 다른 코호트에서 옮겨 온 경우 이전 코호트의 행은 제거 (빈자리는 다음 전체 계산에서 채워짐)
+    moved, _ = MatchScore.objects.filter(Q(user_id=user_id) | Q(candidate_id=user_id)).exclude(cohort_key=cohort_key).delete()
+
+    if not MatchScore.objects.filter(cohort_key=cohort_key).exists():
+        return moved  # 사전 계산을 사용하지 않는 코호트
+
+    if settings.MATCHING_RANKER != 'local':
+        # 원격 AI 서버는 쌍 단위 점수를 주지 않으므로 전체 재계산 대상으로 표시
+        _mark_stale(cohort_key)
+        invalidate_cohort(cohort_key)  # 사전 계산으로 채운 요청 단위 캐시도 버림
+        return moved
+
+    ranker = get_local_ranker()
+    profiles = list(Profile.objects.filter(user__dorminfo__cohort_key=cohort_key).order_by('user_id'))
+    user_ids = np.array([p.user_id for p in profiles])
+    positions = {int(uid): i for i, uid in enumerate(user_ids)}
+    if user_id not in positions:
+        return moved
+
+    me = positions[user_id]
+    codes = encode_profiles(profiles)
+    gather_index = ranker.build_gather_index(codes)
+
+    def full_row(target_index):
+        scores = ranker.score_codes(codes[target_index], gather_index).astype(np.int32)
+        scores[target_index] = -1
+        top = ranker.top_k(scores, min(k, len(profiles) - 1))
+        return list(zip(user_ids[top].tolist(), scores[top].tolist()))
+
+    # 다른 타깃 전체 x 나(후보 1명) 점수: (N x 1)
+    column_scores = ranker.score_matrix(codes, gather_index[me:me + 1])[:, 0].tolist()
+
+    existing = defaultdict(list)
+    rows = (
+        MatchScore.objects.filter(cohort_key=cohort_key).exclude(user_id=user_id)
+        .order_by('user_id', 'rank').values_list('id', 'user_id', 'candidate_id', 'percent')
+    )
+    for row_id, target_id, candidate_id, percent in rows:
+        existing[target_id].append((row_id, candidate_id, percent))
+
+    computed_at = timezone.now()
+    to_update, to_delete, to_create = [], [], []
+    refill_targets = [me]
+
+    for target_id, ranked in existing.items():
+        if target_id not in positions:
+            continue
+        new_percent = column_scores[positions[target_id]]
+        others = [entry for entry in ranked if entry[1] != user_id]
+        mine = next((entry for entry in ranked if entry[1] == user_id), None)
+
+        # 목록이 가득 찬 상태에서 내 점수가 기존 최저점보다 낮아지면, 목록 밖 후보가 더 높을 수 있음
+        if mine and len(ranked) >= k and new_percent < min(entry[2] for entry in ranked):
+            refill_targets.append(positions[target_id])
+            continue
+
+        position = _insert_position([entry[2] for entry in others], new_percent)
+        merged = others[:position] + [(mine[0] if mine else None, user_id, new_percent)] + others[position:]
+        for entry in merged[k:]:
+            if entry[0] is not None:
+                to_delete.append(entry[0])
+
+        for rank, (row_id, candidate_id, percent) in enumerate(merged[:k], start=1):
+            if row_id is None:
+                to_create.append(MatchScore(
+                    user_id=target_id, candidate_id=candidate_id, cohort_key=cohort_key,
+                    percent=percent, rank=rank, computed_at=computed_at,
+                ))
+            elif candidate_id == user_id or rank > len(ranked) or ranked[rank - 1][0] != row_id:
+                to_update.append(MatchScore(id=row_id, percent=percent, rank=rank, computed_at=computed_at))
+
+    rankings = {int(user_ids[index]): full_row(index) for index in refill_targets}
+
+    with transaction.atomic():
+        MatchScore.objects.filter(id__in=to_delete).delete()
+        MatchScore.objects.bulk_update(to_update, ['percent', 'rank', 'computed_at'], batch_size=500)
+        MatchScore.objects.filter(user_id__in=list(rankings)).delete()
+        MatchScore.objects.bulk_create(to_create + [
+            MatchScore(
+                user_id=target_id, candidate_id=candidate_id, cohort_key=cohort_key,
+                percent=percent, rank=rank, computed_at=computed_at,
+            )
+            for target_id, ranked in rankings.items()
+            for rank, (candidate_id, percent) in enumerate(ranked, start=1)
+        ], batch_size=1000)
+
+    invalidate_cohort(cohort_key)
+    return moved + len(to_update) + len(to_delete) + len(to_create) + sum(len(r) for r in rankings.values())
+
+def _run_rescore(user_id):
+    with _rescore_lock:
+        requested_at = _pending_rescores.pop(user_id, None)
+
+    started = time.perf_counter()
+    try:
+        changed = rescore_profile(user_id)
+        metrics.incr('matching.rescore.completed')
+        metrics.incr('matching.rescore.rows_changed', changed)
+    except Exception as e:
+        metrics.incr('matching.rescore.failed')
+        print(f"Rescore Error (user_id={user_id}): {e}")
+    finally:
+        connection.close()  # 백그라운드 스레드의 DB 연결 정리
+
+    metrics.observe('matching.rescore.run_ms', (time.perf_counter() - started) * 1000)
+    if requested_at is not None:
+        _last_rescore_lag[0] = time.monotonic() - requested_at
+
+
+def _enqueue_rescore(user_id):
+    with _rescore_lock:
+        if user_id in _pending_rescores:
+            return
+        _pending_rescores[user_id] = time.monotonic()
+    _rescore_executor.submit(_run_rescore, user_id)
+
+def schedule_profile_rescore(user_id):
+    """
+    트랜잭션 커밋 후 백그라운드에서 증분 재계산을 실행합니다.
+    같은 사용자의 요청이 대기 중이면 한 번으로 합칩니다.
+    (대기 목록에는 커밋 시점에 등록하므로 롤백된 변경은 남지 않음)
+    """
+    transaction.on_commit(lambda: _enqueue_rescore(user_id))
+
+def _oldest_pending_rescore_age():
+    with _rescore_lock:
+        if not _pending_rescores:
+            return 0.0
+        return round(time.monotonic() - min(_pending_rescores.values()), 3)
+
+def _oldest_match_score_age():
+    oldest = MatchScore.objects.aggregate(oldest=Min('computed_at'))['oldest']
+    return round((timezone.now() - oldest).total_seconds(), 1) if oldest else None
+
+metrics.register_gauge('matching.rescore.pending', lambda: len(_pending_rescores))
+metrics.register_gauge('matching.rescore.oldest_pending_seconds', _oldest_pending_rescore_age)
+metrics.register_gauge('matching.rescore.last_lag_seconds', lambda: round(_last_rescore_lag[0], 3))
+metrics.register_gauge('matching.prerank.stale_cohorts', lambda: sorted(_stale_cohorts))
+metrics.register_gauge('matching.prerank.oldest_score_age_seconds', _oldest_match_score_age)
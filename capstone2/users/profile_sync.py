@@ -0,0 +1,110 @@
+"""
+아웃박스(ProfileOutbox) 기반 AI 랭커 프로필 레지스트리 동기화.
+
+프로필/기숙사 정보가 바뀌면 signal에서 아웃박스에 이벤트를 남기고,
+push_profile_outbox 명령이 배치 단위로 /v1/profiles/sync에 전송합니다.
+동기화를 켜기 전부터 있던 프로필은 push_profile_outbox --full로 한 번 전체 전송합니다.
+레지스트리가 채워져 있으면 피드 요청은 target id와 코호트 키만 보내면 됩니다. (AI_RANKING_PROTOCOL='id')
+
+전송 본문 예시:
+{
+    "fields": [...], "dictionary": {...},            # users.ranking_codec 과 같은 번호 체계
+    "upserts": [{"id": 3, "cohort": "MALE:...", "codes": [1, 0, ...]}],
+    "deletes": [7]
+}
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from users import metrics
+from users.ai_client import get_ranking_client
+from users.models import Profile, ProfileOutbox
+from users.ranking_codec import CHOICE_DICTIONARY
+from users.scoring import PROFILE_CHOICE_FIELDS, encode_profile
+
+PROFILE_SYNC_PATH = '/v1/profiles/sync'
+
+def record_profile_event(user_id, event=ProfileOutbox.EventChoices.UPSERT):
+    # 동기화를 사용하지 않으면 아웃박스가 쌓이지 않도록 기록하지 않음
+    if settings.AI_PROFILE_SYNC_ENABLED:
+        ProfileOutbox.objects.create(user_id=user_id, event=event)
+
+def enqueue_full_sync(batch_size=1000):
+    """
+    현재 프로필 전체를 UPSERT 이벤트로 아웃박스에 넣습니다. 기록한 이벤트 수를 반환합니다.
+    (동기화를 처음 켜거나 레지스트리를 다시 채울 때 사용: push_profile_outbox --full)
+    """
+    total = 0
+    batch = []
+    for user_id in Profile.objects.order_by('user_id').values_list('user_id', flat=True).iterator():
+        batch.append(ProfileOutbox(user_id=user_id, event=ProfileOutbox.EventChoices.UPSERT))
+        if len(batch) >= batch_size:
+            total += len(ProfileOutbox.objects.bulk_create(batch))
+            batch = []
+    if batch:
+        total += len(ProfileOutbox.objects.bulk_create(batch))
+    return total
+
+def build_sync_payload(events):
+    """
+    아웃박스 이벤트 목록을 사용자별 최종 상태로 합친 동기화 본문을 만듭니다.
+    (같은 사용자의 이벤트가 여러 개면 마지막 이벤트 기준, 프로필이 없으면 삭제로 처리)
+    """
+    last_event = {}
+    for outbox in events:
+        last_event[outbox.user_id] = outbox.event
+
+    upsert_ids = [user_id for user_id, event in last_event.items() if event == ProfileOutbox.EventChoices.UPSERT]
+    profiles = {
+        profile.user_id: profile
+        for profile in Profile.objects.filter(user_id__in=upsert_ids).select_related('user__dorminfo')
+    }
+
+    upserts, deletes = [], []
+    for user_id, event in last_event.items():
+        profile = profiles.get(user_id)
+        if event == ProfileOutbox.EventChoices.DELETE or profile is None:
+            deletes.append(user_id)
+            continue
+
+        dorm_info = getattr(profile.user, 'dorminfo', None)
+        upserts.append({
+            'id': user_id,
+            'cohort': dorm_info.cohort_key if dorm_info else None,
+            'codes': encode_profile(profile),
+        })
+
+    return {
+        'fields': PROFILE_CHOICE_FIELDS,
+        'dictionary': CHOICE_DICTIONARY,
+        'upserts': upserts,
+        'deletes': deletes,
+    }
+
+def push_outbox_batch(batch_size=500):
+    """
+    전송되지 않은 아웃박스 이벤트를 최대 batch_size개 전송합니다. 전송한 이벤트 수를 반환합니다.
+    """
+    events = list(ProfileOutbox.objects.filter(sent_at=None).order_by('id')[:batch_size])
+    if not events:
+        return 0
+
+    get_ranking_client().post(PROFILE_SYNC_PATH, json=build_sync_payload(events))
+
+    with transaction.atomic():
+        ProfileOutbox.objects.filter(id__in=[outbox.id for outbox in events]).update(sent_at=timezone.now())
+
+    metrics.incr('ranker.outbox.sent', len(events))
+    return len(events)
+
+def purge_sent_outbox(before):
+    deleted, _ = ProfileOutbox.objects.filter(sent_at__lt=before).delete()
+    return deleted
+
+def _outbox_lag_seconds():
+    oldest = ProfileOutbox.objects.filter(sent_at=None).order_by('id').values_list('created_at', flat=True).first()
+    return round((timezone.now() - oldest).total_seconds(), 1) if oldest else 0.0
+
+metrics.register_gauge('ranker.outbox.pending', lambda: ProfileOutbox.objects.filter(sent_at=None).count())
+metrics.register_gauge('ranker.outbox.lag_seconds', _outbox_lag_seconds)
@@ -0,0 +1,98 @@
+import secrets
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+RANKING_KEY_PREFIX = 'matching:ranking'
+LAST_KNOWN_KEY_PREFIX = 'matching:last-known'
+COHORT_VERSION_KEY_PREFIX = 'matching:cohort-version'
+
+def _cohort_version_key(cohort_key):
+    return f"{COHORT_VERSION_KEY_PREFIX}:{cohort_key}"
+
+def get_cohort_version(cohort_key):
+    """
+    코호트의 현재 버전을 반환합니다. 버전이 바뀌면 해당 코호트의 모든 랭킹 캐시가 무효화됩니다.
+    버전 키가 캐시에서 밀려나 다시 만들어질 때 예전 버전으로 돌아가지 않도록 현재 시각(ms)으로 시작합니다.
+    """
+    version_key = _cohort_version_key(cohort_key)
+    version = cache.get(version_key)
+    if version is None:
+        initial = time.time_ns() // 1_000_000
+        cache.add(version_key, initial, timeout=None)
+        version = cache.get(version_key, initial)
+    return version
+
+def _ranking_key(user_id, cohort_key, version):
+    return f"{RANKING_KEY_PREFIX}:{cohort_key}:v{version}:{user_id}"
+
+def get_cached_ranking(user_id, cohort_key):
+    """
+    캐시된 AI 랭킹 결과를 반환합니다. 없으면 None.
+    반환 형식: {'ordered_ids': [...], 'match_data': {user_id: match_percent}}
+    """
+    version = get_cohort_version(cohort_key)
+    return cache.get(_ranking_key(user_id, cohort_key, version))
+
+def set_cached_ranking(user_id, cohort_key, ordered_ids, match_data):
+    version = get_cohort_version(cohort_key)
+    ranking = {'ordered_ids': list(ordered_ids), 'match_data': dict(match_data)}
+    cache.set(_ranking_key(user_id, cohort_key, version), ranking, timeout=settings.MATCHING_RANKING_CACHE_TTL)
+    # 코호트 변경으로 무효화되지 않는 '마지막 정상 랭킹' (AI 서버 장애 시 stale 응답용)
+    cache.set(f"{LAST_KNOWN_KEY_PREFIX}:{cohort_key}:{user_id}", ranking, timeout=settings.MATCHING_LAST_KNOWN_TTL)
+
+def get_last_known_ranking(user_id, cohort_key):
+    return cache.get(f"{LAST_KNOWN_KEY_PREFIX}:{cohort_key}:{user_id}")
+
+def invalidate_cohort(cohort_key):
+    """
+    코호트 버전을 올려서 해당 코호트에 속한 모든 사용자의 랭킹 캐시를 한 번에 무효화합니다.
+    (키를 하나씩 지우지 않아도 이전 버전 키는 TTL이 지나면 자연스럽게 사라짐)
+    """
+    version_key = _cohort_version_key(cohort_key)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        # 버전 키가 아직 없거나 만료된 경우
+        cache.set(version_key, get_cohort_version(cohort_key) + 1, timeout=None)
+
+PRERANK_STALE_KEY_PREFIX = 'matching:prerank-stale'
+
+def mark_prerank_stale(cohort_key):
+    """
+    코호트의 사전 계산 결과(MatchScore)를 다음 전체 계산(rank_cohort)까지 사용하지 않도록 표시합니다.
+    (재계산은 한 워커에서만 일어나므로 모든 워커가 보도록 공유 캐시에 저장)
+    """
+    cache.set(f"{PRERANK_STALE_KEY_PREFIX}:{cohort_key}", True, timeout=None)
+
+def clear_prerank_stale(cohort_key):
+    cache.delete(f"{PRERANK_STALE_KEY_PREFIX}:{cohort_key}")
+
+def is_prerank_stale(cohort_key):
+    return cache.get(f"{PRERANK_STALE_KEY_PREFIX}:{cohort_key}", False)
+
+FEED_SNAPSHOT_KEY_PREFIX = 'matching:feed-snapshot'
+
+def create_feed_snapshot(user_id, ordered_ids, match_data, stale=False):
+    """
+    피드 세션 스냅샷을 저장하고 불투명한 cursor 문자열을 반환합니다.
+    같은 cursor로 요청하는 동안에는 랭킹이 바뀌어도 페이지 경계가 흔들리지 않습니다.
+    (공유 캐시(settings.CACHES)에 저장하므로 다음 페이지 요청이 다른 워커로 가도 같은 스냅샷을 씀)
+    """
+    cursor = secrets.token_urlsafe(16)
+    cache.set(
+        f"{FEED_SNAPSHOT_KEY_PREFIX}:{cursor}",
+        {'user_id': user_id, 'ordered_ids': list(ordered_ids), 'match_data': dict(match_data), 'stale': stale},
+        timeout=settings.MATCHING_FEED_SNAPSHOT_TTL
+    )
+    return cursor
+
+def get_feed_snapshot(cursor, user_id):
+    """
+    cursor에 해당하는 스냅샷을 반환합니다. 만료되었거나 다른 사용자의 cursor면 None.
+    """
+    snapshot = cache.get(f"{FEED_SNAPSHOT_KEY_PREFIX}:{cursor}")
+    if snapshot is None or snapshot['user_id'] != user_id:
+        return None
+    return snapshot
@@ -0,0 +1,94 @@
+"""
+/v1/rank/topk 요청 본문의 압축(compact) 인코딩.
+
+기존 형식은 후보마다 ProfileSerializer 결과(한글 표시 문자열 12개)를 보내지만,
+compact-v1은 필드별 선택지 번호(0 = 미입력, 1부터 선택지 순서)를 열(column) 단위 배열로 보내고
+번호 -> 선택지 코드 사전을 한 번만 함께 보냅니다. msgpack이 설치되어 있으면 바이너리로도 보낼 수 있습니다.
+
+예시:
+{
+    "format": "compact-v1",
+    "fields": ["smoking_type", ...],
+    "dictionary": {"smoking_type": ["NON_SMOKER", "CIGARETTE", ...], ...},
+    "target": {"id": 1, "codes": [1, 0, ...]},
+    "candidates": {"ids": [2, 3, ...], "codes": [[1, 2, ...], [0, 0, ...], ...]},  # codes[필드][후보]
+    "k": 50
+}
+"""
+import json
+
+from users.scoring import CHOICE_CODES, PROFILE_CHOICE_FIELDS, encode_profile, encode_profiles
+
+try:
+    import msgpack
+except ImportError:  # msgpack은 선택 기능 (없으면 JSON으로 전송)
+    msgpack = None
+
+COMPACT_FORMAT = 'compact-v1'
+JSON_CONTENT_TYPE = 'application/json'
+MSGPACK_CONTENT_TYPE = 'application/x-msgpack'
+
+# 요청: 본문 형식 / 응답: 랭커가 지원하는 형식 목록 (e.g., "json, compact-v1")
+PAYLOAD_FORMAT_HEADER = 'X-Rank-Payload-Format'
+ACCEPT_PAYLOAD_FORMATS_HEADER = 'X-Accept-Rank-Payload-Formats'
+
+# 필드별 '번호 -> 선택지 코드' 사전 (번호 1이 리스트의 0번째)
+CHOICE_DICTIONARY = {
+    field_name: list(CHOICE_CODES[field_name]) for field_name in PROFILE_CHOICE_FIELDS
+}
+
+def encode_compact(my_profile, candidate_profiles, k):
+    codes = encode_profiles(candidate_profiles)
+    return {
+        'format': COMPACT_FORMAT,
+        'fields': PROFILE_CHOICE_FIELDS,
+        'dictionary': CHOICE_DICTIONARY,
+        'target': {'id': my_profile.user_id, 'codes': encode_profile(my_profile)},
+        'candidates': {
+            'ids': [profile.user_id for profile in candidate_profiles],
+            'codes': codes.T.tolist(),
+        },
+        'k': k,
+    }
+
+def decode_compact(payload):
+    """
+    compact-v1 본문을 (target_id, target 코드 dict, [(candidate_id, 코드 dict), ...], k)로 되돌립니다.
+    (랭커/테스트용 스텁 서버에서 사용)
+    """
+    if payload.get('format') != COMPACT_FORMAT:
+        raise ValueError(f"지원하지 않는 payload 형식입니다: {payload.get('format')}")
+
+    fields = payload['fields']
+    dictionary = payload['dictionary']
+
+    def to_codes(ordinals):
+        return {
+            field_name: dictionary[field_name][ordinal - 1] if ordinal else None
+            for field_name, ordinal in zip(fields, ordinals)
+        }
+
+    candidates = payload['candidates']
+    columns = candidates['codes']
+    candidate_rows = zip(*columns) if columns else [[] for _ in candidates['ids']]
+    return (
+        payload['target']['id'],
+        to_codes(payload['target']['codes']),
+        [(candidate_id, to_codes(ordinals)) for candidate_id, ordinals in zip(candidates['ids'], candidate_rows)],
+        payload.get('k'),
+    )
+
+def dump_payload(payload, use_msgpack=False):
+    """
+    반환: (본문 bytes, Content-Type)
+    """
+    if use_msgpack and msgpack is not None:
+        return msgpack.packb(payload, use_bin_type=True), MSGPACK_CONTENT_TYPE
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8'), JSON_CONTENT_TYPE
+
+def load_payload(body, content_type):
+    if content_type and content_type.startswith(MSGPACK_CONTENT_TYPE):
+        if msgpack is None:
+            raise ValueError("msgpack 본문을 해석하려면 msgpack 패키지가 필요합니다.")
+        return msgpack.unpackb(body, raw=False)
+    return json.loads(body)
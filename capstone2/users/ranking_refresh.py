@@ -0,0 +1,54 @@
+"""
+AI 서버 장애로 stale 랭킹을 응답한 뒤, 백그라운드에서 랭킹을 다시 받아 캐시를 갱신합니다.
+서킷이 열려 있는 동안에는 호출 없이 바로 끝나고, HALF_OPEN 상태에서는 이 작업이 시험 호출이 됩니다.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+
+from users import metrics
+from users.ai_client import request_ai_ranking
+from users.circuit_breaker import CircuitOpenError
+from users.cohort import get_cohort_key, get_cohort_candidate_profiles
+from users.models import Profile
+from users.ranking_cache import set_cached_ranking
+
+_executor = ThreadPoolExecutor(max_workers=settings.MATCHING_REFRESH_WORKERS, thread_name_prefix='ranking-refresh')
+_lock = threading.Lock()
+_pending = set()
+
+def refresh_ranking(user_id, k):
+    profile = Profile.objects.select_related('user__dorminfo').get(user_id=user_id)
+    cohort_key = get_cohort_key(profile.user.dorminfo)
+    candidate_profiles = list(get_cohort_candidate_profiles(cohort_key, exclude_user_id=user_id))
+
+    ordered_ids, match_data = request_ai_ranking(profile, candidate_profiles, k, cohort_key=cohort_key)
+    set_cached_ranking(user_id, cohort_key, ordered_ids, match_data)
+
+def _run_refresh(user_id, k):
+    try:
+        refresh_ranking(user_id, k)
+        metrics.incr('matching.refresh.completed')
+    except CircuitOpenError:
+        metrics.incr('matching.refresh.skipped')
+    except Exception as e:
+        metrics.incr('matching.refresh.failed')
+        print(f"Ranking Refresh Error (user_id={user_id}): {e}")
+    finally:
+        with _lock:
+            _pending.discard(user_id)
+        connection.close()  # 백그라운드 스레드의 DB 연결 정리
+
+def schedule_ranking_refresh(user_id, k):
+    """
+    같은 사용자의 갱신 작업이 이미 대기 중이면 추가하지 않습니다. (스레드 수는 MATCHING_REFRESH_WORKERS로 제한)
+    """
+    with _lock:
+        if user_id in _pending:
+            return
+        _pending.add(user_id)
+    _executor.submit(_run_refresh, user_id, k)
+
+metrics.register_gauge('matching.refresh.pending', lambda: len(_pending))
@@ -0,0 +1,121 @@
+"""
+쪽지 실시간 전달용 pub/sub.
+
+사용자별 채널에 이벤트를 발행하면 해당 사용자의 SSE 연결(MessageStreamView)로 전달됩니다.
+- {"type": "message", "message": {...}}: 새 쪽지 (받는 사람 + 보낸 사람의 다른 기기)
+- {"type": "read", "reader_id": ..., "opponent_id": ..., "last_read_message_id": ...}: 읽음 확인 (쪽지를 보낸 쪽)
+
+기본 백엔드(InProcessBroker)는 같은 프로세스 안에서만 전달합니다. 워커가 여러 개면
+MESSAGE_BROKER_BACKEND에 같은 인터페이스(subscribe/unsubscribe/publish)의 외부 브로커 구현을 지정해야 합니다.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from users import metrics
+
+class Subscription:
+    """
+    한 SSE 연결의 구독. 이벤트 루프 밖(동기 view 스레드)에서 발행된 이벤트도 안전하게 큐에 넣습니다.
+    """
+
+    def __init__(self, broker, user_id, maxsize):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def _put(self, event):
+        # 클라이언트가 느려 큐가 가득 차면 가장 오래된 이벤트를 버림 (재연결 시 after cursor로 다시 조회)
+        if self.queue.full():
+            self.queue.get_nowait()
+            metrics.incr('messages.stream.dropped')
+        self.queue.put_nowait(event)
+
+    def deliver(self, event):
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, user_id):
+        subscription = Subscription(self, user_id, settings.MESSAGE_STREAM_QUEUE_SIZE)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+
+        for subscription in subscriptions:
+            try:
+                subscription.deliver(event)
+            except RuntimeError:  # 이벤트 루프가 이미 종료된 연결
+                self.unsubscribe(subscription)
+        metrics.incr('messages.stream.published')
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+_broker = None
+_broker_lock = threading.Lock()
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.MESSAGE_BROKER_BACKEND)()
+    return _broker
+
+def publish_message(message, message_data):
+    """
+    새 쪽지를 받는 사람과 보낸 사람에게 발행합니다. (트랜잭션 커밋 이후)
+    """
+    event = {'type': 'message', 'message': {**message_data, 'recipient': message.recipient_id}}
+
+    def publish():
+        broker = get_broker()
+        broker.publish(message.recipient_id, event)
+        broker.publish(message.sender_id, event)
+    transaction.on_commit(publish)
+
+def publish_read_receipt(reader_id, opponent_id, last_read_message_id):
+    """
+    reader가 opponent의 쪽지를 last_read_message_id까지 읽었음을 opponent에게 발행합니다.
+    """
+    event = {
+        'type': 'read',
+        'reader_id': reader_id,
+        'opponent_id': opponent_id,
+        'last_read_message_id': last_read_message_id,
+    }
+    transaction.on_commit(lambda: get_broker().publish(opponent_id, event))
+
+metrics.register_gauge(
+    'messages.stream.subscribers',
+    lambda: get_broker().subscriber_count() if hasattr(get_broker(), 'subscriber_count') else None
+)
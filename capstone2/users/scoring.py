@@ -0,0 +1,293 @@
+"""
+AI 서버 없이 서버 내부에서 룸메이트 적합도를 계산하는 로컬 랭킹 엔진.
+
+Profile의 선택형 필드를 작은 정수 벡터로 인코딩한 뒤, 필드별 가중치와
+'불일치 패널티 행렬'을 하나의 조회 테이블(LUT)로 펼쳐서
+타깃 1명 vs 후보 N명의 점수를 NumPy gather 한 번으로 계산합니다.
+"""
+import numpy as np
+from django.conf import settings
+
+from users.models import Profile
+
+# 인코딩 순서 (코드 0은 '미입력'을 의미)
+PROFILE_CHOICE_FIELDS = [
+    'smoking_type', 'smoking_amount',
+    'sleeping_habit', 'sleeping_habit_freq', 'sleeping_habit_extent',
+    'life_style', 'wake_up_time', 'bed_time', 'pre_sleeping_life_style',
+    'sensitivity_to_sleep', 'cleaning_cycle', 'eating_in_room',
+]
+FIELD_INDEX = {name: i for i, name in enumerate(PROFILE_CHOICE_FIELDS)}
+
+# 필드별 선택지 코드 -> 정수(1부터 시작)
+CHOICE_CODES = {
+    name: {code: i + 1 for i, (code, _label) in enumerate(Profile._meta.get_field(name).choices)}
+    for name in PROFILE_CHOICE_FIELDS
+}
+
+DEFAULT_FIELD_WEIGHTS = {
+    'smoking_type': 3.0,
+    'smoking_amount': 1.0,
+    'sleeping_habit': 1.0,
+    'sleeping_habit_freq': 0.5,
+    'sleeping_habit_extent': 1.0,
+    'life_style': 1.5,
+    'wake_up_time': 1.0,
+    'bed_time': 1.5,
+    'pre_sleeping_life_style': 1.0,
+    'sensitivity_to_sleep': 1.0,
+    'cleaning_cycle': 1.5,
+    'eating_in_room': 1.0,
+}
+
+# (내 필드, 상대 필드) 교차 패널티 가중치. 양방향으로 모두 계산됨
+DEFAULT_CROSS_WEIGHTS = {
+    ('bed_time', 'wake_up_time'): 2.0,
+    ('sensitivity_to_sleep', 'sleeping_habit_extent'): 2.0,
+}
+
+# 미입력 값과의 비교 패널티 (잠버릇/흡연량처럼 해당 없음일 수 있는 필드는 0)
+MISSING_PENALTY = 0.5
+OPTIONAL_FIELDS = {'smoking_amount', 'sleeping_habit_freq', 'sleeping_habit_extent'}
+
+
+def _ordinal_matrix(size, flexible_index=None, flexible_penalty=0.25):
+    """
+    순서가 있는 선택지(예: 청소 주기)의 거리 기반 패널티 행렬. (0 ~ 1)
+    '유동적' 선택지는 모든 값과 flexible_penalty 만큼만 충돌.
+    """
+    ordered = size - (1 if flexible_index is not None else 0)
+    matrix = np.zeros((size, size))
+    for i in range(size):
+        for j in range(size):
+            if flexible_index is not None and flexible_index in (i, j):
+                matrix[i, j] = 0.0 if i == j else flexible_penalty
+            else:
+                matrix[i, j] = abs(i - j) / max(ordered - 1, 1)
+    return matrix
+
+
+def _categorical_matrix(size, mismatch=1.0):
+    matrix = np.full((size, size), mismatch)
+    np.fill_diagonal(matrix, 0.0)
+    return matrix
+
+
+def _smoking_type_matrix():
+    # NON_SMOKER vs 흡연자 = 1.0, 흡연자끼리 같은 종류 = 0.2, 다른 종류 = 0.4
+    size = len(Profile.SmokingTypeChoices.choices)
+    matrix = np.full((size, size), 0.4)
+    np.fill_diagonal(matrix, 0.2)
+    matrix[0, :] = 1.0
+    matrix[:, 0] = 1.0
+    matrix[0, 0] = 0.0
+    return matrix
+
+
+def _life_style_matrix():
+    # MORNING, NIGHT, IRREGULAR
+    return np.array([
+        [0.0, 1.0, 0.5],
+        [1.0, 0.0, 0.5],
+        [0.5, 0.5, 0.3],
+    ])
+
+
+def _pre_sleeping_matrix():
+    # RIGHT_AWAY, USE_PHONE_LAPTOP_WITH_LIGHT, WITH_MUSIC_AND_VIDEOS, FLEXIBLE
+    return np.array([
+        [0.0, 1.0, 0.8, 0.3],
+        [1.0, 0.0, 0.4, 0.3],
+        [0.8, 0.4, 0.0, 0.3],
+        [0.3, 0.3, 0.3, 0.0],
+    ])
+
+
+def _bed_vs_wake_matrix():
+    """
+    내 취침 시간 vs 상대 기상 시간. 한 명이 늦게 자고 다른 한 명이 일찍 일어날수록 충돌.
+    """
+    bed_choices = Profile.BedTimeChoices.choices
+    wake_choices = Profile.WakeUptimeChoices.choices
+    matrix = np.zeros((len(bed_choices), len(wake_choices)))
+    for i, (bed_code, _) in enumerate(bed_choices):
+        for j, (wake_code, _) in enumerate(wake_choices):
+            if 'FLEXIBLE' in (bed_code, wake_code):
+                matrix[i, j] = 0.1
+                continue
+            lateness = i            # BEFORE_TEN(0) ~ AFTER_TWO(3)
+            earliness = 3 - j       # AFTER_TEN(0) ~ BEFORE_SIX(3)
+            matrix[i, j] = max(0, lateness + earliness - 3) / 3
+    return matrix
+
+
+def _sensitivity_vs_extent_matrix():
+    """
+    내 수면 민감도 vs 상대 잠버릇 강도.
+    """
+    sensitivity_size = len(Profile.SensitivityToSleep.choices)   # INSENSITIVE, LITTLE_BIT_IS_FINE, SENSITIVE
+    extent_size = len(Profile.SleepingHabitExtentChoices.choices)  # WEAK, NORMAL, SEVERE
+    matrix = np.zeros((sensitivity_size, extent_size))
+    for i in range(sensitivity_size):
+        for j in range(extent_size):
+            matrix[i, j] = i * (j + 1) / ((sensitivity_size - 1) * extent_size)
+    return matrix
+
+
+def _with_missing(matrix, missing_penalty):
+    """
+    인덱스 0(미입력)을 위한 행/열을 앞에 추가합니다.
+    """
+    rows, cols = matrix.shape
+    padded = np.full((rows + 1, cols + 1), missing_penalty)
+    padded[0, 0] = 0.0
+    padded[1:, 1:] = matrix
+    return padded
+
+
+def build_default_penalty_matrices():
+    field_matrices = {
+        'smoking_type': _smoking_type_matrix(),
+        'smoking_amount': _ordinal_matrix(len(Profile.SmokingAmountChoices.choices)),
+        'sleeping_habit': _categorical_matrix(len(Profile.SleepingHabitChoices.choices), mismatch=0.3),
+        'sleeping_habit_freq': _ordinal_matrix(len(Profile.SleepingHabitFreqChoices.choices)),
+        'sleeping_habit_extent': _ordinal_matrix(len(Profile.SleepingHabitExtentChoices.choices)),
+        'life_style': _life_style_matrix(),
+        'wake_up_time': _ordinal_matrix(len(Profile.WakeUptimeChoices.choices), flexible_index=4),
+        'bed_time': _ordinal_matrix(len(Profile.BedTimeChoices.choices), flexible_index=4),
+        'pre_sleeping_life_style': _pre_sleeping_matrix(),
+        'sensitivity_to_sleep': _ordinal_matrix(len(Profile.SensitivityToSleep.choices)),
+        'cleaning_cycle': _ordinal_matrix(len(Profile.CleaningCycleChoices.choices)),
+        'eating_in_room': _ordinal_matrix(len(Profile.EatingInRoomChoices.choices)),
+    }
+    field_matrices = {
+        name: _with_missing(matrix, 0.0 if name in OPTIONAL_FIELDS else MISSING_PENALTY)
+        for name, matrix in field_matrices.items()
+    }
+    cross_matrices = {
+        ('bed_time', 'wake_up_time'): _with_missing(_bed_vs_wake_matrix(), 0.0),
+        ('sensitivity_to_sleep', 'sleeping_habit_extent'): _with_missing(_sensitivity_vs_extent_matrix(), 0.0),
+    }
+    return field_matrices, cross_matrices
+
+
+def encode_profile(profile):
+    """
+    Profile 인스턴스(또는 필드명 -> 코드 dict)를 정수 벡터로 변환합니다.
+    """
+    get = profile.get if isinstance(profile, dict) else lambda name: getattr(profile, name)
+    return [CHOICE_CODES[name].get(get(name), 0) for name in PROFILE_CHOICE_FIELDS]
+
+
+def encode_profiles(profiles):
+    return np.array([encode_profile(p) for p in profiles], dtype=np.int16).reshape(-1, len(PROFILE_CHOICE_FIELDS))
+
+
+class LocalRanker:
+    """
+    블록 b마다 (후보의 어떤 열을 볼지, 어떤 행렬의 어떤 행/열을 LUT로 쓸지)를 정의하고,
+    모든 블록의 LUT를 이어 붙여서 lut[gather_index].sum(axis=1) 한 번으로 점수를 계산합니다.
+    """
+
+    def __init__(self, field_weights=None, cross_weights=None, field_matrices=None, cross_matrices=None):
+        default_fields, default_cross = build_default_penalty_matrices()
+        self.field_weights = {**DEFAULT_FIELD_WEIGHTS, **(field_weights or {})}
+        self.cross_weights = {**DEFAULT_CROSS_WEIGHTS, **(cross_weights or {})}
+        self.field_matrices = {**default_fields, **(field_matrices or {})}
+        self.cross_matrices = {**default_cross, **(cross_matrices or {})}
+
+        # 블록: (후보 쪽 열, 타깃 쪽 열, 가중치 적용된 행렬, 타깃 값이 행인지 여부)
+        self.blocks = []
+        for name in PROFILE_CHOICE_FIELDS:
+            col = FIELD_INDEX[name]
+            self.blocks.append((col, col, self.field_weights[name] * self.field_matrices[name], True))
+        for (mine, theirs), weight in self.cross_weights.items():
+            matrix = weight * self.cross_matrices[(mine, theirs)]
+            # 내 mine vs 상대 theirs
+            self.blocks.append((FIELD_INDEX[theirs], FIELD_INDEX[mine], matrix, True))
+            # 상대 mine vs 내 theirs
+            self.blocks.append((FIELD_INDEX[mine], FIELD_INDEX[theirs], matrix, False))
+
+        self._candidate_columns = np.array([block[0] for block in self.blocks])
+        self._block_sizes = [block[2].shape[1] if block[3] else block[2].shape[0] for block in self.blocks]
+        self._offsets = np.concatenate([[0], np.cumsum(self._block_sizes)[:-1]]).astype(np.int32)
+        self.max_penalty = (
+            sum(self.field_weights[name] * self.field_matrices[name].max() for name in PROFILE_CHOICE_FIELDS)
+            + sum(2 * weight * self.cross_matrices[pair].max() for pair, weight in self.cross_weights.items())
+        )
+
+    def build_gather_index(self, candidate_codes):
+        """
+        후보 인코딩 행렬(N x 필드)을 LUT 인덱스 행렬(N x 블록)로 변환. 코호트 단위로 재사용 가능.
+        """
+        return candidate_codes[:, self._candidate_columns].astype(np.int32) + self._offsets
+
+    def build_lut(self, target_codes):
+        parts = []
+        for _candidate_col, target_col, matrix, target_is_row in self.blocks:
+            value = target_codes[target_col]
+            parts.append(matrix[value, :] if target_is_row else matrix[:, value])
+        return np.concatenate(parts)
+
+    def to_percent(self, penalty):
+        # 가중치를 모두 0으로 덮어쓴 경우 등 패널티가 생길 수 없으면 모두 100점
+        if self.max_penalty <= 0:
+            return np.full(np.shape(penalty), 100, dtype=np.int16)
+        return np.rint(100 * (1 - penalty / self.max_penalty)).astype(np.int16)
+
+    def score_codes(self, target_codes, gather_index):
+        penalty = self.build_lut(target_codes).take(gather_index).sum(axis=1)
+        return self.to_percent(penalty)
+
+    def score_matrix(self, target_codes, gather_index):
+        """
+        여러 타깃(T x 필드) vs 후보(N) 점수 행렬(T x N). 코호트 일괄 랭킹용.
+        """
+        luts = np.stack([self.build_lut(codes) for codes in target_codes])
+        penalty = np.zeros((len(target_codes), len(gather_index)))
+        for b in range(len(self.blocks)):
+            penalty += luts[:, gather_index[:, b]]
+        return self.to_percent(penalty)
+
+    @staticmethod
+    def top_k(scores, k):
+        """
+        점수 상위 k개의 인덱스를 내림차순으로 반환 (argpartition으로 O(N)).
+        """
+        if k >= len(scores):
+            return np.argsort(-scores, kind='stable')
+        top = np.argpartition(-scores, k)[:k]
+        return top[np.argsort(-scores[top], kind='stable')]
+
+    def rank_topk(self, target_profile, candidate_profiles, k):
+        """
+        AI 서버의 /v1/rank/topk와 같은 결과 형식으로 반환합니다.
+        반환: (정렬된 후보 user_id 리스트, {user_id: match_percent})
+        """
+        candidate_profiles = list(candidate_profiles)
+        if not candidate_profiles:
+            return [], {}
+
+        candidate_ids = np.array([p.user_id for p in candidate_profiles])
+        gather_index = self.build_gather_index(encode_profiles(candidate_profiles))
+        scores = self.score_codes(np.array(encode_profile(target_profile)), gather_index)
+
+        top = self.top_k(scores, k)
+        ordered_ids = candidate_ids[top].tolist()
+        match_data = dict(zip(ordered_ids, scores[top].tolist()))
+        return ordered_ids, match_data
+
+
+_local_ranker = None
+
+def get_local_ranker():
+    """
+    settings의 가중치로 생성한 LocalRanker를 프로세스 단위로 재사용합니다.
+    """
+    global _local_ranker
+    if _local_ranker is None:
+        _local_ranker = LocalRanker(
+            field_weights=settings.MATCHING_LOCAL_FIELD_WEIGHTS,
+            cross_weights=settings.MATCHING_LOCAL_CROSS_WEIGHTS,
+        )
+    return _local_ranker
@@ -1,11 +1,11 @@
-from .auth_serializers import DormVerificationSerializer, SignUpSerializer, ProfileSerializer
+from .auth_serializers import DormVerificationSerializer, DormVerificationJobSerializer, SignUpSerializer, ProfileSerializer
 from .matching_serializers import MatchingSummarySerializer, PublicProfileSerializer
 from .mypage_serializers import MyUserSerializer, MyDormInfoSerializer, MyProfileSerializer
-from .message_serializers import MessageSerializer, ConversationSerializer
+from .message_serializers import MessageSerializer, BulkMessageSerializer, MessageSearchSerializer, ConversationSerializer
 
 __all__ = [
-    'DormVerificationSerializer', 'SignUpSerializer', 'ProfileSerializer',
+    'DormVerificationSerializer', 'DormVerificationJobSerializer', 'SignUpSerializer', 'ProfileSerializer',
     'MatchingSummarySerializer', 'PublicProfileSerializer', 'MyUserSerializer',
     'MyDormInfoSerializer', 'MyProfileSerializer',
-    'MessageSerializer', 'ConversationSerializer',
+    'MessageSerializer', 'BulkMessageSerializer', 'MessageSearchSerializer', 'ConversationSerializer',
 ]
\ No newline at end of file
@@ -1,13 +1,7 @@
 import re
-import os
-import json
-import uuid
-from django.conf import settings
 from rest_framework import serializers
-from django.core.files.storage import default_storage
 from rest_framework.validators import UniqueValidator
-from users.models import User, DormInfo, Profile
-from users.ocr_service import call_clova_ocr
+from users.models import User, DormInfo, DormVerificationJob, Profile
 
 USER_REVERSE_MAPS = {
     'grade': {label: code for code, label in User.GradeChoices.choices},
@@ -47,117 +41,108 @@ PROFILE_DISPLAY_MAPS = {
 }
 
 class DormVerificationSerializer(serializers.Serializer):
+    """
+    기숙사 합격 화면 캡처 업로드. 여기서는 이미지 형식만 확인하고,
+    OCR과 아래 build_dorm_data 검증은 작업 큐(users.ocr_jobs)에서 실행합니다.
+    """
     image = serializers.ImageField()
 
-    def validate(self, data):
-        image = data.get('image')
+class DormVerificationJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.UUIDField(source='id', read_only=True)
+    queue_ms = serializers.SerializerMethodField()
+    run_ms = serializers.SerializerMethodField()
 
-        # 임시 파일 저장
-        ext = os.path.splitext(image.name)[1]
-        temp_file_name = f"ocr_temp_{uuid.uuid4()}.{ext}"
-        temp_file_path = temp_file_name
-
-        full_temp_path = None
-
-        try:
-            path = default_storage.save(temp_file_path, image)
-            full_temp_path = os.path.join(settings.MEDIA_ROOT, path)
-
-            # OCR API 호출 (수정된 ocr_service 사용)
-            ocr_result = call_clova_ocr(full_temp_path)
-
-            if not ocr_result.get("success"):
-                raise serializers.ValidationError(f"OCR API 실패: {ocr_result.get('error')}")
-
-            ocr_data = ocr_result.get("data")  # ocr_data는 딕셔너리.
-
-        finally:
-            if full_temp_path and os.path.exists(full_temp_path):
-                os.remove(full_temp_path)
-
-        # print("\n--- OCR 추출 결과 (딕셔너리 형태) ---")
-        # print(json.dumps(ocr_data, indent=4, ensure_ascii=False))
-        # print("---------------------------\n")
-
-        # 새로운 한글 키로 Raw 텍스트 추출
-        name = ocr_data.get("이름")
-        student_id = ocr_data.get('학번')
-        is_accepted_raw_text = ocr_data.get('합격여부', "")  # '합격여부' 전체 텍스트
-        sex_text = ocr_data.get('성별', "")
-        building_text = ocr_data.get('지원건물', "")
-        room_text = ocr_data.get('지원호실구분', "")
-
-        # print(f"\n[DEBUG 1] 1차 검증: student_id '{student_id}' (타입: {type(student_id)})로 중복 검사 시작...")
-
-        if not student_id or DormInfo.objects.filter(student_id=student_id).exists():
-            print(f"[DEBUG 1] 중복 발견 또는 학번 없음!")
-            raise serializers.ValidationError({"image": "이미 가입된 학번이거나, 학번을 인식할 수 없습니다."})
-
-        # print(f"[DEBUG 1] 중복 없음. 다음 단계 진행.")
-
-        if not name:
-            raise serializers.ValidationError("OCR 인식 실패: 이름을 찾을 수 없습니다.")
-
-        # 정규식 파싱
-        selected_semester = None
-        semester_match = re.search(r'(\d{2}-\d학기)', is_accepted_raw_text)
-        if semester_match:
-            selected_semester = semester_match.group(1)
-
-        is_accepted_text = "선발" if "선발" in is_accepted_raw_text else "미선발"
-
-        period_text = ""
-        period_match = re.search(r'\((학기|6개월)\)', is_accepted_raw_text)
-        if period_match:
-            period_text = period_match.group(1)
-
-        # 선발 여부 확인
-        if is_accepted_text != "선발":
-            raise serializers.ValidationError({"image": "기숙사 선발 대상자가 아닙니다."})
-
-        # Enum 변환
-        sex_enum = "MALE" if sex_text == "남자" else "FEMALE"
-
-        building_enum = None
-        building_map = {"명덕관": "MYEONGDEOK", "명현관": "MYEONGHYEON", "3동": "DONG_3", "4동": "DONG_4", "5동": "DONG_5"}
-
-        # '지원건물' 텍스트에서 괄호 제거 후 매핑 (혹은 'in'으로 확인)
-        building_name_cleaned = building_text.split('(')[0].strip()
-
-        for key, value in building_map.items():
-            if key in building_name_cleaned:
-                building_enum = value
-                break
-
-        if not building_enum:
-            raise serializers.ValidationError(f"지원 건물을 인식할 수 없습니다: {building_text}")
-
-        accepted_enum = "ACCEPTED"  # 이미 위에서 "선발"인지 검증했으므로
-        room_enum = "QUAD" if room_text == "4인실" else "DOUBLE"
-        period_enum = "SEMESTER" if period_text == "학기" else "SIXMONTHS"
-
-        # 성별/건물 유효성 검사
-        if sex_enum == "FEMALE" and building_enum == "DONG_3":
-            raise serializers.ValidationError({"image": "여학생은 3동에 배정될 수 없습니다."})
-
-        male_restricted = ['MYEONGHYEON', 'DONG_4', 'DONG_5']
-        if sex_enum == "MALE" and building_enum in male_restricted:
-            raise serializers.ValidationError({"image": "남학생은 해당 건물에 배정될 수 없습니다."})
-
-        # 최종 데이터 반환
-        validated_dorm_data = {
-            "student_id": student_id,
-            "name": name,
-            "sex": sex_enum,
-            "building": building_enum,
-            "room": room_enum,
-            "selected_semester": selected_semester,
-            "is_accepted": accepted_enum,
-            "residency_period": period_enum,
-        }
-        # print(f"[DEBUG 2] 최종 저장될 데이터: {validated_dorm_data}\n")
-
-        return validated_dorm_data
+    class Meta:
+        model = DormVerificationJob
+        fields = ['job_id', 'status', 'result', 'errors', 'queue_ms', 'run_ms']
+
+    def get_queue_ms(self, obj):
+        if obj.started_at is None:
+            return None
+        return round((obj.started_at - obj.created_at).total_seconds() * 1000)
+
+    def get_run_ms(self, obj):
+        if obj.started_at is None or obj.finished_at is None:
+            return None
+        return round((obj.finished_at - obj.started_at).total_seconds() * 1000)
+
+def build_dorm_data(ocr_data):
+    """
+    OCR 결과(process_ocr_response_with_coords의 data)를 검증해 DormInfo 저장용 데이터로 변환합니다.
+    검증에 실패하면 serializers.ValidationError를 발생시킵니다.
+    """
+    # 새로운 한글 키로 Raw 텍스트 추출
+    name = ocr_data.get("이름")
+    student_id = ocr_data.get('학번')
+    is_accepted_raw_text = ocr_data.get('합격여부', "")  # '합격여부' 전체 텍스트
+    sex_text = ocr_data.get('성별', "")
+    building_text = ocr_data.get('지원건물', "")
+    room_text = ocr_data.get('지원호실구분', "")
+
+    if not student_id or DormInfo.objects.filter(student_id=student_id).exists():
+        raise serializers.ValidationError({"image": "이미 가입된 학번이거나, 학번을 인식할 수 없습니다."})
+
+    if not name:
+        raise serializers.ValidationError("OCR 인식 실패: 이름을 찾을 수 없습니다.")
+
+    # 정규식 파싱
+    selected_semester = None
+    semester_match = re.search(r'(\d{2}-\d학기)', is_accepted_raw_text)
+    if semester_match:
+        selected_semester = semester_match.group(1)
+
+    is_accepted_text = "선발" if "선발" in is_accepted_raw_text else "미선발"
+
+    period_text = ""
+    period_match = re.search(r'\((학기|6개월)\)', is_accepted_raw_text)
+    if period_match:
+        period_text = period_match.group(1)
+
+    # 선발 여부 확인
+    if is_accepted_text != "선발":
+        raise serializers.ValidationError({"image": "기숙사 선발 대상자가 아닙니다."})
+
+    # Enum 변환
+    sex_enum = "MALE" if sex_text == "남자" else "FEMALE"
+
+    building_enum = None
+    building_map = {"명덕관": "MYEONGDEOK", "명현관": "MYEONGHYEON", "3동": "DONG_3", "4동": "DONG_4", "5동": "DONG_5"}
+
+    # '지원건물' 텍스트에서 괄호 제거 후 매핑 (혹은 'in'으로 확인)
+    building_name_cleaned = building_text.split('(')[0].strip()
+
+    for key, value in building_map.items():
+        if key in building_name_cleaned:
+            building_enum = value
+            break
+
+    if not building_enum:
+        raise serializers.ValidationError(f"지원 건물을 인식할 수 없습니다: {building_text}")
+
+    accepted_enum = "ACCEPTED"  # 이미 위에서 "선발"인지 검증했으므로
+    room_enum = "QUAD" if room_text == "4인실" else "DOUBLE"
+    period_enum = "SEMESTER" if period_text == "학기" else "SIXMONTHS"
+
+    # 성별/건물 유효성 검사
+    if sex_enum == "FEMALE" and building_enum == "DONG_3":
+        raise serializers.ValidationError({"image": "여학생은 3동에 배정될 수 없습니다."})
+
+    male_restricted = ['MYEONGHYEON', 'DONG_4', 'DONG_5']
+    if sex_enum == "MALE" and building_enum in male_restricted:
+        raise serializers.ValidationError({"image": "남학생은 해당 건물에 배정될 수 없습니다."})
+
+    # 최종 데이터 반환
+    validated_dorm_data = {
+        "student_id": student_id,
+        "name": name,
+        "sex": sex_enum,
+        "building": building_enum,
+        "room": room_enum,
+        "selected_semester": selected_semester,
+        "is_accepted": accepted_enum,
+        "residency_period": period_enum,
+    }
+    return validated_dorm_data
 
 class SignUpSerializer(serializers.Serializer):
     nickname = serializers.CharField(
@@ -244,6 +229,18 @@ class ProfileSerializer(serializers.ModelSerializer):
         # 번역된 data를 ModelSerializer의 원래 검증 로직으로 넘김
         return super().to_internal_value(data)
 
+    def update(self, instance, validated_data):
+        """
+        실제로 값이 바뀐 경우에만 사전 계산된 매칭 점수(MatchScore)를 증분 재계산합니다.
+        """
+        from users.prerank import schedule_profile_rescore  # 순환 import 방지 (prerank -> ai_client -> serializers)
+
+        changed = any(getattr(instance, field) != value for field, value in validated_data.items())
+        instance = super().update(instance, validated_data)
+        if changed:
+            schedule_profile_rescore(instance.user_id)
+        return instance
+
     def to_representation(self, instance):
         """
         [읽기/조회] DB의 '코드' 데이터를 '한글'로 번역
@@ -1,5 +1,6 @@
+from django.conf import settings
 from rest_framework import serializers
-from users.models import User, Message
+from users.models import User, DormInfo, Message, Conversation
 
 class MessageSerializer(serializers.ModelSerializer):
     sender = serializers.PrimaryKeyRelatedField(read_only=True) # 요청 Body에서는 받지 않고 View에서 직접 주입할 수 있도록 허용
@@ -9,25 +10,111 @@ class MessageSerializer(serializers.ModelSerializer):
         write_only=True
     )
     recipient_nickname = serializers.CharField(source='recipient.nickname', read_only=True)
+    is_read = serializers.SerializerMethodField()
 
     class Meta:
         model = Message
         fields = ['id', 'sender', 'sender_nickname', 'recipient', 'recipient_nickname', 'content', 'timestamp', 'is_read']
         read_only_fields = ['id', 'sender', 'sender_nickname','recipient_nickname','timestamp', 'is_read']
 
+    def get_is_read(self, message):
+        # 대화방(context['conversation'])의 받는 사람 읽음 cursor 기준. 대화방 정보가 없으면 새 쪽지로 간주
+        conversation = self.context.get('conversation')
+        return conversation.is_read(message) if conversation else False
+
+class CohortFilterSerializer(serializers.Serializer):
+    """
+    운영진 공지용 받는 사람 조건 (기숙사 지원 정보 기준, 입력한 조건만 적용)
+    """
+    sex = serializers.ChoiceField(choices=DormInfo.SexChoices.choices, required=False)
+    building = serializers.ChoiceField(choices=DormInfo.BuildingChoices.choices, required=False)
+    room = serializers.ChoiceField(choices=DormInfo.RoomChoices.choices, required=False)
+    residency_period = serializers.ChoiceField(choices=DormInfo.ResidencyPeriodChoices.choices, required=False)
+    selected_semester = serializers.CharField(required=False)
+    is_accepted = serializers.ChoiceField(choices=DormInfo.AcceptanceChoices.choices, required=False)
+
+class BulkMessageSerializer(serializers.Serializer):
+    """
+    여러 명에게 같은 내용의 쪽지 보내기. recipients(사용자 id 목록) 또는 cohort(운영진 전용) 중 하나를 지정합니다.
+    """
+    recipients = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    cohort = CohortFilterSerializer(required=False)
+    content = serializers.CharField()
+
+    def validate(self, data):
+        if ('recipients' in data) == ('cohort' in data):
+            raise serializers.ValidationError("recipients와 cohort 중 하나만 지정해야 합니다.")
+
+        sender = self.context['sender']
+        if 'cohort' in data and not sender.is_staff:
+            raise serializers.ValidationError({"cohort": "운영진만 조건으로 보낼 수 있습니다."})
+
+        if 'recipients' in data:
+            recipient_ids = set(data['recipients'])
+            if sender.id in recipient_ids:
+                raise serializers.ValidationError("자기 자신에게 쪽지를 보낼 수 없습니다.")
+
+            max_recipients = settings.MESSAGE_BULK_MAX_RECIPIENTS
+            if not sender.is_staff and len(recipient_ids) > max_recipients:
+                raise serializers.ValidationError({"recipients": f"한 번에 최대 {max_recipients}명에게 보낼 수 있습니다."})
+
+            # 받는 사람 존재 여부를 한 번의 쿼리로 확인
+            recipients = list(User.objects.filter(id__in=recipient_ids).only('id', 'nickname'))
+            missing_ids = recipient_ids - {recipient.id for recipient in recipients}
+            if missing_ids:
+                raise serializers.ValidationError({"recipients": f"존재하지 않는 사용자입니다: {sorted(missing_ids)}"})
+        else:
+            recipients = list(
+                User.objects.filter(**{f'dorminfo__{key}': value for key, value in data['cohort'].items()})
+                .exclude(id=sender.id).only('id', 'nickname')
+            )
+            if not recipients:
+                raise serializers.ValidationError({"cohort": "조건에 맞는 사용자가 없습니다."})
+
+        data['recipient_users'] = recipients
+        return data
+
+class MessageSearchSerializer(MessageSerializer):
+    """
+    쪽지 검색 결과. 어느 대화방의 쪽지인지 알 수 있도록 상대방 정보를 함께 반환합니다.
+    """
+    opponent_id = serializers.SerializerMethodField()
+    opponent_nickname = serializers.SerializerMethodField()
+
+    class Meta(MessageSerializer.Meta):
+        fields = ['id', 'sender', 'sender_nickname', 'opponent_id', 'opponent_nickname', 'content', 'timestamp']
+
+    def _opponent(self, message):
+        request_user = self.context.get('request_user')
+        return message.recipient if request_user and message.sender_id == request_user.id else message.sender
+
+    def get_opponent_id(self, message):
+        return self._opponent(message).id
+
+    def get_opponent_nickname(self, message):
+        return self._opponent(message).nickname
+
 class ConversationSerializer(serializers.ModelSerializer):
+    """
+    대화방 요약(Conversation) 기준 쪽지 리스트 항목. id는 기존과 같이 마지막 쪽지의 id입니다.
+    """
+    id = serializers.IntegerField(source='last_message_id', read_only=True)
     opponent_id = serializers.SerializerMethodField()
     opponent_nickname = serializers.SerializerMethodField()
-    last_message = serializers.CharField(source='content')
-    last_sender_id = serializers.SerializerMethodField()
+    last_message = serializers.CharField(source='last_message.content', default=None)
+    timestamp = serializers.DateTimeField(source='last_timestamp')
+    is_read = serializers.SerializerMethodField()
+    last_sender_id = serializers.IntegerField(source='last_message.sender_id', default=None)
+    unread_count = serializers.SerializerMethodField()
 
     class Meta:
-        model = Message
+        model = Conversation
         fields = [
-            'id', 'opponent_id', 'opponent_nickname', 'last_message', 'timestamp', 'is_read', 'last_sender_id'
+            'id', 'opponent_id', 'opponent_nickname', 'last_message', 'timestamp', 'is_read', 'last_sender_id',
+            'unread_count'
         ]
 
-    def get_opponent_id(self, message):
+    def get_opponent_id(self, conversation):
         """
         현재 요청한 사용자(request_user)를 기준으로 상대방의 ID를 반환.
         """
@@ -35,23 +122,27 @@ class ConversationSerializer(serializers.ModelSerializer):
         if not request_user:
             return None
 
-        # 내가 보낸 메시지라면, 받는 사람이 상대방
-        if message.sender == request_user:
-            return message.recipient.id
-        # 내가 받은 메시지라면, 보낸 사람이 상대방
-        else:
-            return message.sender.id
+        return conversation.opponent_id_for(request_user.id)
 
-    def get_opponent_nickname(self, message):
+    def get_opponent_nickname(self, conversation):
         request_user = self.context.get('request_user')
 
         if not request_user:
             return "알 수 없음"
 
-        if message.sender == request_user:
-            return message.recipient.nickname
-        else:
-            return message.sender.nickname
+        # get_inbox_page에서 join으로 함께 조회한 값 (없으면 상대 User를 조회)
+        nickname = getattr(conversation, 'opponent_nickname', None)
+        return nickname if nickname is not None else conversation.opponent_for(request_user.id).nickname
+
+    def get_is_read(self, conversation):
+        # 마지막 쪽지를 받은 사람이 읽었는지 (읽음 cursor 기준)
+        if conversation.last_message is None:
+            return None
+        return conversation.is_read(conversation.last_message)
+
+    def get_unread_count(self, conversation):
+        request_user = self.context.get('request_user')
+        if not request_user:
+            return 0
 
-    def get_last_sender_id(self, message):
-        return message.sender_id
\ No newline at end of file
+        return conversation.unread_count_for(request_user.id)
@@ -0,0 +1,67 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from users.cohort import get_cohort_key, get_feed_cohort_key, refresh_cohort_key
+from users.message_search import install_message_fts
+from users.models import DormInfo, Profile, ProfileOutbox
+from users.prerank import schedule_profile_rescore
+from users.profile_sync import record_profile_event
+from users.ranking_cache import invalidate_cohort
+
+def _on_profile_change(user_id):
+    # 프로필 생성/삭제로 피드 노출 자격이 바뀔 수 있으므로 코호트 키를 다시 계산
+    dorm_info, cohort_changed = refresh_cohort_key(user_id)
+    if dorm_info:
+        invalidate_cohort(get_cohort_key(dorm_info))
+    if cohort_changed:
+        # 새로 피드에 들어온(또는 빠진) 사용자를 다른 사람의 사전 계산 랭킹에 반영
+        schedule_profile_rescore(user_id)
+
+@receiver(post_save, sender=Profile)
+def on_profile_saved(sender, instance, **kwargs):
+    _on_profile_change(instance.user_id)
+    record_profile_event(instance.user_id)
+
+@receiver(post_delete, sender=Profile)
+def on_profile_deleted(sender, instance, **kwargs):
+    _on_profile_change(instance.user_id)
+    record_profile_event(instance.user_id, ProfileOutbox.EventChoices.DELETE)
+
+@receiver(pre_save, sender=DormInfo)
+def update_dorm_info_cohort(sender, instance, **kwargs):
+    # 코호트가 바뀌는 경우 이전 코호트도 무효화해야 하므로 저장 전 값을 기억
+    instance._previous_cohort_key = None
+    instance._previous_feed_cohort_key = None
+    if instance.pk:
+        previous = DormInfo.objects.filter(pk=instance.pk).first()
+        if previous:
+            instance._previous_cohort_key = get_cohort_key(previous)
+            instance._previous_feed_cohort_key = previous.cohort_key
+
+    has_profile = Profile.objects.filter(user_id=instance.user_id).exists()
+    instance.cohort_key = get_feed_cohort_key(instance, has_profile)
+
+@receiver(post_save, sender=DormInfo)
+@receiver(post_delete, sender=DormInfo)
+def invalidate_ranking_on_dorm_info_change(sender, instance, **kwargs):
+    cohort_key = get_cohort_key(instance)
+    invalidate_cohort(cohort_key)
+
+    previous_cohort_key = getattr(instance, '_previous_cohort_key', None)
+    if previous_cohort_key and previous_cohort_key != cohort_key:
+        invalidate_cohort(previous_cohort_key)
+
+@receiver(post_save, sender=DormInfo)
+def rescore_on_cohort_change(sender, instance, **kwargs):
+    # 생성 포함, 피드 코호트가 바뀐 경우에만 사전 계산된 매칭 점수를 재계산
+    if instance.cohort_key != getattr(instance, '_previous_feed_cohort_key', None):
+        schedule_profile_rescore(instance.user_id)
+
+@receiver(post_save, sender=DormInfo)
+def record_dorm_info_event(sender, instance, **kwargs):
+    # 회원가입/코호트 변경을 AI 랭커 레지스트리에 반영 (프로필이 없으면 전송 시 삭제로 처리됨)
+    record_profile_event(instance.user_id)
+
+def install_message_search(sender, using, **kwargs):
+    # UsersConfig.ready()에서 post_migrate에 연결
+    install_message_fts(using)
@@ -0,0 +1,4 @@
+"""
+users 앱 테스트.
+python manage.py test users --settings=config.settings.test
+"""
@@ -0,0 +1,106 @@
+import asyncio
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+from django.test import TestCase, override_settings
+
+from users import prerank
+from users.ai_client import AsyncRankingClient, httpx
+from users.management.commands.run_ai_stub import ProfileRegistry, StubHandler
+from users.models import MatchScore, Profile
+from users.tests.utils import COHORT_KEY, create_member
+
+
+class CountingStubHandler(StubHandler):
+    """
+    동시에 처리 중인 요청 수와 사용된 클라이언트 연결(포트)을 기록하는 AI 스텁 핸들러.
+    """
+    lock = threading.Lock()
+    active = 0
+    max_active = 0
+    client_ports = set()
+
+    def do_POST(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+            cls.client_ports.add(self.client_address[1])
+        try:
+            super().do_POST()
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        pass  # 타임아웃으로 클라이언트가 먼저 끊은 연결(BrokenPipe)
+
+
+class AsyncRankingClientTests(TestCase):
+    def setUp(self):
+        if httpx is None:
+            self.skipTest("httpx가 설치되지 않음")
+        self.handler = type('TestStubHandler', (CountingStubHandler,), {
+            'lock': threading.Lock(), 'client_ports': set(), 'registry': ProfileRegistry(),
+        })
+        self.server = QuietHTTPServer(('127.0.0.1', 0), self.handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+        rnd = random.Random(1)
+        self.users = [create_member(i, rnd) for i in range(6)]
+        self.profiles = list(Profile.objects.select_related('user').order_by('user_id'))
+
+    def make_client(self, **options):
+        defaults = {'base_url': self.base_url, 'api_key': 'test', 'connect_timeout': 1, 'read_timeout': 5, 'pool_maxsize': 2}
+        return AsyncRankingClient(**{**defaults, **options})
+
+    def rank_many(self, client, times):
+        async def run():
+            try:
+                return await asyncio.gather(*(
+                    client.rank(self.profiles[0], self.profiles[1:], 3) for _ in range(times)
+                ))
+            finally:
+                await client.aclose()
+        return asyncio.run(run())
+
+    def test_rank(self):
+        ordered_ids, match_data = self.rank_many(self.make_client(), 1)[0]
+        self.assertEqual(len(ordered_ids), 3)
+        self.assertEqual(set(ordered_ids), set(match_data))
+        self.assertTrue(set(ordered_ids) <= {p.user_id for p in self.profiles[1:]})
+
+    def test_read_timeout(self):
+        self.handler.delay = 0.5
+        with self.assertRaises(httpx.ReadTimeout):
+            self.rank_many(self.make_client(read_timeout=0.1), 1)
+
+    def test_pool_limits_concurrent_connections(self):
+        self.handler.delay = 0.1
+        started = time.perf_counter()
+        results = self.rank_many(self.make_client(pool_maxsize=2), 6)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(len(results), 6)
+        self.assertEqual(self.handler.max_active, 2)
+        # keep-alive 연결을 재사용하므로 연결은 pool_maxsize개만 열림
+        self.assertEqual(len(self.handler.client_ports), 2)
+        self.assertGreaterEqual(elapsed, 0.3)
+
+    @override_settings(MATCHING_RANKER='remote', AI_RANKING_PROTOCOL='full', AI_POOL_MAXSIZE=3)
+    def test_remote_rank_cohort_matches_local(self):
+        with override_settings(AI_SERVER_URL=self.base_url):
+            prerank.rank_cohort(COHORT_KEY, ranker='remote', k=3)
+        remote = list(MatchScore.objects.order_by('user_id', 'rank').values_list('user_id', 'percent'))
+        self.assertLessEqual(self.handler.max_active, 3)
+
+        prerank.rank_cohort(COHORT_KEY, ranker='local', k=3)
+        local = list(MatchScore.objects.order_by('user_id', 'rank').values_list('user_id', 'percent'))
+        self.assertEqual(remote, local)
@@ -0,0 +1,100 @@
+import random
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from users.conversations import get_conversation
+from users.models import DormInfo, Message, UnreadCounter
+from users.tests.utils import create_member, create_users
+
+
+class BulkMessageSendTests(TestCase):
+    def setUp(self):
+        self.sender, self.a, self.b, self.c = create_users(4)
+        self.client = APIClient()
+
+    def bulk_send(self, sender, **data):
+        return self.client.post(reverse('message-bulk-send'), data, format='json', HTTP_X_USER_ID=str(sender.id))
+
+    def test_updates_conversations_and_unread_counters(self):
+        # a와는 이미 대화방이 있고 a는 다른 쪽지도 안 읽은 상태
+        self.client.post(reverse('message-send'), {'recipient': self.a.id, 'content': "먼저"}, HTTP_X_USER_ID=str(self.c.id))
+        self.client.post(reverse('message-send'), {'recipient': self.a.id, 'content': "기존"}, HTTP_X_USER_ID=str(self.sender.id))
+
+        response = self.bulk_send(self.sender, recipients=[self.a.id, self.b.id, self.a.id], content="공지")
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['sent'], 2)  # 중복 id는 한 번만
+
+        for recipient, unread in ((self.a, 2), (self.b, 1)):
+            conversation = get_conversation(self.sender.id, recipient.id)
+            message = Message.objects.get(pk=conversation.last_message_id)
+            self.assertEqual((message.sender_id, message.recipient_id, message.content), (self.sender.id, recipient.id, "공지"))
+            self.assertEqual(conversation.unread_count_for(recipient.id), unread)
+            self.assertEqual(conversation.unread_count_for(self.sender.id), 0)
+
+        counters = dict(UnreadCounter.objects.values_list('user_id', 'unread_count'))
+        self.assertEqual(counters, {self.a.id: 3, self.b.id: 1})
+
+    def test_query_count_does_not_grow_with_recipients(self):
+        few, many = create_users(2, prefix='few'), create_users(20, prefix='many')
+        with CaptureQueriesContext(connection) as few_queries:
+            self.assertEqual(self.bulk_send(self.sender, recipients=[u.id for u in few], content="x").status_code, 201)
+        with CaptureQueriesContext(connection) as many_queries:
+            self.assertEqual(self.bulk_send(self.sender, recipients=[u.id for u in many], content="x").status_code, 201)
+        self.assertEqual(len(few_queries), len(many_queries))
+
+    @override_settings(MESSAGE_BULK_MAX_RECIPIENTS=2)
+    def test_recipient_cap_for_non_staff(self):
+        recipients = [self.a.id, self.b.id, self.c.id]
+        response = self.bulk_send(self.sender, recipients=recipients, content="x")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('recipients', response.data)
+        self.assertEqual(Message.objects.count(), 0)
+
+        self.sender.is_staff = True
+        self.sender.save()
+        self.assertEqual(self.bulk_send(self.sender, recipients=recipients, content="x").status_code, 201)
+
+    def test_invalid_recipients(self):
+        cases = [
+            {'recipients': [self.a.id, 9999], 'content': "x"},          # 없는 사용자
+            {'recipients': [self.a.id, self.sender.id], 'content': "x"},  # 자기 자신
+            {'recipients': [], 'content': "x"},
+            {'content': "x"},                                            # recipients/cohort 둘 다 없음
+        ]
+        for data in cases:
+            response = self.bulk_send(self.sender, **data)
+            self.assertEqual(response.status_code, 400, data)
+        self.assertIn('9999', str(self.bulk_send(self.sender, **cases[0]).data))
+        self.assertEqual(Message.objects.count(), 0)
+        self.assertFalse(UnreadCounter.objects.exists())
+
+    def test_cohort_filter_is_staff_only(self):
+        rnd = random.Random(10)
+        members = [create_member(i, rnd) for i in range(3)]
+        DormInfo.objects.filter(user=members[2]).update(building='MYEONGHYEON')
+        cohort = {'sex': 'MALE', 'building': 'MYEONGDEOK'}
+
+        response = self.bulk_send(self.sender, cohort=cohort, content="공지")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cohort', response.data)
+
+        self.sender.is_staff = True
+        self.sender.save()
+        response = self.bulk_send(self.sender, cohort=cohort, content="공지")
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(
+            set(Message.objects.values_list('recipient_id', flat=True)), {members[0].id, members[1].id}
+        )
+
+        response = self.bulk_send(self.sender, cohort={'building': 'DONG_5'}, content="공지")
+        self.assertEqual(response.status_code, 400)
+
+    def test_both_recipients_and_cohort(self):
+        self.sender.is_staff = True
+        self.sender.save()
+        response = self.bulk_send(self.sender, recipients=[self.a.id], cohort={'sex': 'MALE'}, content="x")
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,129 @@
+import random
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from users import metrics
+from users.circuit_breaker import CircuitBreaker, CircuitOpenError
+from users.ranking_cache import get_cached_ranking, invalidate_cohort, set_cached_ranking
+from users.tests.utils import COHORT_KEY, create_member
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch('users.circuit_breaker.time.monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(
+            'test-breaker', failure_rate=0.5, minimum_calls=4, window_seconds=10, open_seconds=30,
+        )
+
+    def fail(self):
+        with self.assertRaises(ConnectionError):
+            self.breaker.call(mock.Mock(side_effect=ConnectionError()))
+
+    def open_breaker(self):
+        self.breaker.call(lambda: 'ok')
+        self.breaker.call(lambda: 'ok')
+        self.fail()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)  # 최소 호출 수 미만
+        self.fail()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)    # 4건 중 2건 실패
+
+    def test_opens_at_failure_rate_and_rejects_calls(self):
+        self.open_breaker()
+        func = mock.Mock()
+        before = metrics.get_counter('test-breaker.breaker.rejected')
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.call(func)
+        func.assert_not_called()
+        self.assertEqual(metrics.get_counter('test-breaker.breaker.rejected') - before, 1)
+
+    def test_old_failures_leave_the_window(self):
+        self.fail()
+        self.fail()
+        self.clock.now += 11
+        self.breaker.call(lambda: 'ok')
+        self.breaker.call(lambda: 'ok')
+        self.fail()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_success_closes(self):
+        self.open_breaker()
+        self.clock.now += 30
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+
+        self.assertTrue(self.breaker.allow_request())
+        # 시험 호출은 half_open_max_calls(1)건만
+        self.assertFalse(self.breaker.allow_request())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.breaker.call(lambda: 'ok'), 'ok')
+
+    def test_half_open_failure_reopens(self):
+        self.open_breaker()
+        self.clock.now += 30
+        self.fail()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.clock.now += 29
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+
+@override_settings(MATCHING_RANKER='remote', MATCHING_LOCAL_FALLBACK=True)
+class StaleFeedTests(TestCase):
+    def setUp(self):
+        rnd = random.Random(6)
+        self.users = [create_member(i, rnd) for i in range(8)]
+        self.me = self.users[0]
+        refresh = mock.patch('users.views.matching_views.schedule_ranking_refresh')
+        self.schedule_refresh = refresh.start()
+        self.addCleanup(refresh.stop)
+
+    def get_feed(self, error):
+        with mock.patch('users.views.matching_views.request_ai_ranking', side_effect=error):
+            return self.client.get(reverse('matching-feed'), headers={'X-User-ID': str(self.me.id)})
+
+    def test_serves_last_known_ranking_as_stale(self):
+        last_known = [u.id for u in reversed(self.users[1:])]
+        set_cached_ranking(self.me.id, COHORT_KEY, last_known, {user_id: 70.0 for user_id in last_known})
+        # 요청 단위 캐시만 만료되고 마지막 정상 랭킹은 남아 있는 상태
+        invalidate_cohort(COHORT_KEY)
+
+        with self.assertLogs('users.views.matching_views', 'WARNING'):
+            response = self.get_feed(requests.exceptions.Timeout())
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertTrue(body['stale'])
+        self.assertEqual([row['user_id'] for row in body['results']], last_known[:5])
+        self.schedule_refresh.assert_called_once_with(self.me.id, mock.ANY)
+        # 대체 랭킹은 요청 단위 캐시에 넣지 않음
+        self.assertIsNone(get_cached_ranking(self.me.id, COHORT_KEY))
+
+    def test_falls_back_to_local_ranking_when_circuit_is_open(self):
+        before = metrics.get_counter('matching.feed.stale_served')
+        response = self.get_feed(CircuitOpenError())
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertTrue(body['stale'])
+        self.assertEqual(len(body['results']), 5)
+        self.assertEqual(metrics.get_counter('matching.feed.stale_served') - before, 1)
+
+    @override_settings(MATCHING_LOCAL_FALLBACK=False)
+    def test_error_without_fallback(self):
+        with self.assertLogs('users.views.matching_views', 'WARNING'):
+            response = self.get_feed(requests.exceptions.ConnectionError())
+        self.assertEqual(response.status_code, 502)
+        self.schedule_refresh.assert_not_called()
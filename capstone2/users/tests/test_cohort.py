@@ -0,0 +1,91 @@
+import random
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from users.cohort import get_cohort_candidate_profiles
+from users.models import DormInfo, Profile, User
+from users.tests.utils import COHORT_KEY, PROFILE_CHOICES, create_member
+
+
+class CohortKeyTests(TestCase):
+    def setUp(self):
+        self.rnd = random.Random(7)
+
+    def cohort_key_of(self, user):
+        return DormInfo.objects.get(user=user).cohort_key
+
+    def create_dorm_info(self, user, **fields):
+        return DormInfo.objects.create(**{
+            'user': user, 'name': '이름', 'student_id': str(30000000 + user.id), 'sex': 'MALE',
+            'building': 'MYEONGDEOK', 'room': 'DOUBLE', 'residency_period': 'SEMESTER', 'is_accepted': 'ACCEPTED',
+            **fields,
+        })
+
+    def create_profile(self, user):
+        return Profile.objects.create(user=user, **{name: self.rnd.choice(values) for name, values in PROFILE_CHOICES.items()})
+
+    def test_member_gets_cohort_key(self):
+        user = create_member(0, self.rnd)
+        self.assertEqual(self.cohort_key_of(user), COHORT_KEY)
+
+    def test_cohort_key_follows_dorm_info_changes(self):
+        user = create_member(0, self.rnd)
+        dorm_info = DormInfo.objects.get(user=user)
+        dorm_info.room = 'QUAD'
+        dorm_info.residency_period = 'SIXMONTHS'
+        dorm_info.save()
+        self.assertEqual(self.cohort_key_of(user), 'MALE:MYEONGDEOK:QUAD:SIXMONTHS')
+
+    def test_not_accepted_user_has_no_cohort_key(self):
+        user = User.objects.create_user(nickname='rejected', password=None)
+        self.create_dorm_info(user, is_accepted='NOT_ACCEPTED')
+        self.create_profile(user)
+        self.assertIsNone(self.cohort_key_of(user))
+
+        dorm_info = DormInfo.objects.get(user=user)
+        dorm_info.is_accepted = 'ACCEPTED'
+        dorm_info.save()
+        self.assertEqual(self.cohort_key_of(user), COHORT_KEY)
+
+    def test_cohort_key_waits_for_profile(self):
+        user = User.objects.create_user(nickname='no-profile', password=None)
+        self.create_dorm_info(user)
+        self.assertIsNone(self.cohort_key_of(user))
+
+        profile = self.create_profile(user)
+        self.assertEqual(self.cohort_key_of(user), COHORT_KEY)
+
+        profile.delete()
+        self.assertIsNone(self.cohort_key_of(user))
+
+    def test_candidates_are_only_feed_members(self):
+        members = [create_member(i, self.rnd) for i in range(3)]
+        no_profile = User.objects.create_user(nickname='no-profile', password=None)
+        self.create_dorm_info(no_profile)
+        rejected = User.objects.create_user(nickname='rejected', password=None)
+        self.create_dorm_info(rejected, is_accepted='NOT_ACCEPTED')
+        self.create_profile(rejected)
+
+        candidate_ids = {p.user_id for p in get_cohort_candidate_profiles(COHORT_KEY, exclude_user_id=members[0].id)}
+        self.assertEqual(candidate_ids, {members[1].id, members[2].id})
+
+    def test_rebuild_cohort_index(self):
+        members = [create_member(i, self.rnd) for i in range(3)]
+        rejected = User.objects.create_user(nickname='rejected', password=None)
+        self.create_dorm_info(rejected, is_accepted='NOT_ACCEPTED')
+        self.create_profile(rejected)
+        # 컬럼 추가 직후처럼 인덱스가 비었거나 틀린 상태
+        DormInfo.objects.update(cohort_key=None)
+        DormInfo.objects.filter(user=rejected).update(cohort_key=COHORT_KEY)
+
+        out = StringIO()
+        call_command('rebuild_cohort_index', stdout=out)
+        self.assertIn('4건', out.getvalue())
+        self.assertEqual([self.cohort_key_of(user) for user in members], [COHORT_KEY] * 3)
+        self.assertIsNone(self.cohort_key_of(rejected))
+
+        out = StringIO()
+        call_command('rebuild_cohort_index', stdout=out)
+        self.assertIn('0건', out.getvalue())
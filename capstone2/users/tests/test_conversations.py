@@ -0,0 +1,133 @@
+import io
+import time
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from users import conversations
+from users.conversations import get_conversation, record_message
+from users.models import Conversation, Message, UnreadCounter
+from users.tests.utils import create_users
+
+
+class ConversationSummaryTests(TestCase):
+    def setUp(self):
+        self.a, self.b, self.c = create_users(3)
+        self.client = APIClient()
+
+    def send(self, sender, recipient, content):
+        response = self.client.post(
+            reverse('message-send'), {'recipient': recipient.id, 'content': content}, HTTP_X_USER_ID=str(sender.id)
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        return Message.objects.get(pk=response.data['id'])
+
+    def test_one_conversation_per_pair(self):
+        self.send(self.a, self.b, "안녕")
+        self.send(self.b, self.a, "반가워")
+        last = self.send(self.a, self.b, "룸메 구해요?")
+        self.send(self.c, self.a, "저도요")
+
+        self.assertEqual(Conversation.objects.count(), 2)
+        conversation = get_conversation(self.b.id, self.a.id)
+        self.assertEqual((conversation.user_low_id, conversation.user_high_id), (self.a.id, self.b.id))
+        self.assertEqual(conversation.last_message_id, last.id)
+        self.assertEqual(conversation.last_timestamp, last.timestamp)
+        # 받는 사람 쪽 안 읽은 수만 증가
+        self.assertEqual(conversation.unread_count_for(self.b.id), 2)
+        self.assertEqual(conversation.unread_count_for(self.a.id), 1)
+
+    def test_older_message_does_not_replace_last_message(self):
+        newer = self.send(self.a, self.b, "나중")
+        older = Message.objects.create(sender=self.b, recipient=self.a, content="먼저")
+        Message.objects.filter(pk=older.pk).update(id=newer.id - 1000)
+        older = Message.objects.get(content="먼저")
+
+        with transaction.atomic():
+            record_message(older)
+        conversation = get_conversation(self.a.id, self.b.id)
+        self.assertEqual(conversation.last_message_id, newer.id)
+        self.assertEqual(conversation.unread_count_for(self.a.id), 1)
+
+    def test_inbox_lists_conversations(self):
+        self.send(self.a, self.b, "첫 쪽지")
+        self.send(self.c, self.a, "두번째 쪽지")
+
+        response = self.client.get(reverse('message-list'), HTTP_X_USER_ID=str(self.a.id))
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual([item['opponent_id'] for item in results], [self.c.id, self.b.id])
+        self.assertEqual(results[0]['opponent_nickname'], self.c.nickname)
+        self.assertEqual(results[0]['last_message'], "두번째 쪽지")
+        self.assertEqual(results[0]['unread_count'], 1)
+        self.assertFalse(results[0]['is_read'])
+        self.assertEqual(results[1]['unread_count'], 0)
+
+    def test_backfill_builds_conversations_from_messages(self):
+        for content in ("하나", "둘"):
+            Message.objects.create(sender=self.a, recipient=self.b, content=content)
+        last = Message.objects.create(sender=self.b, recipient=self.a, content="셋")
+
+        call_command('backfill_conversations', stdout=io.StringIO())
+        conversation = get_conversation(self.a.id, self.b.id)
+        self.assertEqual(conversation.last_message_id, last.id)
+        self.assertEqual(conversation.unread_count_for(self.b.id), 2)
+        self.assertEqual(conversation.unread_count_for(self.a.id), 1)
+
+    @override_settings(MESSAGE_READ_DEBOUNCE_SECONDS=0)
+    def test_backfill_twice_after_read_keeps_cursor(self):
+        for content in ("하나", "둘"):
+            self.send(self.a, self.b, content)
+        self.send(self.c, self.b, "다른 대화방")
+        # b가 a와의 대화방을 읽음 (쪽지별 is_read는 쓰지 않고 cursor만 올라감)
+        response = self.client.get(reverse('conversation-detail', args=[self.a.id]), HTTP_X_USER_ID=str(self.b.id))
+        self.assertEqual(response.status_code, 200)
+        self.send(self.a, self.b, "읽은 뒤에 보낸 쪽지")
+
+        before = get_conversation(self.a.id, self.b.id)
+        self.assertEqual(before.unread_count_for(self.b.id), 1)
+        for _ in range(2):
+            call_command('backfill_conversations', stdout=io.StringIO())
+
+        conversation = get_conversation(self.a.id, self.b.id)
+        self.assertEqual(conversation.last_read_message_id_for(self.b.id), before.last_read_message_id_for(self.b.id))
+        self.assertEqual(conversation.unread_count_for(self.b.id), 1)
+        self.assertEqual(UnreadCounter.objects.get(user=self.b).unread_count, 2)
+        out = io.StringIO()
+        call_command('reconcile_unread_counters', '--recount-conversations', '--dry-run', stdout=out)
+        self.assertIn("대화방별 안 읽은 수 불일치: 0건", out.getvalue())
+        self.assertIn("전체 안 읽은 수 불일치: 0건", out.getvalue())
+
+
+class ReadCursorBufferTests(TestCase):
+    def setUp(self):
+        advance = mock.patch.object(conversations, '_advance_read_cursor', return_value=False)
+        self.advance = advance.start()
+        self.addCleanup(advance.stop)
+
+    def test_repeated_reads_are_coalesced_and_flushed(self):
+        buffer = conversations.ReadCursorBuffer(window=60)
+        self.assertTrue(buffer.mark(1, 'low', 10, 20, 100))
+        self.assertFalse(buffer.mark(1, 'low', 10, 20, 101))
+        self.assertFalse(buffer.mark(1, 'low', 10, 20, 102))
+        self.assertEqual(self.advance.call_count, 1)
+        self.assertEqual(buffer.pending_count(), 1)
+
+        # 종료 시 대기 중인 마지막 읽음만 기록
+        self.assertEqual(buffer.flush_all(), 1)
+        self.advance.assert_called_with(1, 'low', 10, 102)
+        self.assertEqual(buffer.pending_count(), 0)
+
+    def test_expired_write_times_are_pruned(self):
+        buffer = conversations.ReadCursorBuffer(window=0.05)
+        for conversation_id in range(100):
+            buffer.mark(conversation_id, 'low', 10, 20, 100)
+        self.assertEqual(len(buffer._last_written), 100)
+
+        time.sleep(0.06)
+        buffer.mark(1000, 'low', 10, 20, 100)
+        self.assertEqual(list(buffer._last_written), [(1000, 'low')])
@@ -0,0 +1,75 @@
+import random
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from users import ranking_cache
+from users.models import Profile
+from users.tests.utils import COHORT_KEY, PROFILE_CHOICES, create_member
+from users.views.matching_views import MatchingFeedView
+
+
+@override_settings(MATCHING_RANKER='local')
+class FeedSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        rnd = random.Random(0)
+        self.users = [create_member(i, rnd) for i in range(13)]
+        self.me = self.users[0]
+        self.url = reverse('matching-feed')
+
+    def get_feed(self, user, **params):
+        response = self.client.get(self.url, params, headers={'X-User-ID': str(user.id)})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def result_ids(self, body):
+        return [row['user_id'] for row in body['results']]
+
+    def count_rankings(self):
+        return mock.patch.object(MatchingFeedView, 'get_ranking', autospec=True, side_effect=MatchingFeedView.get_ranking)
+
+    def test_page_two_uses_snapshot_from_other_worker(self):
+        first = self.get_feed(self.me)
+        snapshot = ranking_cache.get_feed_snapshot(first['cursor'], self.me.id)
+        self.assertEqual(self.result_ids(first), snapshot['ordered_ids'][:MatchingFeedView.ITEMS_PER_PAGE])
+
+        # 첫 페이지 이후 코호트가 바뀌어도(프로필 변경 + 무효화) 같은 cursor면 순서가 그대로
+        for user in self.users[1:]:
+            Profile.objects.filter(user=user).update(**{name: values[0] for name, values in PROFILE_CHOICES.items()})
+        ranking_cache.invalidate_cohort(COHORT_KEY)
+
+        other_worker_cache = caches.create_connection('default')
+        with mock.patch.object(ranking_cache, 'cache', other_worker_cache), self.count_rankings() as get_ranking:
+            second = self.get_feed(self.me, page=2, cursor=first['cursor'])
+
+        get_ranking.assert_not_called()
+        self.assertEqual(second['cursor'], first['cursor'])
+        self.assertEqual(self.result_ids(second), snapshot['ordered_ids'][5:10])
+        self.assertTrue(second['has_next'])
+
+    def test_expired_cursor_reranks_with_new_cursor(self):
+        first = self.get_feed(self.me)
+        cache.delete(f"{ranking_cache.FEED_SNAPSHOT_KEY_PREFIX}:{first['cursor']}")
+
+        with self.count_rankings() as get_ranking:
+            second = self.get_feed(self.me, page=2, cursor=first['cursor'])
+
+        get_ranking.assert_called_once()
+        self.assertNotEqual(second['cursor'], first['cursor'])
+        self.assertEqual(len(second['results']), MatchingFeedView.ITEMS_PER_PAGE)
+
+    def test_other_users_cursor_is_ignored(self):
+        first = self.get_feed(self.me)
+        other = self.users[1]
+
+        self.assertIsNone(ranking_cache.get_feed_snapshot(first['cursor'], other.id))
+        with self.count_rankings() as get_ranking:
+            body = self.get_feed(other, cursor=first['cursor'])
+
+        get_ranking.assert_called_once()
+        self.assertNotEqual(body['cursor'], first['cursor'])
+        self.assertNotIn(other.id, self.result_ids(body))
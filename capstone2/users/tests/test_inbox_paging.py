@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.conversations import encode_cursor, get_user_pair
+from users.models import Conversation, Message
+from users.tests.utils import create_users
+from users.views import ConversationListView
+
+
+class ConversationListPagingTests(TestCase):
+    def setUp(self):
+        users = create_users(8)
+        # 대화방마다 me의 자리(low/high)가 섞이도록 중간 id의 사용자를 me로 사용
+        self.me, self.others = users[3], users[:3] + users[4:]
+        self.client = APIClient()
+        base = timezone.now() - timedelta(days=1)
+        # 앞의 4개 대화방은 마지막 쪽지 시각이 같음 -> id 순으로 정렬되어야 함
+        self.timestamps = [base] * 4 + [base - timedelta(minutes=i) for i in range(1, len(self.others) - 3)]
+        for other, timestamp in zip(self.others, self.timestamps):
+            message = Message.objects.create(sender=other, recipient=self.me, content=f"{other.nickname}의 쪽지")
+            low_id, high_id = get_user_pair(self.me.id, other.id)
+            Conversation.objects.create(
+                user_low_id=low_id, user_high_id=high_id, last_message=message, last_timestamp=timestamp,
+            )
+
+    def get_page(self, user=None, **params):
+        return self.client.get(reverse('message-list'), params, HTTP_X_USER_ID=str((user or self.me).id))
+
+    def expected_order(self):
+        return list(
+            Conversation.objects.order_by('-last_timestamp', '-id').values_list('last_message_id', flat=True)
+        )
+
+    def test_pages_follow_stable_order_on_equal_timestamps(self):
+        seen, cursor = [], None
+        while True:
+            response = self.get_page(limit=3, **({'before': cursor} if cursor else {}))
+            self.assertEqual(response.status_code, 200)
+            seen.extend(row['id'] for row in response.data['results'])
+            if not response.data['has_more']:
+                self.assertIsNone(response.data['next'])
+                break
+            self.assertEqual(len(response.data['results']), 3)
+            cursor = response.data['next']
+
+        self.assertEqual(seen, self.expected_order())
+
+    def test_cursor_between_equal_timestamps(self):
+        tied = Conversation.objects.filter(last_timestamp=self.timestamps[0]).order_by('-id')
+        second = tied[1]
+        response = self.get_page(before=encode_cursor(second.last_timestamp, second.id), limit=50)
+        expected = self.expected_order()
+        self.assertEqual([row['id'] for row in response.data['results']], expected[2:])
+
+    def test_invalid_cursor(self):
+        for cursor in ('not-a-cursor', encode_cursor(timezone.now(), 1)[:-3] + '!!!', 'MjAyNHxhYmM'):
+            response = self.get_page(before=cursor)
+            self.assertEqual(response.status_code, 400, cursor)
+
+    def test_page_size_is_clamped(self):
+        response = self.get_page(limit=0)
+        self.assertEqual(len(response.data['results']), 1)
+
+        response = self.get_page(limit='many')
+        self.assertEqual(len(response.data['results']), min(ConversationListView.PAGE_SIZE, len(self.others)))
+
+        Conversation.objects.bulk_create([
+            Conversation(user_low=self.me, user_high=user, last_timestamp=self.timestamps[-1] - timedelta(hours=1))
+            for user in create_users(ConversationListView.MAX_PAGE_SIZE, prefix='extra')
+        ])
+        response = self.get_page(limit=1000)
+        self.assertEqual(len(response.data['results']), ConversationListView.MAX_PAGE_SIZE)
+        self.assertTrue(response.data['has_more'])
+
+    def test_requires_user(self):
+        response = self.client.get(reverse('message-list'))
+        self.assertEqual(response.status_code, 401)
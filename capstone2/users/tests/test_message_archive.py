@@ -0,0 +1,117 @@
+import io
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users import conversations
+from users.conversations import ReadCursorBuffer, encode_cursor, get_conversation
+from users.message_archive import pack_chunk, unpack_chunk
+from users.models import Message, MessageArchiveChunk
+from users.tests.utils import create_users
+
+
+class MessageArchiveTests(TestCase):
+    def setUp(self):
+        self.a, self.b, self.c = create_users(3)
+        self.client = APIClient()
+        # 대화방을 연속으로 조회하므로 읽음 cursor를 타이머 없이 바로 씀 (테스트 DB가 사라진 뒤 flush되지 않게)
+        buffer = mock.patch.object(conversations, '_read_cursor_buffer', ReadCursorBuffer(window=0))
+        buffer.start()
+        self.addCleanup(buffer.stop)
+        now = timezone.now()
+        self.base = now - timedelta(days=200)
+
+        # a <-> b: 오래된 쪽지 7건(3, 4번은 같은 시각) + 최근 쪽지 3건
+        old_times = [self.base + timedelta(minutes=i) for i in (0, 1, 2, 3, 3, 4, 5)]
+        new_times = [now - timedelta(minutes=i) for i in (3, 2, 1)]
+        self.pair_ids = [
+            self.send(sender, recipient, f"쪽지 {i}", timestamp)
+            for i, (timestamp, (sender, recipient)) in enumerate(
+                zip(old_times + new_times, [(self.a, self.b), (self.b, self.a)] * 5)
+            )
+        ]
+        # a <-> c: 모든 쪽지가 오래됨
+        self.old_only_ids = [
+            self.send(self.c, self.a, f"오래된 쪽지 {i}", self.base + timedelta(minutes=i)) for i in range(3)
+        ]
+
+    def send(self, sender, recipient, content, timestamp):
+        response = self.client.post(
+            reverse('message-send'), {'recipient': recipient.id, 'content': content}, HTTP_X_USER_ID=str(sender.id)
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        Message.objects.filter(pk=response.data['id']).update(timestamp=timestamp)
+        return response.data['id']
+
+    def archive(self, chunk_size=2):
+        out = io.StringIO()
+        call_command('archive_messages', '--days', '180', '--chunk-size', str(chunk_size), stdout=out)
+        return out.getvalue()
+
+    def get_page(self, opponent, **params):
+        response = self.client.get(
+            reverse('conversation-detail', args=[opponent.id]), params, HTTP_X_USER_ID=str(self.a.id)
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_pack_round_trip(self):
+        rows = [(1, 2, self.base, "안녕"), (3, 4, self.base + timedelta(seconds=1), "")]
+        self.assertEqual(unpack_chunk(pack_chunk(rows)), rows)
+
+    def test_keeps_last_message_of_each_conversation(self):
+        self.assertIn("쪽지 9건", self.archive())
+
+        # a <-> b: 오래된 7건만 보관, 최근 쪽지(마지막 쪽지 포함)는 그대로
+        conversation = get_conversation(self.a.id, self.b.id)
+        self.assertEqual(list(Message.objects.filter(pk__in=self.pair_ids).values_list('id', flat=True).order_by('id')), self.pair_ids[7:])
+        self.assertEqual(conversation.last_message_id, self.pair_ids[-1])
+        self.assertEqual(conversation.archived_until_message_id, self.pair_ids[6])
+        self.assertEqual([c.message_count for c in conversation.archive_chunks.order_by('first_timestamp')], [2, 2, 2, 1])
+
+        # a <-> c: 모두 오래되었어도 마지막 쪽지는 남아 쪽지 리스트에 표시됨
+        conversation = get_conversation(self.a.id, self.c.id)
+        self.assertEqual(conversation.last_message_id, self.old_only_ids[-1])
+        self.assertTrue(Message.objects.filter(pk=self.old_only_ids[-1]).exists())
+        self.assertFalse(Message.objects.filter(pk__in=self.old_only_ids[:-1]).exists())
+        inbox = self.client.get(reverse('message-list'), HTTP_X_USER_ID=str(self.a.id)).data['results']
+        self.assertIn(("오래된 쪽지 2", self.old_only_ids[-1]), [(row['last_message'], row['id']) for row in inbox])
+
+        # 다시 실행해도 더 옮길 쪽지가 없음
+        self.assertIn("쪽지 0건", self.archive())
+        self.assertEqual(MessageArchiveChunk.objects.count(), 5)
+
+    def test_scrolling_up_crosses_archive_boundary_in_order(self):
+        self.archive()
+        seen, params = [], {'limit': 3}
+        while True:
+            page = self.get_page(self.b, **params)
+            seen[:0] = [(row['id'], row['content']) for row in page['results']]
+            if not page['has_more']:
+                break
+            params = {'limit': 3, 'before': page['before']}
+
+        self.assertEqual(seen, [(message_id, f"쪽지 {i}") for i, message_id in enumerate(self.pair_ids)])
+
+    def test_after_cursor_reads_archive_then_messages(self):
+        self.archive()
+        seen, cursor = [], encode_cursor(self.base - timedelta(minutes=1), 0)
+        while True:
+            page = self.get_page(self.b, limit=4, after=cursor)
+            seen.extend(row['id'] for row in page['results'])
+            if not page['has_more']:
+                break
+            cursor = page['after']
+
+        self.assertEqual(seen, self.pair_ids)
+
+    def test_archived_messages_have_sender_and_recipient(self):
+        self.archive()
+        page = self.get_page(self.c, limit=10)
+        self.assertEqual([row['id'] for row in page['results']], self.old_only_ids)
+        self.assertEqual({row['sender'] for row in page['results']}, {self.c.id})
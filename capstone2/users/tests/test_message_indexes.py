@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.test import SimpleTestCase
+
+MANAGE_PY = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'manage.py')
+
+
+class MessageIndexCheckTests(SimpleTestCase):
+    def test_bench_check_passes_on_small_data(self):
+        # bench_message_queries --check를 작은 데이터로 실행해 인덱스 회귀를 테스트에서 잡음
+        # (런타임에 별도 DB 연결을 등록하므로 테스트 프로세스와 분리해서 실행)
+        with tempfile.TemporaryDirectory() as directory:
+            result = subprocess.run(
+                [
+                    sys.executable, MANAGE_PY, 'bench_message_queries', '--check',
+                    '--messages', '20000', '--users', '200', '--hot-pair-messages', '2000', '--repeat', '1',
+                    '--db-path', os.path.join(directory, 'bench.sqlite3'),
+                ],
+                capture_output=True, text=True, timeout=120,
+                env={**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings.test')},
+            )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('USING INDEX message_pair_timeline_idx', result.stdout)
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.conversations import encode_cursor
+from users.models import Message
+from users.tests.utils import create_users
+
+
+class ConversationPagingTests(TestCase):
+    LIMIT = 4
+
+    def setUp(self):
+        self.a, self.b, other = create_users(3)
+        self.client = APIClient()
+        self.base_time = timezone.now().replace(microsecond=0) - timedelta(hours=1)
+
+        # 5건씩 같은 시각: 페이지(4건) 경계가 동점 구간 안에 걸치도록
+        messages = []
+        for i in range(15):
+            sender, recipient = (self.a, self.b) if i % 3 else (self.b, self.a)
+            message = Message.objects.create(sender=sender, recipient=recipient, content=f"쪽지 {i}")
+            Message.objects.filter(pk=message.pk).update(timestamp=self.base_time + timedelta(seconds=i // 5))
+            messages.append(message)
+        # 다른 대화방의 쪽지는 섞이지 않아야 함
+        Message.objects.create(sender=self.a, recipient=other, content="다른 대화방")
+
+        self.expected = list(
+            Message.objects.filter(pk__in=[m.pk for m in messages]).order_by('timestamp', 'id').values_list('id', flat=True)
+        )
+
+    def get_page(self, **params):
+        response = self.client.get(
+            reverse('conversation-detail', args=[self.b.id]), {'limit': self.LIMIT, **params}, HTTP_X_USER_ID=str(self.a.id)
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(response.data['results']), self.LIMIT)
+        return response.data
+
+    def test_before_cursor_walks_back_without_gaps(self):
+        page = self.get_page()
+        pages = [[m['id'] for m in page['results']]]
+        while page['has_more']:
+            page = self.get_page(before=page['before'])
+            pages.append([m['id'] for m in page['results']])
+
+        ids = [message_id for ids in reversed(pages) for message_id in ids]
+        self.assertEqual(ids, self.expected)
+
+    def test_after_cursor_walks_forward_without_gaps(self):
+        page = self.get_page(after=encode_cursor(self.base_time - timedelta(seconds=1), 0))
+        ids = [m['id'] for m in page['results']]
+        while page['has_more']:
+            page = self.get_page(after=page['after'])
+            ids.extend(m['id'] for m in page['results'])
+
+        self.assertEqual(ids, self.expected)
+        # 마지막 cursor 이후에는 새 쪽지가 없음
+        self.assertEqual(self.get_page(after=page['after'])['results'], [])
+
+    def test_invalid_cursor(self):
+        url = reverse('conversation-detail', args=[self.b.id])
+        response = self.client.get(url, {'before': '!!!'}, HTTP_X_USER_ID=str(self.a.id))
+        self.assertEqual(response.status_code, 400)
+
+        cursor = encode_cursor(self.base_time, 1)
+        response = self.client.get(url, {'before': cursor, 'after': cursor}, HTTP_X_USER_ID=str(self.a.id))
+        self.assertEqual(response.status_code, 400)
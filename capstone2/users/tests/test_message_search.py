@@ -0,0 +1,52 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from users import message_search
+from users.models import Message
+from users.tests.utils import create_users
+
+
+class MessageSearchTests(TestCase):
+    def setUp(self):
+        self.a, self.b, self.c, self.d = create_users(4)
+        self.mine = [
+            Message.objects.create(sender=self.a, recipient=self.b, content="세탁기 고장났어요"),
+            Message.objects.create(sender=self.b, recipient=self.a, content="세탁기 예약은 몇 시?"),
+        ]
+        Message.objects.create(sender=self.c, recipient=self.d, content="세탁기 같이 쓸래요?")
+        Message.objects.create(sender=self.a, recipient=self.c, content="청소 당번 정해요")
+
+    def search(self, user, query):
+        messages, _ = message_search.search_messages(user.id, query, 20)
+        return {message.id for message in messages}
+
+    def test_fts_returns_only_my_conversations(self):
+        self.assertTrue(message_search.fts_available())
+        with mock.patch.object(message_search, '_search_fallback') as fallback:
+            self.assertEqual(self.search(self.a, "세탁기"), {m.id for m in self.mine})
+        fallback.assert_not_called()
+        self.assertEqual(len(self.search(self.d, "세탁기")), 1)
+
+    def test_fallback_returns_only_my_conversations(self):
+        # trigram 색인으로 찾을 수 없는 짧은 검색어
+        self.assertEqual(self.search(self.a, "세탁"), {m.id for m in self.mine})
+        with mock.patch.object(message_search, 'fts_available', return_value=False):
+            self.assertEqual(self.search(self.a, "세탁기"), {m.id for m in self.mine})
+            self.assertEqual(self.search(self.b, "청소"), set())
+
+    def test_search_view(self):
+        response = APIClient().get(reverse('message-search'), {'q': '세탁기'}, HTTP_X_USER_ID=str(self.b.id))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({m['id'] for m in response.data['results']}, {m.id for m in self.mine})
+
+    def test_deleted_messages_leave_the_index(self):
+        self.mine[0].delete()
+        self.assertEqual(self.search(self.a, "세탁기"), {self.mine[1].id})
+
+    def test_query_syntax_is_escaped(self):
+        Message.objects.create(sender=self.a, recipient=self.b, content='"따옴표" AND 검색')
+        self.assertEqual(len(self.search(self.a, '"따옴표" AND')), 1)
+        self.assertEqual(self.search(self.a, 'OR NOT *'), set())
@@ -0,0 +1,127 @@
+import copy
+import os
+from unittest import mock
+
+from django.test import TestCase
+
+from users import metrics, ocr_cache, ocr_service
+from users.ocr_cache import OcrResultCache
+from users.tests.utils import FIXTURE_DIR, load_json
+
+
+class OcrResultCacheTests(TestCase):
+    """
+    OcrResultCache의 LRU 제거와 TTL 만료를 확인합니다. (time.monotonic을 고정값으로 바꿔 시간 경과를 흉내냄)
+    """
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch.object(ocr_cache.time, 'monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_lru_eviction(self):
+        cache = OcrResultCache(max_entries=2, ttl=60)
+        cache.set('a', {'n': 1})
+        cache.set('b', {'n': 2})
+        # a를 최근에 사용했으므로 c를 넣으면 b가 제거됨
+        self.assertEqual(cache.get('a'), {'n': 1})
+        cache.set('c', {'n': 3})
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), {'n': 1})
+        self.assertEqual(cache.get('c'), {'n': 3})
+
+    def test_set_existing_key_refreshes_order(self):
+        cache = OcrResultCache(max_entries=2, ttl=60)
+        cache.set('a', {'n': 1})
+        cache.set('b', {'n': 2})
+        cache.set('a', {'n': 10})
+        cache.set('c', {'n': 3})
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), {'n': 10})
+
+    def test_ttl_expiry(self):
+        cache = OcrResultCache(max_entries=10, ttl=60)
+        cache.set('a', {'n': 1})
+
+        self.now += 59
+        self.assertEqual(cache.get('a'), {'n': 1})
+        self.now += 1
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_zero_size_disables_cache(self):
+        cache = OcrResultCache(max_entries=0, ttl=60)
+        cache.set('a', {'n': 1})
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_returns_copy(self):
+        cache = OcrResultCache(max_entries=10, ttl=60)
+        result = {'rows': [{'학번': '20231234'}]}
+        cache.set('a', result)
+        result['rows'][0]['학번'] = 'changed'
+        cache.get('a')['rows'].clear()
+
+        self.assertEqual(cache.get('a'), {'rows': [{'학번': '20231234'}]})
+
+
+class CallClovaOcrCacheTests(TestCase):
+    """
+    call_clova_ocr가 같은 이미지의 성공한 파싱 결과만 재사용하고 ocr.cache.hit/miss를 기록하는지 확인합니다.
+    """
+
+    def setUp(self):
+        path = os.path.join(FIXTURE_DIR, 'ocr_screenshots', 'portal_desktop_1920x1080.png')
+        with open(path, 'rb') as f:
+            self.image_bytes = f.read()
+        self.response = load_json(path[:-len('.png')] + '.json')
+
+        cache = OcrResultCache(max_entries=10, ttl=60)
+        patcher = mock.patch.object(ocr_service, 'ocr_result_cache', cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.hits = metrics.get_counter('ocr.cache.hit')
+        self.misses = metrics.get_counter('ocr.cache.miss')
+
+    def call(self, response):
+        with mock.patch.object(ocr_service, '_request_clova_ocr', return_value=copy.deepcopy(response)) as request:
+            result = ocr_service.call_clova_ocr(self.image_bytes, preprocess=False, use_cache=True)
+        return result, request.call_count
+
+    def assert_counters(self, hits, misses):
+        self.assertEqual(metrics.get_counter('ocr.cache.hit') - self.hits, hits)
+        self.assertEqual(metrics.get_counter('ocr.cache.miss') - self.misses, misses)
+
+    def test_hit_after_success(self):
+        first, first_calls = self.call(self.response)
+        second, second_calls = self.call(self.response)
+
+        self.assertTrue(first['success'], first)
+        self.assertEqual(second, first)
+        self.assertEqual((first_calls, second_calls), (1, 0))
+        self.assert_counters(hits=1, misses=1)
+        self.assertEqual(len(ocr_service.ocr_result_cache), 1)
+
+    def test_failed_parse_is_not_cached(self):
+        failed = {'images': [{'inferResult': 'FAILURE'}]}
+        first, first_calls = self.call(failed)
+        self.assertFalse(first['success'])
+        self.assertEqual(len(ocr_service.ocr_result_cache), 0)
+
+        # 다시 시도하면 Clova를 다시 호출
+        second, second_calls = self.call(self.response)
+        self.assertTrue(second['success'], second)
+        self.assertEqual((first_calls, second_calls), (1, 1))
+        self.assert_counters(hits=0, misses=2)
+
+    def test_use_cache_false_skips_cache(self):
+        self.call(self.response)
+        with mock.patch.object(ocr_service, '_request_clova_ocr', return_value=copy.deepcopy(self.response)) as request:
+            ocr_service.call_clova_ocr(self.image_bytes, preprocess=False, use_cache=False)
+
+        request.assert_called_once()
+        self.assert_counters(hits=0, misses=1)
@@ -0,0 +1,102 @@
+import io
+from datetime import timedelta
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from users import ocr_jobs
+from users.models import DormVerificationJob
+
+
+OCR_DATA = {
+    "이름": "홍길동", "학번": "60241234", "합격여부": "25-1학기 선발 (학기)",
+    "성별": "남자", "지원건물": "명덕관", "지원호실구분": "2인실",
+}
+
+def make_upload(name='capture.png'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (40, 30), 'white').save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+@override_settings(DORM_OCR_JOB_BACKEND='users.ocr_jobs.EagerOcrJobQueue')
+class DormVerificationJobTests(TestCase):
+    Status = DormVerificationJob.StatusChoices
+
+    def setUp(self):
+        ocr_jobs._queue = None
+        self.addCleanup(setattr, ocr_jobs, '_queue', None)
+        self.client = APIClient()
+
+    def submit(self, ocr_result):
+        with mock.patch.object(ocr_jobs, 'call_clova_ocr', return_value=ocr_result) as ocr:
+            response = self.client.post(reverse('verify-dorm'), {'image': make_upload()}, format='multipart')
+        self.assertEqual(response.status_code, 202, response.data)
+        self.assertEqual(response['Retry-After'], '1')
+        ocr.assert_called_once()
+        return self.client.get(response.data['status_url']).data
+
+    def test_succeeded(self):
+        job = self.submit({"success": True, "data": OCR_DATA})
+        self.assertEqual(job['status'], self.Status.SUCCEEDED)
+        self.assertEqual(job['result']['student_id'], "60241234")
+        self.assertEqual(job['result']['building'], "MYEONGDEOK")
+        self.assertEqual(job['result']['residency_period'], "SEMESTER")
+        self.assertIsNone(job['errors'])
+        self.assertIsNotNone(job['run_ms'])
+
+    def test_failed_on_validation_error(self):
+        job = self.submit({"success": True, "data": {**OCR_DATA, "지원건물": "명현관"}})
+        self.assertEqual(job['status'], self.Status.FAILED)
+        self.assertEqual(job['errors'], {"image": ["남학생은 해당 건물에 배정될 수 없습니다."]})
+        self.assertIsNone(job['result'])
+
+    def test_failed_on_ocr_error(self):
+        job = self.submit({"success": False, "error": "timeout"})
+        self.assertEqual(job['status'], self.Status.FAILED)
+        self.assertIn("OCR API 실패", job['errors']['non_field_errors'][0])
+
+    def test_running_while_ocr_is_called(self):
+        job = DormVerificationJob.objects.create()
+        self.assertEqual(job.status, self.Status.PENDING)
+
+        def ocr(image_bytes):
+            self.assertEqual(DormVerificationJob.objects.get(pk=job.pk).status, self.Status.RUNNING)
+            raise RuntimeError("connection reset")
+
+        with mock.patch.object(ocr_jobs, 'call_clova_ocr', side_effect=ocr):
+            ocr_jobs.run_dorm_verification_job(job.pk, b'')
+        job.refresh_from_db()
+        self.assertEqual(job.status, self.Status.FAILED)
+        self.assertEqual(job.errors, {"detail": "인증 처리 중 오류가 발생했습니다."})
+
+    def test_pending_job_times_out(self):
+        job = DormVerificationJob.objects.create()
+        DormVerificationJob.objects.filter(pk=job.pk).update(created_at=timezone.now() - timedelta(minutes=5))
+
+        response = self.client.get(reverse('verify-dorm-job', args=[job.pk]))
+        self.assertEqual(response.data['status'], self.Status.FAILED)
+        self.assertNotIn('Retry-After', response)
+
+        # 제한 시간이 지난 뒤 늦게 실행된 작업은 결과를 덮어쓰지 않음
+        with mock.patch.object(ocr_jobs, 'call_clova_ocr') as ocr:
+            ocr_jobs.run_dorm_verification_job(job.pk, b'')
+        ocr.assert_not_called()
+
+    @override_settings(DORM_OCR_JOB_BACKEND='users.ocr_jobs.InProcessOcrJobQueue', DORM_OCR_QUEUE_SIZE=0)
+    def test_queue_full(self):
+        response = self.client.post(reverse('verify-dorm'), {'image': make_upload()}, format='multipart')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+        self.assertFalse(DormVerificationJob.objects.exists())
+
+    def test_not_an_image(self):
+        upload = SimpleUploadedFile('capture.png', b'not an image', content_type='image/png')
+        response = self.client.post(reverse('verify-dorm'), {'image': upload}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(DormVerificationJob.objects.exists())
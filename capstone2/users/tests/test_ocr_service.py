@@ -0,0 +1,242 @@
+import copy
+import glob
+import io
+import json
+import os
+from unittest import mock
+
+import requests
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from PIL import Image
+
+from users import ocr_service
+from users.tests.utils import FIXTURE_DIR, load_json
+
+def scale_response(response, scale, offset_x=0, offset_y=0):
+    """
+    원본 좌표의 응답을 전처리된 이미지에서 인식한 것처럼 바꿉니다. (Clova는 받은 이미지의 픽셀 좌표로 응답)
+    """
+    response = copy.deepcopy(response)
+    for image in response['images']:
+        for field in image['fields']:
+            for vertex in field['boundingPoly']['vertices']:
+                vertex['x'] = round((vertex['x'] - offset_x) * scale, 1)
+                vertex['y'] = round((vertex['y'] - offset_y) * scale, 1)
+    return response
+
+
+class OcrPreprocessTests(TestCase):
+    """
+    익명화된 포털 결과 화면(users/fixtures/ocr_screenshots: 한글은 가림 막대, 같은 배치의 Clova V2 응답)으로
+    전처리 후 좌표를 원본으로 되돌려 파싱한 결과가 전처리 없이 파싱한 결과와 같은지 확인합니다.
+    """
+
+    def setUp(self):
+        self.screenshots = sorted(glob.glob(os.path.join(FIXTURE_DIR, 'ocr_screenshots', '*.png')))
+        self.assertTrue(self.screenshots)
+
+    def load(self, path):
+        with open(path, 'rb') as f:
+            image_bytes = f.read()
+        response = load_json(path[:-len('.png')] + '.json')
+        expected = ocr_service.process_ocr_response_with_coords(copy.deepcopy(response))
+        self.assertTrue(expected['success'], expected)
+        return image_bytes, response, expected
+
+    def test_restored_coordinates_parse_the_same(self):
+        for path in self.screenshots:
+            image_bytes, response, expected = self.load(path)
+            for image_format in ('jpeg', 'png'):
+                for autocrop in (False, True):
+                    with self.subTest(path=os.path.basename(path), format=image_format, autocrop=autocrop), \
+                            mock.patch.object(ocr_service, 'OCR_PREPROCESS_FORMAT', image_format), \
+                            mock.patch.object(ocr_service, 'OCR_PREPROCESS_AUTOCROP', autocrop):
+                        preprocessed = ocr_service.preprocess_image(image_bytes)
+                        if preprocessed is None:
+                            continue  # 원본 그대로 전송
+                        self.assertLessEqual(Image.open(io.BytesIO(preprocessed.data)).width, ocr_service.OCR_PREPROCESS_MAX_WIDTH)
+
+                        recognized = scale_response(
+                            response, preprocessed.scale, preprocessed.offset_x, preprocessed.offset_y
+                        )
+                        restored = ocr_service._restore_coordinates(recognized, preprocessed)
+                        self.assertEqual(ocr_service.process_ocr_response_with_coords(restored), expected)
+
+    def test_png_output_is_smaller(self):
+        with mock.patch.object(ocr_service, 'OCR_PREPROCESS_FORMAT', 'png'):
+            for path in self.screenshots:
+                with open(path, 'rb') as f:
+                    image_bytes = f.read()
+                preprocessed = ocr_service.preprocess_image(image_bytes)
+                self.assertIsNotNone(preprocessed)
+                self.assertLess(preprocessed.bytes_after, preprocessed.bytes_before)
+
+    def test_call_clova_ocr_with_preprocessing(self):
+        for path in self.screenshots:
+            image_bytes, response, expected = self.load(path)
+            original_width = Image.open(io.BytesIO(image_bytes)).width
+
+            def fake_clova(image_file, file_name):
+                # 받은 이미지 크기에 맞춘 좌표로 응답
+                received_width = Image.open(image_file).width
+                return scale_response(response, received_width / original_width)
+
+            with self.subTest(path=os.path.basename(path)), \
+                    mock.patch.object(ocr_service, '_request_clova_ocr', side_effect=fake_clova) as request:
+                result = ocr_service.call_clova_ocr(image_bytes, preprocess=True, use_cache=False)
+                self.assertEqual(result, expected)
+                request.assert_called_once()
+
+
+class OcrParserTests(TestCase):
+    """
+    users/fixtures/ocr_responses: 포털 결과 화면 배치의 Clova V2 응답 (한 행 5건, 여러 행 3건, 익명화된 값)
+    ocr_responses_expected.json: 응답별 실제 행 값(rows)과, 한 행 응답에 대해 이전 파서(행 나누기 이전 버전)의 출력(legacy)
+    """
+
+    def setUp(self):
+        self.expected = load_json(os.path.join(FIXTURE_DIR, 'ocr_responses_expected.json'))
+        self.responses = {
+            os.path.basename(path)[:-len('.json')]: load_json(path)
+            for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, 'ocr_responses', '*.json')))
+        }
+        self.assertEqual(set(self.responses), set(self.expected))
+
+    def test_rows(self):
+        for name, response in self.responses.items():
+            with self.subTest(name=name):
+                result = ocr_service.process_ocr_response_with_coords(response)
+                self.assertTrue(result['success'], result)
+                self.assertEqual(result['rows'], self.expected[name]['rows'])
+                self.assertEqual(result['data'], result['rows'][0])
+
+    def test_single_row_matches_legacy_parser(self):
+        single_row = [name for name, expected in self.expected.items() if 'legacy' in expected]
+        self.assertTrue(single_row)
+        for name in single_row:
+            with self.subTest(name=name):
+                result = ocr_service.process_ocr_response_with_coords(self.responses[name])
+                legacy = self.expected[name]['legacy']
+                self.assertEqual({'success': result['success'], 'data': result['data']}, legacy)
+
+    def test_multi_row_keeps_wrapped_cells_in_their_row(self):
+        response = self.responses['multi_row_3_desktop_1920']
+        rows = ocr_service.process_ocr_response_with_coords(response)['rows']
+        self.assertEqual(len(rows), 3)
+        # 합격여부 칸은 두 줄(선발 + 학기)로 인식되며 각각 자기 행에 붙음
+        for row in rows:
+            self.assertRegex(row['합격여부'], r'^선발 \d{2}-\d학기')
+
+    def test_bench_command_loads_fixtures(self):
+        out = io.StringIO()
+        call_command('bench_ocr_parser', os.path.join(FIXTURE_DIR, 'ocr_responses'), '--repeat', '1', stdout=out)
+        self.assertIn("성공: 8건", out.getvalue())
+        self.assertIn("{1: 5, 2: 2, 3: 1}", out.getvalue())
+
+
+class ClovaOcrInputTests(TestCase):
+    """
+    call_clova_ocr의 입력 형태(bytes / 파일 객체 / 경로)별 multipart 전송 내용과, 앞부분 바이트로 형식을 판별하는지 확인합니다.
+    (requests.post를 대신해 전송 내용을 기록하고 픽스처 응답을 돌려줌)
+    """
+
+    def setUp(self):
+        self.path = os.path.join(FIXTURE_DIR, 'ocr_screenshots', 'portal_desktop_1920x1080.png')
+        with open(self.path, 'rb') as f:
+            self.image_bytes = f.read()
+        self.response = load_json(self.path[:-len('.png')] + '.json')
+        self.expected = ocr_service.process_ocr_response_with_coords(copy.deepcopy(self.response))
+        self.sent = []
+
+    def fake_post(self, url, headers, files, timeout):
+        file_name, image_file, mime_type = files['file']
+        message = json.loads(files['message'][1])
+        self.sent.append({
+            'name': file_name,
+            'data': image_file.read(),
+            'mime': mime_type,
+            'format': message['images'][0]['format'],
+        })
+        response = mock.Mock()
+        response.json.return_value = copy.deepcopy(self.response)
+        return response
+
+    def call(self, image):
+        with mock.patch.object(ocr_service.requests, 'post', side_effect=self.fake_post):
+            return ocr_service.call_clova_ocr(image, preprocess=False, use_cache=False)
+
+    def assert_sent(self, name, data=None, file_format='png', mime_type='image/png'):
+        self.assertEqual(self.sent, [{
+            'name': name,
+            'data': self.image_bytes if data is None else data,
+            'mime': mime_type,
+            'format': file_format,
+        }])
+
+    def test_bytes(self):
+        for image in (self.image_bytes, bytearray(self.image_bytes), memoryview(self.image_bytes)):
+            with self.subTest(type=type(image).__name__):
+                self.sent = []
+                self.assertEqual(self.call(image), self.expected)
+                self.assert_sent('dorm_verification_image')
+
+    def test_file_object(self):
+        upload = SimpleUploadedFile('uploads/portal.png', self.image_bytes, content_type='image/png')
+        self.assertEqual(self.call(upload), self.expected)
+        self.assert_sent('portal.png')
+
+        # 이름이 없는 파일 객체
+        self.sent = []
+        self.assertEqual(self.call(io.BytesIO(self.image_bytes)), self.expected)
+        self.assert_sent('dorm_verification_image')
+
+    def test_path(self):
+        self.assertEqual(self.call(self.path), self.expected)
+        self.assert_sent('portal_desktop_1920x1080.png')
+
+    def test_missing_path(self):
+        path = os.path.join(FIXTURE_DIR, 'ocr_screenshots', 'missing.png')
+        result = self.call(path)
+        self.assertFalse(result['success'])
+        self.assertIn("파일을 찾을 수 없습니다", result['error'])
+        self.assertEqual(self.sent, [])
+
+    def test_format_from_magic_bytes_not_extension(self):
+        # 확장자가 .jpg여도 내용이 PNG면 PNG로 전송
+        upload = SimpleUploadedFile('portal.jpg', self.image_bytes, content_type='image/jpeg')
+        self.call(upload)
+        self.assert_sent('portal.jpg')
+
+        self.sent = []
+        pdf = b'%PDF-1.4\n' + b'\x00' * 16
+        self.call(SimpleUploadedFile('portal.png', pdf))
+        self.assert_sent('portal.png', data=pdf, file_format='pdf', mime_type='application/pdf')
+
+    def test_unsupported_format(self):
+        for data in (b'GIF89a' + b'\x00' * 16, b'', b'\x89PN'):
+            with self.subTest(data=data[:6]):
+                result = self.call(data)
+                self.assertEqual(result, {"success": False, "error": "지원하지 않는 이미지 형식입니다. (PNG, JPEG, PDF, TIFF)"})
+                self.assertEqual(self.sent, [])
+
+    def test_detect_image_format(self):
+        cases = [
+            (b'\x89PNG\r\n\x1a\n\x00\x00', ('png', 'image/png')),
+            (b'\xff\xd8\xff\xe0\x00\x10JFIF', ('jpg', 'image/jpeg')),
+            (b'%PDF-1.7', ('pdf', 'application/pdf')),
+            (b'II*\x00\x08\x00', ('tiff', 'image/tiff')),
+            (b'MM\x00*\x00\x00', ('tiff', 'image/tiff')),
+            (b'GIF89a', (None, None)),
+            (b'', (None, None)),
+        ]
+        for header, expected in cases:
+            with self.subTest(header=header):
+                self.assertEqual(ocr_service.detect_image_format(header), expected)
+
+    def test_request_error(self):
+        with mock.patch.object(ocr_service.requests, 'post', side_effect=requests.exceptions.Timeout('timed out')):
+            result = ocr_service.call_clova_ocr(self.image_bytes, preprocess=False, use_cache=False)
+        self.assertFalse(result['success'])
+        self.assertIn("API 요청 중 오류 발생", result['error'])
@@ -0,0 +1,259 @@
+import random
+from unittest import mock
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from users import prerank
+from users.models import DormInfo, MatchScore, Profile
+from users.tests.utils import COHORT_KEY, PROFILE_CHOICES, create_member
+
+
+@override_settings(MATCHING_RANKER='local')
+class RescoreProfileTests(TestCase):
+    TOP_K = 5
+
+    def setUp(self):
+        self.rnd = random.Random(0)
+        self.users = [create_member(i, self.rnd) for i in range(12)]
+        self.assertEqual(prerank.rank_cohort(COHORT_KEY, ranker='local', k=self.TOP_K), 12 * self.TOP_K)
+
+    def snapshot(self):
+        """
+        {타깃: [(순위, 후보, 점수), ...]}
+        """
+        rows = MatchScore.objects.filter(cohort_key=COHORT_KEY).order_by('user_id', 'rank')
+        ranking = {}
+        for row in rows:
+            ranking.setdefault(row.user_id, []).append((row.rank, row.candidate_id, row.percent))
+        return ranking
+
+    def assert_same_as_full_rank(self, incremental):
+        prerank.rank_cohort(COHORT_KEY, ranker='local', k=self.TOP_K)
+        full = self.snapshot()
+        self.assertEqual(set(incremental), set(full))
+
+        for target_id, expected in full.items():
+            actual = incremental[target_id]
+            # 순위는 1부터 빈틈없이, 점수는 전체 계산과 같은 순서
+            self.assertEqual([rank for rank, _, _ in actual], list(range(1, len(actual) + 1)))
+            self.assertEqual([percent for _, _, percent in actual], [percent for _, _, percent in expected])
+            # 동점 사이의 순서/경계(k번째)의 후보는 달라질 수 있으므로 후보별 점수만 비교
+            expected_percent = {candidate: percent for _, candidate, percent in expected}
+            for _, candidate, percent in actual:
+                if candidate in expected_percent:
+                    self.assertEqual(percent, expected_percent[candidate])
+            cutoff = expected[-1][2]
+            self.assertEqual(
+                {candidate for _, candidate, percent in actual if percent > cutoff},
+                {candidate for _, candidate, percent in expected if percent > cutoff},
+            )
+
+    def change_profile(self, user, **fields):
+        Profile.objects.filter(user=user).update(**fields)
+
+    def test_rescore_matches_full_rank(self):
+        for index in (0, 5, 11):
+            user = self.users[index]
+            self.change_profile(user, **{
+                name: self.rnd.choice(values) for name, values in PROFILE_CHOICES.items()
+            })
+            prerank.rescore_profile(user.id, k=self.TOP_K)
+            self.assert_same_as_full_rank(self.snapshot())
+
+    def test_rescore_after_every_field_change(self):
+        user = self.users[3]
+        for name, values in PROFILE_CHOICES.items():
+            current = getattr(Profile.objects.get(user=user), name)
+            self.change_profile(user, **{name: next(v for v in values if v != current)})
+            prerank.rescore_profile(user.id, k=self.TOP_K)
+            self.assert_same_as_full_rank(self.snapshot())
+
+    def test_rescore_removes_user_leaving_feed(self):
+        user = self.users[2]
+        DormInfo.objects.filter(user=user).update(cohort_key=None)
+        prerank.rescore_profile(user.id, k=self.TOP_K)
+        self.assertFalse(MatchScore.objects.filter(user_id=user.id).exists())
+        self.assertFalse(MatchScore.objects.filter(candidate_id=user.id).exists())
+
+
+class ScheduleProfileRescoreTests(TestCase):
+    def setUp(self):
+        prerank._pending_rescores.clear()
+        submit = mock.patch.object(prerank._rescore_executor, 'submit')
+        self.submit = submit.start()
+        self.addCleanup(submit.stop)
+        self.addCleanup(prerank._pending_rescores.clear)
+
+    def test_submits_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            prerank.schedule_profile_rescore(1)
+            # 커밋 전에는 대기 목록에도 등록하지 않음
+            self.assertNotIn(1, prerank._pending_rescores)
+            self.submit.assert_not_called()
+
+        self.assertEqual(len(callbacks), 1)
+        self.submit.assert_called_once_with(prerank._run_rescore, 1)
+        self.assertIn(1, prerank._pending_rescores)
+
+    def test_pending_requests_are_merged(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            prerank.schedule_profile_rescore(1)
+            prerank.schedule_profile_rescore(1)
+        self.submit.assert_called_once_with(prerank._run_rescore, 1)
+
+    def test_rollback_leaves_nothing_pending(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    prerank.schedule_profile_rescore(1)
+                    raise RuntimeError()
+            except RuntimeError:
+                pass
+
+        self.assertEqual(callbacks, [])
+        self.submit.assert_not_called()
+        self.assertEqual(prerank._pending_rescores, {})
+
+    def test_run_rescore_clears_pending(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            prerank.schedule_profile_rescore(1)
+        with mock.patch.object(prerank, 'rescore_profile', return_value=0):
+            prerank._run_rescore(1)
+        self.assertEqual(prerank._pending_rescores, {})
+
+
+@override_settings(MATCHING_RANKER='local')
+class CohortChangeRescoreTests(TestCase):
+    def setUp(self):
+        self.rnd = random.Random(1)
+        self.users = [create_member(i, self.rnd) for i in range(6)]
+        prerank.rank_cohort(COHORT_KEY, ranker='local', k=10)
+
+        prerank._pending_rescores.clear()
+        submit = mock.patch.object(prerank._rescore_executor, 'submit')
+        self.submit = submit.start()
+        self.addCleanup(submit.stop)
+        self.addCleanup(prerank._pending_rescores.clear)
+
+    def scheduled_user_ids(self):
+        return [call.args[1] for call in self.submit.call_args_list]
+
+    def test_new_member_is_scheduled_and_added_to_other_rankings(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            new_member = create_member(99, self.rnd)
+        self.assertIn(new_member.id, self.scheduled_user_ids())
+
+        prerank.rescore_profile(new_member.id, k=10)
+        targets = set(MatchScore.objects.filter(candidate_id=new_member.id).values_list('user_id', flat=True))
+        self.assertEqual(targets, {user.id for user in self.users})
+        self.assertEqual(MatchScore.objects.filter(user_id=new_member.id).count(), len(self.users))
+        for user in self.users:
+            ranks = list(MatchScore.objects.filter(user_id=user.id).order_by('rank').values_list('rank', flat=True))
+            self.assertEqual(ranks, list(range(1, len(self.users) + 1)))
+
+    def test_profile_update_without_cohort_change_is_not_scheduled_by_signal(self):
+        profile = Profile.objects.get(user=self.users[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        self.submit.assert_not_called()
+
+    def test_cohort_move_is_scheduled_and_drops_old_rows(self):
+        user = self.users[0]
+        dorm_info = DormInfo.objects.get(user=user)
+        dorm_info.building = 'MYEONGHYEON'
+        with self.captureOnCommitCallbacks(execute=True):
+            dorm_info.save()
+        self.assertEqual(self.scheduled_user_ids(), [user.id])
+
+        prerank.rescore_profile(user.id, k=10)
+        self.assertFalse(MatchScore.objects.filter(cohort_key=COHORT_KEY, user_id=user.id).exists())
+        self.assertFalse(MatchScore.objects.filter(cohort_key=COHORT_KEY, candidate_id=user.id).exists())
+
+
+@override_settings(AI_POOL_MAXSIZE=2)
+class RemoteRankCohortFailureTests(TestCase):
+    def setUp(self):
+        rnd = random.Random(2)
+        self.users = [create_member(i, rnd) for i in range(5)]
+        self.failing_id = self.users[1].id
+        prerank._stale_cohorts.discard(COHORT_KEY)
+        self.addCleanup(prerank._stale_cohorts.discard, COHORT_KEY)
+
+    def fake_ranking(self, target, candidates, k, cohort_key=None):
+        if target.user_id == self.failing_id:
+            raise ConnectionError('AI server down')
+        ordered_ids = [c.user_id for c in candidates][:k]
+        return ordered_ids, {user_id: 50.0 for user_id in ordered_ids}
+
+    async def afake_ranking(self, *args, **kwargs):
+        return self.fake_ranking(*args, **kwargs)
+
+    def assert_successes_saved(self):
+        targets = set(MatchScore.objects.filter(cohort_key=COHORT_KEY).values_list('user_id', flat=True))
+        self.assertEqual(targets, {user.id for user in self.users} - {self.failing_id})
+        # 실패한 타깃이 있으므로 다음 전체 계산 대상으로 남음
+        self.assertIn(COHORT_KEY, prerank._stale_cohorts)
+
+    def test_async_failure_keeps_other_targets(self):
+        with mock.patch.object(prerank, 'arequest_ai_ranking', side_effect=self.afake_ranking), \
+                mock.patch.object(prerank, 'aclose_async_ranking_client', new=mock.AsyncMock()):
+            saved = prerank.rank_cohort(COHORT_KEY, ranker='remote', k=3)
+        self.assertEqual(saved, 4 * 3)
+        self.assert_successes_saved()
+
+    def test_sync_failure_keeps_other_targets(self):
+        with mock.patch.object(prerank, 'httpx', None), \
+                mock.patch.object(prerank, 'request_ai_ranking', side_effect=self.fake_ranking):
+            prerank.rank_cohort(COHORT_KEY, ranker='remote', k=3)
+        self.assert_successes_saved()
+
+    def test_failed_target_keeps_previous_rows(self):
+        prerank.rank_cohort(COHORT_KEY, ranker='local', k=3)
+        previous = list(MatchScore.objects.filter(user_id=self.failing_id).values_list('candidate_id', 'rank'))
+
+        with mock.patch.object(prerank, 'httpx', None), \
+                mock.patch.object(prerank, 'request_ai_ranking', side_effect=self.fake_ranking):
+            prerank.rank_cohort(COHORT_KEY, ranker='remote', k=3)
+
+        self.assertEqual(list(MatchScore.objects.filter(user_id=self.failing_id).values_list('candidate_id', 'rank')), previous)
+
+
+@override_settings(MATCHING_RANKER='remote')
+class StaleCohortFeedTests(TestCase):
+    def setUp(self):
+        rnd = random.Random(3)
+        self.users = [create_member(i, rnd) for i in range(6)]
+        self.me = self.users[0]
+        prerank.rank_cohort(COHORT_KEY, ranker='local', k=5)
+        self.addCleanup(prerank._stale_cohorts.discard, COHORT_KEY)
+
+    def live_ranking(self, my_profile, candidate_profiles, k, cohort_key=None):
+        # 사전 계산과 구분되도록 user_id 역순
+        ordered_ids = sorted((p.user_id for p in candidate_profiles), reverse=True)
+        return ordered_ids, {user_id: 10.0 for user_id in ordered_ids}
+
+    def get_feed_ids(self):
+        with mock.patch('users.views.matching_views.request_ai_ranking', side_effect=self.live_ranking) as request:
+            response = self.client.get(reverse('matching-feed'), headers={'X-User-ID': str(self.me.id)})
+        self.assertEqual(response.status_code, 200)
+        return [row['user_id'] for row in response.json()['results']], request
+
+    def test_remote_rescore_stops_serving_precomputed_rows(self):
+        precomputed_ids, _ = prerank.load_precomputed_ranking(self.me.id, COHORT_KEY)
+        prerank.rescore_profile(self.users[3].id)
+
+        self.assertIsNone(prerank.load_precomputed_ranking(self.me.id, COHORT_KEY))
+        ids, request = self.get_feed_ids()
+        request.assert_called_once()
+        self.assertEqual(ids, sorted((u.id for u in self.users[1:]), reverse=True)[:5])
+        self.assertNotEqual(ids, precomputed_ids[:5])
+
+    def test_full_rank_serves_precomputed_rows_again(self):
+        prerank.rescore_profile(self.users[3].id)
+        prerank.rank_cohort(COHORT_KEY, ranker='local', k=5)
+
+        self.assertIsNotNone(prerank.load_precomputed_ranking(self.me.id, COHORT_KEY))
+        _, request = self.get_feed_ids()
+        request.assert_not_called()
@@ -0,0 +1,89 @@
+import json
+import random
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from users import metrics, profile_sync
+from users.models import DormInfo, Profile, ProfileOutbox
+from users.scoring import PROFILE_CHOICE_FIELDS, encode_profile
+from users.tests.utils import COHORT_KEY, create_member
+
+
+class ProfileOutboxTests(TestCase):
+    def setUp(self):
+        # 동기화를 켜기 전부터 있던 사용자
+        rnd = random.Random(4)
+        self.users = [create_member(i, rnd) for i in range(3)]
+        client = mock.patch.object(profile_sync, 'get_ranking_client')
+        self.client_post = client.start().return_value.post
+        self.addCleanup(client.stop)
+
+    def pending(self):
+        return list(ProfileOutbox.objects.filter(sent_at=None).order_by('id').values_list('user_id', 'event'))
+
+    def sent_payload(self):
+        self.client_post.assert_called_once()
+        path, = self.client_post.call_args.args
+        self.assertEqual(path, profile_sync.PROFILE_SYNC_PATH)
+        payload = self.client_post.call_args.kwargs['json']
+        json.dumps(payload)  # 그대로 전송 가능한 JSON이어야 함
+        return payload
+
+    def test_events_not_recorded_when_disabled(self):
+        self.assertEqual(ProfileOutbox.objects.count(), 0)
+
+    @override_settings(AI_PROFILE_SYNC_ENABLED=True)
+    def test_profile_and_dorm_changes_are_recorded(self):
+        user = self.users[0]
+        Profile.objects.get(user=user).save()
+        DormInfo.objects.get(user=user).save()
+        Profile.objects.get(user=user).delete()
+
+        self.assertEqual(self.pending(), [(user.id, 'UPSERT'), (user.id, 'UPSERT'), (user.id, 'DELETE')])
+
+    def test_payload_merges_events_per_user(self):
+        upserted, deleted, without_profile = self.users
+        Profile.objects.filter(user=without_profile).delete()
+        for user_id, event in [
+            (upserted.id, 'DELETE'), (upserted.id, 'UPSERT'),
+            (deleted.id, 'UPSERT'), (deleted.id, 'DELETE'),
+            (without_profile.id, 'UPSERT'),
+        ]:
+            ProfileOutbox.objects.create(user_id=user_id, event=event)
+
+        payload = profile_sync.build_sync_payload(ProfileOutbox.objects.order_by('id'))
+
+        self.assertEqual(payload['fields'], PROFILE_CHOICE_FIELDS)
+        self.assertEqual(payload['upserts'], [{
+            'id': upserted.id, 'cohort': COHORT_KEY, 'codes': encode_profile(Profile.objects.get(user=upserted)),
+        }])
+        self.assertEqual(sorted(payload['deletes']), sorted([deleted.id, without_profile.id]))
+
+    def test_push_marks_batch_sent(self):
+        for user in self.users:
+            ProfileOutbox.objects.create(user_id=user.id, event='UPSERT')
+        before = metrics.get_counter('ranker.outbox.sent')
+
+        self.assertEqual(profile_sync.push_outbox_batch(batch_size=2), 2)
+
+        self.assertEqual([row['id'] for row in self.sent_payload()['upserts']], [u.id for u in self.users[:2]])
+        self.assertEqual(self.pending(), [(self.users[2].id, 'UPSERT')])
+        self.assertEqual(metrics.get_counter('ranker.outbox.sent') - before, 2)
+
+    def test_failed_push_keeps_events_pending(self):
+        ProfileOutbox.objects.create(user_id=self.users[0].id, event='UPSERT')
+        self.client_post.side_effect = ConnectionError('AI server down')
+
+        with self.assertRaises(ConnectionError):
+            profile_sync.push_outbox_batch()
+        self.assertEqual(self.pending(), [(self.users[0].id, 'UPSERT')])
+
+    def test_full_sync_pushes_existing_profiles(self):
+        call_command('push_profile_outbox', '--full', stdout=mock.Mock())
+
+        payload = self.sent_payload()
+        self.assertEqual(sorted(row['id'] for row in payload['upserts']), sorted(u.id for u in self.users))
+        self.assertEqual(payload['deletes'], [])
+        self.assertEqual(self.pending(), [])
@@ -0,0 +1,40 @@
+from django.core.cache import cache, caches
+from django.test import TestCase
+from unittest import mock
+
+from users import ranking_cache
+from users.tests.utils import COHORT_KEY
+
+
+class RankingCacheInvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_invalidate_cohort_hides_cached_ranking(self):
+        ranking_cache.set_cached_ranking(1, COHORT_KEY, [3, 2], {3: 90.0, 2: 80.0})
+        self.assertEqual(ranking_cache.get_cached_ranking(1, COHORT_KEY)['ordered_ids'], [3, 2])
+
+        ranking_cache.invalidate_cohort(COHORT_KEY)
+
+        self.assertIsNone(ranking_cache.get_cached_ranking(1, COHORT_KEY))
+        # 장애 대비용 마지막 랭킹은 무효화 대상이 아님
+        self.assertEqual(ranking_cache.get_last_known_ranking(1, COHORT_KEY)['ordered_ids'], [3, 2])
+
+    def test_invalidate_reaches_other_worker(self):
+        ranking_cache.set_cached_ranking(1, COHORT_KEY, [3, 2], {3: 90.0, 2: 80.0})
+        # 다른 gunicorn 워커 = 같은 설정으로 새로 만든 캐시 연결
+        other_worker_cache = caches.create_connection('default')
+        with mock.patch.object(ranking_cache, 'cache', other_worker_cache):
+            self.assertIsNotNone(ranking_cache.get_cached_ranking(1, COHORT_KEY))
+            ranking_cache.invalidate_cohort(COHORT_KEY)
+
+        self.assertIsNone(ranking_cache.get_cached_ranking(1, COHORT_KEY))
+
+    def test_lost_version_key_does_not_revive_old_ranking(self):
+        with mock.patch.object(ranking_cache.time, 'time_ns', return_value=1_000_000_000):
+            ranking_cache.set_cached_ranking(1, COHORT_KEY, [3, 2], {3: 90.0, 2: 80.0})
+        cache.delete(ranking_cache._cohort_version_key(COHORT_KEY))
+
+        with mock.patch.object(ranking_cache.time, 'time_ns', return_value=2_000_000_000):
+            self.assertIsNone(ranking_cache.get_cached_ranking(1, COHORT_KEY))
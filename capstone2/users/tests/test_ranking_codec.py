@@ -0,0 +1,144 @@
+import random
+import threading
+
+from django.test import TestCase
+
+from users.ai_client import RankingClient
+from users.management.commands.run_ai_stub import StubHandler
+from users.models import Profile
+from users.ranking_codec import (
+    COMPACT_FORMAT, JSON_CONTENT_TYPE, MSGPACK_CONTENT_TYPE, PAYLOAD_FORMAT_HEADER,
+    decode_compact, dump_payload, encode_compact, load_payload, msgpack,
+)
+from users.scoring import PROFILE_CHOICE_FIELDS
+from users.tests.test_ai_client import QuietHTTPServer
+from users.tests.utils import create_member
+
+
+class RecordingStubHandler(StubHandler):
+    """
+    요청마다 (본문 형식 헤더, Content-Type)을 기록하는 AI 스텁 핸들러.
+    """
+    requests = None
+
+    def do_POST(self):
+        self.requests.append((self.headers.get(PAYLOAD_FORMAT_HEADER), self.headers.get('Content-Type')))
+        super().do_POST()
+
+
+class CompactCodecTests(TestCase):
+    def setUp(self):
+        rnd = random.Random(8)
+        users = [create_member(i, rnd) for i in range(5)]
+        Profile.objects.filter(user__in=users[1::2]).update(smoking_amount=None, sleeping_habit_freq=None)
+        self.profiles = list(Profile.objects.order_by('user_id'))
+
+    def codes_of(self, profile):
+        return {name: getattr(profile, name) for name in PROFILE_CHOICE_FIELDS}
+
+    def test_round_trip(self):
+        target, candidates = self.profiles[0], self.profiles[1:]
+        payload = encode_compact(target, candidates, 3)
+
+        self.assertEqual(payload['format'], COMPACT_FORMAT)
+        # 열 단위 배열: codes[필드][후보]
+        self.assertEqual(len(payload['candidates']['codes']), len(PROFILE_CHOICE_FIELDS))
+        target_id, target_codes, decoded, k = decode_compact(payload)
+        self.assertEqual((target_id, k), (target.user_id, 3))
+        self.assertEqual(target_codes, self.codes_of(target))
+        self.assertEqual(decoded, [(p.user_id, self.codes_of(p)) for p in candidates])
+        self.assertIsNone(decoded[0][1]['smoking_amount'])  # 미입력은 0 -> None
+
+    def test_empty_candidates(self):
+        _, _, decoded, _ = decode_compact(encode_compact(self.profiles[0], [], 3))
+        self.assertEqual(decoded, [])
+
+    def test_rejects_unknown_format(self):
+        with self.assertRaises(ValueError):
+            decode_compact({'format': 'compact-v2'})
+
+    def test_dump_and_load_json(self):
+        payload = encode_compact(self.profiles[0], self.profiles[1:], 3)
+        body, content_type = dump_payload(payload)
+        self.assertEqual(content_type, JSON_CONTENT_TYPE)
+        self.assertEqual(load_payload(body, content_type), payload)
+
+    def test_dump_and_load_msgpack(self):
+        if msgpack is None:
+            self.skipTest("msgpack이 설치되지 않음")
+        payload = encode_compact(self.profiles[0], self.profiles[1:], 3)
+        body, content_type = dump_payload(payload, use_msgpack=True)
+        self.assertEqual(content_type, MSGPACK_CONTENT_TYPE)
+        self.assertEqual(load_payload(body, content_type), payload)
+        self.assertLess(len(body), len(dump_payload(payload)[0]))
+
+
+class PayloadNegotiationTests(TestCase):
+    def setUp(self):
+        self.requests = []
+        rnd = random.Random(9)
+        for i in range(6):
+            create_member(i, rnd)
+        self.profiles = list(Profile.objects.select_related('user').order_by('user_id'))
+
+    def start_stub(self, accept_compact):
+        handler = type('TestStubHandler', (RecordingStubHandler,), {
+            'requests': self.requests, 'accept_compact': accept_compact,
+        })
+        server = QuietHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    def make_client(self, payload_format, accept_compact=True, use_msgpack=False):
+        client = RankingClient(
+            self.start_stub(accept_compact), 'test', 1, 5, 1, payload_format=payload_format, use_msgpack=use_msgpack,
+        )
+        self.addCleanup(client.close)
+        return client
+
+    def rank(self, client):
+        return client.rank(self.profiles[0], self.profiles[1:], 3)
+
+    def formats(self):
+        return [payload_format for payload_format, _ in self.requests]
+
+    def test_compact_and_json_rank_the_same(self):
+        self.assertEqual(self.rank(self.make_client('compact')), self.rank(self.make_client('json')))
+        self.assertEqual(self.formats(), [COMPACT_FORMAT, None])
+
+    def test_msgpack_body(self):
+        if msgpack is None:
+            self.skipTest("msgpack이 설치되지 않음")
+        result = self.rank(self.make_client('compact', use_msgpack=True))
+        self.assertEqual(self.requests, [(COMPACT_FORMAT, MSGPACK_CONTENT_TYPE)])
+        self.assertEqual(result, self.rank(self.make_client('json')))
+
+    def test_415_falls_back_to_json(self):
+        client = self.make_client('compact', accept_compact=False)
+        ordered_ids, _ = self.rank(client)
+        self.assertEqual(len(ordered_ids), 3)
+        self.assertEqual(self.formats(), [COMPACT_FORMAT, None])
+
+        # 한 번 거절되면 이후 요청은 바로 기존 형식
+        self.rank(client)
+        self.assertEqual(self.formats(), [COMPACT_FORMAT, None, None])
+
+    def test_auto_switches_after_ranker_advertises_compact(self):
+        client = self.make_client('auto')
+        self.rank(client)
+        self.rank(client)
+        self.assertEqual(self.formats(), [None, COMPACT_FORMAT])
+
+    def test_auto_stays_json_for_old_ranker(self):
+        client = self.make_client('auto', accept_compact=False)
+        self.rank(client)
+        self.rank(client)
+        self.assertEqual(self.formats(), [None, None])
+
+    def test_json_mode_never_sends_compact(self):
+        client = self.make_client('json')
+        self.rank(client)
+        self.rank(client)
+        self.assertEqual(self.formats(), [None, None])
@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from users import realtime
+from users.tests.utils import create_users
+
+
+class MessageStreamTests(TestCase):
+    def setUp(self):
+        self.a, self.b = create_users(2)
+        self.async_client = AsyncClient()
+        realtime._broker = None
+        self.addCleanup(setattr, realtime, '_broker', None)
+
+    def send(self, sender, recipient, content):
+        # publish_message는 커밋 후에 발행하므로 on_commit 콜백을 실행
+        with self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().post(
+                reverse('message-send'), {'recipient': recipient.id, 'content': content}, HTTP_X_USER_ID=str(sender.id)
+            )
+        self.assertEqual(response.status_code, 201)
+        return response.data
+
+    async def open_stream(self, user):
+        return await self.async_client.get(reverse('message-stream'), headers={'X-User-ID': str(user.id)})
+
+    @override_settings(MESSAGE_STREAM_ENABLED=True, MESSAGE_STREAM_HEARTBEAT=5)
+    async def test_stream_receives_published_message(self):
+        response = await self.open_stream(self.b)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b"retry: 3000\n\n")  # 이 시점에 구독됨
+        self.assertEqual(realtime.get_broker().subscriber_count(), 1)
+
+        sent = await sync_to_async(self.send)(self.a, self.b, "스트림 테스트")
+        chunk = (await asyncio.wait_for(anext(stream), timeout=5)).decode()
+        event_line, data_line = chunk.strip().split("\n")
+        self.assertEqual(event_line, "event: message")
+        event = json.loads(data_line.removeprefix("data: "))
+        self.assertEqual(event['message']['id'], sent['id'])
+        self.assertEqual(event['message']['content'], "스트림 테스트")
+        self.assertEqual(event['message']['recipient'], self.b.id)
+
+    async def test_stream_disabled_under_wsgi(self):
+        response = await self.open_stream(self.b)
+        self.assertEqual(response.status_code, 404)
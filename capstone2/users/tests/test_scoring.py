@@ -0,0 +1,80 @@
+import random
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from users.models import Profile
+from users.scoring import FIELD_INDEX, PROFILE_CHOICE_FIELDS, LocalRanker, encode_profile, encode_profiles
+from users.tests.utils import PROFILE_CHOICES
+
+
+def pair_score(ranker, target, candidate):
+    """
+    LUT 없이 (타깃, 후보) 한 쌍씩 계산하는 기준 구현.
+    """
+    mine, theirs = encode_profile(target), encode_profile(candidate)
+    penalty = sum(
+        ranker.field_weights[name] * ranker.field_matrices[name][mine[FIELD_INDEX[name]], theirs[FIELD_INDEX[name]]]
+        for name in PROFILE_CHOICE_FIELDS
+    )
+    for (my_field, their_field), weight in ranker.cross_weights.items():
+        matrix = ranker.cross_matrices[(my_field, their_field)]
+        penalty += weight * matrix[mine[FIELD_INDEX[my_field]], theirs[FIELD_INDEX[their_field]]]
+        penalty += weight * matrix[theirs[FIELD_INDEX[my_field]], mine[FIELD_INDEX[their_field]]]
+    if ranker.max_penalty <= 0:
+        return 100
+    return int(round(100 * (1 - penalty / ranker.max_penalty)))
+
+
+class LocalRankerTests(SimpleTestCase):
+    def setUp(self):
+        rnd = random.Random(5)
+        self.profiles = []
+        for user_id in range(1, 31):
+            fields = {name: rnd.choice(values) for name, values in PROFILE_CHOICES.items()}
+            if user_id % 7 == 0:
+                fields['smoking_amount'] = None  # 미입력 값도 포함
+            self.profiles.append(Profile(user_id=user_id, **fields))
+
+    def assert_parity(self, ranker):
+        codes = encode_profiles(self.profiles)
+        gather_index = ranker.build_gather_index(codes)
+        matrix = ranker.score_matrix(codes, gather_index)
+
+        for row, target in enumerate(self.profiles):
+            expected = [pair_score(ranker, target, candidate) for candidate in self.profiles]
+            self.assertEqual(ranker.score_codes(codes[row], gather_index).tolist(), expected)
+            self.assertEqual(matrix[row].tolist(), expected)
+
+    def test_matches_per_pair_scoring(self):
+        self.assert_parity(LocalRanker())
+
+    def test_matches_per_pair_scoring_with_custom_weights(self):
+        self.assert_parity(LocalRanker(
+            field_weights={'smoking_type': 5.0, 'eating_in_room': 0.0},
+            cross_weights={('bed_time', 'wake_up_time'): 3.0},
+        ))
+
+    def test_rank_topk_orders_by_pair_score(self):
+        ranker = LocalRanker()
+        target, candidates = self.profiles[0], self.profiles[1:]
+        ordered_ids, match_data = ranker.rank_topk(target, candidates, 10)
+
+        expected = {candidate.user_id: pair_score(ranker, target, candidate) for candidate in candidates}
+        self.assertEqual(len(ordered_ids), 10)
+        self.assertEqual(match_data, {user_id: expected[user_id] for user_id in ordered_ids})
+        self.assertEqual([match_data[i] for i in ordered_ids], sorted(expected.values(), reverse=True)[:10])
+
+    def test_zero_weights_do_not_divide_by_zero(self):
+        ranker = LocalRanker(
+            field_weights={name: 0.0 for name in PROFILE_CHOICE_FIELDS},
+            cross_weights={pair: 0.0 for pair in LocalRanker().cross_weights},
+        )
+        self.assertEqual(ranker.max_penalty, 0)
+
+        with np.errstate(all='raise'):
+            codes = encode_profiles(self.profiles)
+            gather_index = ranker.build_gather_index(codes)
+            self.assertTrue((ranker.score_matrix(codes[:3], gather_index) == 100).all())
+            _, match_data = ranker.rank_topk(self.profiles[0], self.profiles[1:], 5)
+        self.assertEqual(set(match_data.values()), {100})
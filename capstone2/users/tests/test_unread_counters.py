@@ -0,0 +1,85 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from users.models import Conversation, UnreadCounter
+from users.tests.utils import create_users
+
+
+@override_settings(MESSAGE_READ_DEBOUNCE_SECONDS=0)  # 읽음 cursor를 타이머 없이 바로 씀
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        self.a, self.b, self.c, self.d = create_users(4)
+        self.client = APIClient()
+
+    def send(self, sender, recipient, content):
+        response = self.client.post(
+            reverse('message-send'), {'recipient': recipient.id, 'content': content}, HTTP_X_USER_ID=str(sender.id)
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def bulk_send(self, sender, recipients, content):
+        response = self.client.post(
+            reverse('message-bulk-send'), {'recipients': [r.id for r in recipients], 'content': content},
+            format='json', HTTP_X_USER_ID=str(sender.id),
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def unread_count(self, user):
+        response = self.client.get(reverse('message-unread-count'), HTTP_X_USER_ID=str(user.id))
+        return response.data['unread_count']
+
+    def counters(self):
+        return (
+            dict(UnreadCounter.objects.values_list('user_id', 'unread_count')),
+            list(Conversation.objects.order_by('id').values_list('id', 'low_unread_count', 'high_unread_count')),
+        )
+
+    def assert_reconcile_finds_nothing(self):
+        before = self.counters()
+        out = io.StringIO()
+        call_command('reconcile_unread_counters', '--recount-conversations', stdout=out)
+        self.assertIn("대화방별 안 읽은 수 불일치: 0건", out.getvalue())
+        self.assertIn("전체 안 읽은 수 불일치: 0건", out.getvalue())
+        self.assertEqual(self.counters(), before)
+
+    def test_counters_match_reconcile(self):
+        for i in range(3):
+            self.send(self.a, self.b, f"a -> b {i}")
+        self.send(self.b, self.a, "b -> a")
+        self.bulk_send(self.c, [self.a, self.b, self.d], "c -> a, b, d")
+        self.bulk_send(self.a, [self.b, self.c], "a -> b, c")
+
+        self.assertEqual([self.unread_count(u) for u in (self.a, self.b, self.c, self.d)], [2, 5, 1, 1])
+        self.assert_reconcile_finds_nothing()
+
+        # b가 a와의 대화방을 읽으면 그 대화방의 안 읽은 수(4)만큼 줄어듦
+        response = self.client.get(reverse('conversation-detail', args=[self.a.id]), HTTP_X_USER_ID=str(self.b.id))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.unread_count(self.b), 1)
+        self.assert_reconcile_finds_nothing()
+
+        self.bulk_send(self.c, [self.b], "c -> b")
+        self.assertEqual(self.unread_count(self.b), 2)
+        self.assert_reconcile_finds_nothing()
+
+    def test_reconcile_repairs_drift(self):
+        self.send(self.a, self.b, "hello")
+        UnreadCounter.objects.filter(user=self.b).update(unread_count=7)
+        Conversation.objects.update(low_unread_count=3, high_unread_count=3)
+
+        call_command('reconcile_unread_counters', '--recount-conversations', stdout=io.StringIO())
+        self.assertEqual(self.unread_count(self.b), 1)
+        self.assertEqual(self.unread_count(self.a), 0)
+
+    def test_unread_count_requires_user(self):
+        response = self.client.get(reverse('message-unread-count'))
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get(reverse('message-unread-count'), HTTP_X_USER_ID='999999')
+        self.assertEqual(response.status_code, 401)
+        # 쪽지를 받은 적 없는 사용자는 카운터 행 없이 0
+        self.assertEqual(self.unread_count(self.d), 0)
+        self.assertFalse(UnreadCounter.objects.filter(user=self.d).exists())
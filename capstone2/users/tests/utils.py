@@ -0,0 +1,31 @@
+"""
+테스트 공용 데이터 생성 도우미.
+"""
+import json
+import os
+
+from users.models import DormInfo, Profile, User
+
+COHORT_KEY = 'MALE:MYEONGDEOK:DOUBLE:SEMESTER'
+PROFILE_CHOICES = {f.name: [c[0] for c in f.choices] for f in Profile._meta.fields if f.choices}
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'fixtures')
+
+def create_member(index, rnd, **dorm_fields):
+    """
+    기숙사 인증 + 프로필 작성을 마친(피드 노출 대상) 사용자를 만듭니다.
+    """
+    user = User.objects.create_user(nickname=f"user{index}", password=None)
+    DormInfo.objects.create(
+        user=user, name=f"이름{index}", student_id=str(20240000 + index),
+        sex='MALE', building='MYEONGDEOK', room='DOUBLE', residency_period='SEMESTER',
+        is_accepted='ACCEPTED', **dorm_fields,
+    )
+    Profile.objects.create(user=user, **{name: rnd.choice(values) for name, values in PROFILE_CHOICES.items()})
+    return user
+
+def create_users(count, prefix='member'):
+    return [User.objects.create_user(nickname=f"{prefix}{i}", password=None) for i in range(count)]
+
+def load_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
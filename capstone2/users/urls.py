@@ -1,15 +1,21 @@
 from django.urls import path
 
-from users.views import SignUpView, DormVerificationView, ProfileView, MatchingFeedView, UserProfileDetailView, MyPageView, MessageSendView, ConversationListView, ConversationDetailView
+from users.views import SignUpView, DormVerificationView, DormVerificationJobView, ProfileView, MatchingFeedView, UserProfileDetailView, MyPageView, MessageSendView, BulkMessageSendView, ConversationListView, ConversationDetailView, MessageStreamView, UnreadCountView, MessageSearchView, MetricsView
 
 urlpatterns = [
     path('signup/', SignUpView.as_view(), name='signup'),
     path('verify-dorm/', DormVerificationView.as_view(), name='verify-dorm'),
+    path('verify-dorm/<uuid:job_id>/', DormVerificationJobView.as_view(), name='verify-dorm-job'), # 인증 작업 결과 조회
     path('profile/', ProfileView.as_view(), name='profile'), # 초기 내 프로필 생성/수정
     path('matching/', MatchingFeedView.as_view(), name='matching-feed'),
     path('profile/<int:user_id>/', UserProfileDetailView.as_view(), name='user-profile-detail'), # 타인 프로필
     path('mypage/', MyPageView.as_view(), name='my-page'), # 마이페이지
     path('messages/send/', MessageSendView.as_view(), name='message-send'), # 쪽지 보내기
+    path('messages/bulk-send/', BulkMessageSendView.as_view(), name='message-bulk-send'), # 여러 명에게 쪽지 보내기
     path('messages/', ConversationListView.as_view(), name='message-list'), # 쪽지 리스트
+    path('messages/stream/', MessageStreamView.as_view(), name='message-stream'), # 쪽지 실시간 수신 (SSE)
+    path('messages/unread-count/', UnreadCountView.as_view(), name='message-unread-count'), # 안 읽은 쪽지 수 (탭 배지)
+    path('messages/search/', MessageSearchView.as_view(), name='message-search'), # 쪽지 내용 검색
     path('messages/<int:user_id>/', ConversationDetailView.as_view(), name='conversation-detail'), # 쪽지 대화방
+    path('metrics/', MetricsView.as_view(), name='metrics'), # 운영 지표 (운영진 전용)
 ]
@@ -1,10 +1,13 @@
-from .auth_views import DormVerificationView, SignUpView, ProfileView
+from .auth_views import DormVerificationView, DormVerificationJobView, SignUpView, ProfileView
 from .matching_views import MatchingFeedView, UserProfileDetailView
 from .mypage_views import  MyPageView
-from .messages_views import MessageSendView, ConversationListView, ConversationDetailView
+from .messages_views import MessageSendView, BulkMessageSendView, ConversationListView, ConversationDetailView, MessageStreamView, UnreadCountView, MessageSearchView
+from .metrics_views import MetricsView
 
 __all__ = [
-    'DormVerificationView', 'SignUpView', 'ProfileView',
+    'DormVerificationView', 'DormVerificationJobView', 'SignUpView', 'ProfileView',
     'MatchingFeedView', 'UserProfileDetailView', 'MyPageView',
-    'MessageSendView', 'ConversationListView', 'ConversationDetailView',
+    'MessageSendView', 'ConversationListView', 'ConversationDetailView', 'MessageStreamView', 'UnreadCountView',
+    'BulkMessageSendView', 'MessageSearchView',
+    'MetricsView',
 ]
\ No newline at end of file
@@ -2,17 +2,56 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status, generics, serializers
-from users.models import Profile
-from users.serializers import DormVerificationSerializer, SignUpSerializer, ProfileSerializer
+from django.conf import settings
+from django.urls import reverse
+from users.models import DormVerificationJob, Profile
+from users.ocr_jobs import OcrQueueFullError, expire_if_timed_out, submit_dorm_verification
+from users.serializers import DormVerificationSerializer, DormVerificationJobSerializer, SignUpSerializer, ProfileSerializer
 from users.utils import get_user_from_header
 
 class DormVerificationView(APIView):
+    """
+    기숙사 인증 이미지 업로드. OCR은 작업 큐에서 처리되므로 job id를 바로 응답하고,
+    클라이언트는 status_url(DormVerificationJobView)을 Retry-After 간격으로 조회합니다.
+    """
     permission_classes = [AllowAny]
     def post(self, request, *args, **kwargs):
         serializer = DormVerificationSerializer(data=request.data)
-        if serializer.is_valid():
-            return Response(serializer.validated_data, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            job = submit_dorm_verification(serializer.validated_data['image'])
+        except OcrQueueFullError:
+            return Response(
+                {"detail": "인증 요청이 많습니다. 잠시 후 다시 시도해주세요."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(settings.DORM_OCR_POLL_INTERVAL * 5)},
+            )
+
+        return Response({
+            "job_id": job.pk,
+            "status": job.status,
+            "status_url": reverse('verify-dorm-job', args=[job.pk]),
+        }, status=status.HTTP_202_ACCEPTED, headers={'Retry-After': str(settings.DORM_OCR_POLL_INTERVAL)})
+
+class DormVerificationJobView(APIView):
+    """
+    기숙사 인증 작업 조회. SUCCEEDED면 result가 기존 인증 응답(가입 시 dorm_data)이고,
+    FAILED면 errors가 기존 400 응답과 같은 형식입니다. 처리 중이면 Retry-After 후 다시 조회합니다.
+    """
+    permission_classes = [AllowAny]
+    def get(self, request, job_id, *args, **kwargs):
+        try:
+            job = DormVerificationJob.objects.get(pk=job_id)
+        except DormVerificationJob.DoesNotExist:
+            return Response({"detail": "인증 작업을 찾을 수 없습니다."}, status=status.HTTP_404_NOT_FOUND)
+
+        job = expire_if_timed_out(job)
+        headers = {}
+        if job.status in (DormVerificationJob.StatusChoices.PENDING, DormVerificationJob.StatusChoices.RUNNING):
+            headers['Retry-After'] = str(settings.DORM_OCR_POLL_INTERVAL)
+        return Response(DormVerificationJobSerializer(job).data, status=status.HTTP_200_OK, headers=headers)
 
 class SignUpView(APIView):
     permission_classes = [AllowAny]
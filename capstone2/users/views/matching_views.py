@@ -1,18 +1,32 @@
+import logging
+
 import requests
-from decouple import config
+from django.conf import settings
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status, generics
 from rest_framework.views import APIView
 
-from users.models import User, DormInfo, Profile
-from users.serializers import ProfileSerializer, MatchingSummarySerializer, PublicProfileSerializer
+from users import metrics
+from users.ai_client import request_ai_ranking
+from users.circuit_breaker import CircuitOpenError
+from users.cohort import get_cohort_key, get_cohort_candidate_profiles
+from users.models import DormInfo, Profile
+from users.prerank import load_precomputed_ranking
+from users.ranking_cache import (
+    create_feed_snapshot, get_cached_ranking, get_feed_snapshot, get_last_known_ranking, set_cached_ranking,
+)
+from users.ranking_refresh import schedule_ranking_refresh
+from users.scoring import get_local_ranker
+from users.serializers import MatchingSummarySerializer, PublicProfileSerializer
 from users.utils import get_user_from_header
-from django.core.paginator import Paginator, EmptyPage
+
+logger = logging.getLogger(__name__)
 
 class MatchingFeedView(APIView):
     permission_classes = [AllowAny]
     ITEMS_PER_PAGE = 5
+    MAX_CANDIDATES_REQUEST = 50
 
     def get(self, request):
         current_user = get_user_from_header(self.request)
@@ -20,128 +34,144 @@ class MatchingFeedView(APIView):
                 return Response({"detail": "헤더에 유효한 X-User-ID가 없습니다."}, status=status.HTTP_401_UNAUTHORIZED)
 
         try:
-            my_profile = current_user.profile
-            my_dorm_info = current_user.dorminfo
-        except (Profile.DoesNotExist, DormInfo.DoesNotExist):
-            return Response(
-                {"프로필 또는 기숙사 정보가 등록되지 않았습니다."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        try:
-            page_number = int(request.query_params.get('page', 1))
+            page_number = max(int(request.query_params.get('page', 1)), 1)
         except ValueError:
             page_number = 1
 
-        candidates_pool = User.objects.filter(
-            dorminfo__sex=my_dorm_info.sex,
-            dorminfo__building=my_dorm_info.building,
-            dorminfo__room=my_dorm_info.room,
-            dorminfo__residency_period=my_dorm_info.residency_period
-        ).exclude(
-            id=current_user.id  # 나 자신은 제외
-        ).select_related('profile', 'dorminfo')  # DB 효율 최적화
-
-        if not candidates_pool.exists():
+        # 첫 요청에서 만든 랭킹 스냅샷(cursor)이 있으면 랭킹을 다시 계산하지 않고 해당 구간만 잘라서 사용
+        cursor = request.query_params.get('cursor')
+        snapshot = get_feed_snapshot(cursor, current_user.id) if cursor else None
+
+        if snapshot is None:
+            try:
+                my_profile = current_user.profile
+                my_dorm_info = current_user.dorminfo
+            except (Profile.DoesNotExist, DormInfo.DoesNotExist):
+                return Response(
+                    {"프로필 또는 기숙사 정보가 등록되지 않았습니다."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            ranking = self.get_ranking(current_user, my_profile, my_dorm_info)
+            if isinstance(ranking, Response):
+                return ranking
+
+            ordered_ids, match_data, stale = ranking
+            cursor = create_feed_snapshot(current_user.id, ordered_ids, match_data, stale=stale)
+            snapshot = {'ordered_ids': ordered_ids, 'match_data': match_data, 'stale': stale}
+
+        ordered_ids = snapshot['ordered_ids']
+        if not ordered_ids:
             return Response({
                 "results": [],
                 "next_page": None,
                 "has_next": False
             }, status=status.HTTP_200_OK)  # 매칭 대상이 없으면 빈 리스트 반환
 
-        # (데이터 준비) AI에게 보낼 'target'과 'candidates' 리스트 생성
-        my_profile_data = ProfileSerializer(my_profile).data
-
-        candidates_data = []
-        MAX_CANDIDATES_REQUEST = 50
-        for user in candidates_pool:
-            if hasattr(user, 'profile'):
-                candidates_data.append(ProfileSerializer(user.profile).data)
-
-        # (AI 요청 데이터) AI 팀의 API 명세에 맞게 최종 요청 데이터 생성
-        ai_request_data = {
-            "target": my_profile_data,
-            "candidates": candidates_data,
-            "k": MAX_CANDIDATES_REQUEST
-        }
+        # 현재 페이지에 필요한 프로필만 한 번의 쿼리로 조회 (예: 6번째~10번째 유저)
+        start = (page_number - 1) * self.ITEMS_PER_PAGE
+        page_ids = ordered_ids[start:start + self.ITEMS_PER_PAGE]
+        profiles_map = Profile.objects.select_related('user').in_bulk(page_ids, field_name='user_id')
+        paginated_profiles = [profiles_map[user_id] for user_id in page_ids if user_id in profiles_map]
 
-        ai_url = config('AI_SERVER_URL') + '/v1/rank/topk'
-
-        ai_api_key = config('AI_API_KEY')
-        ai_headers = {
-            'x-api-key': ai_api_key
-        }
-
-        ai_ordered_user_ids = []
-        ai_match_data = {}
-
-        try:
-            # (API 호출)
-            response = requests.post(ai_url, json=ai_request_data, headers=ai_headers, timeout=30)
-            response.raise_for_status()
-
-            # (응답 파싱)
-            ai_response_data = response.json()
-
-            # (ID 추출)
-            results = ai_response_data.get('result', [])
-            for item in results:
-                user_id = item['candidate_id']
-                match_percent = item.get('match_percent')  # .get()으로 안전하게 접근
-
-                ai_ordered_user_ids.append(user_id)
-                if match_percent is not None:
-                    ai_match_data[user_id] = match_percent
-
-        except requests.exceptions.Timeout:
-            print("AI Server Timeout")
-            return Response({"detail": "매칭 서버 응답 시간이 초과되었습니다."}, status=status.HTTP_504_GATEWAY_TIMEOUT)
-        except requests.exceptions.ConnectionError:
-            print("AI Server Connection Failed")
-            return Response({"detail": f"매칭 서버와 연결할 수 없습니다."}, status=status.HTTP_502_BAD_GATEWAY)
-        except Exception as e:
-            print(f"AI Server Error: {e}")
-            return Response({"detail": f"매칭 결과를 처리하는 중 오류가 발생했습니다: {e}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        # 1차 필터링했던 후보자 리스트(candidates_pool)를 딕셔너리로 변환 (빠른 검색용)
-        users_map = {user.id: user for user in candidates_pool}
-
-        # AI가 정렬해준 ID 순서대로 User 객체 리스트를 재구성
-        ordered_users = [users_map[user_id] for user_id in ai_ordered_user_ids if user_id in users_map]
-
-        paginator = Paginator(ordered_users, self.ITEMS_PER_PAGE)
-        target_page_number = page_number
-        try:
-            # 현재 페이지의 유저 객체 목록을 가져옴 (예: 6번째~10번째 유저)
-            page_obj = paginator.page(target_page_number)
-
-        except EmptyPage:
-            if paginator.num_pages >= 1:
-                target_page_number = 1
-                page_obj = paginator.page(target_page_number)
-            else:
-                # 데이터가 아예 없을 때 (num_pages가 0일 때)
-                return Response({"detail": f"매칭 결과가 없습니다.", "results": [], "next_page": None, "has_next": False}, status=status.HTTP_200_OK)
-
-        paginated_users = page_obj.object_list
         serializer_context = {
-            'ai_match_data': ai_match_data
+            'ai_match_data': snapshot['match_data']
         }
 
         # 최종 결과 반환
         serializer = MatchingSummarySerializer(
-            [user.profile for user in paginated_users if hasattr(user, 'profile')],
+            paginated_profiles,
             many=True,
             context=serializer_context
         )
-        is_last_page = (target_page_number == paginator.num_pages)
-        next_page_return = 1 if is_last_page else target_page_number + 1
+        has_next = start + self.ITEMS_PER_PAGE < len(ordered_ids)
         return Response({
             "results": serializer.data,
-            "next_page": next_page_return,
-            "has_next": True if paginator.num_pages > 1 else False
+            "next_page": page_number + 1 if has_next else None,
+            "has_next": has_next,
+            "cursor": cursor,
+            "stale": snapshot.get('stale', False),  # AI 서버 장애로 이전/대체 랭킹을 보여주는 중인지
         }, status=status.HTTP_200_OK)
 
+    def get_ranking(self, current_user, my_profile, my_dorm_info):
+        """
+        반환: (정렬된 후보 user_id 리스트, {user_id: match_percent}, stale 여부) 또는 오류 Response
+        순서: 요청 단위 랭킹 캐시 -> 사전 계산(MatchScore) -> AI 서버/로컬 엔진
+        AI 서버 장애(서킷 OPEN 포함) 시: 마지막 정상 랭킹 -> 로컬 엔진 순으로 대체하고 stale로 표시
+        """
+        cohort_key = get_cohort_key(my_dorm_info)
+
+        # 같은 코호트의 랭킹 결과가 캐시에 있으면 AI 서버 호출 없이 재사용 (새로고침)
+        cached_ranking = get_cached_ranking(current_user.id, cohort_key)
+        if cached_ranking is not None:
+            return self.filter_members(cohort_key, cached_ranking['ordered_ids'], cached_ranking['match_data'], False)
+
+        # 일괄 랭킹(rank_cohorts)으로 미리 계산된 결과가 있으면 AI 서버 호출 없이 사용
+        precomputed_ranking = load_precomputed_ranking(current_user.id, cohort_key)
+        if precomputed_ranking is not None:
+            ai_ordered_user_ids, ai_match_data = precomputed_ranking
+            set_cached_ranking(current_user.id, cohort_key, ai_ordered_user_ids, ai_match_data)
+            return self.filter_members(cohort_key, ai_ordered_user_ids, ai_match_data, False)
+
+        # 같은 코호트(성별, 건물, 호실, 거주 기간)의 피드 노출 대상만 인덱스 컬럼으로 한 번에 조회
+        candidate_profiles = list(get_cohort_candidate_profiles(cohort_key, exclude_user_id=current_user.id))
+        if not candidate_profiles:
+            return [], {}, False
+
+        use_cache = True
+        stale = False
+        if settings.MATCHING_RANKER == 'local':
+            ai_ordered_user_ids, ai_match_data = get_local_ranker().rank_topk(
+                my_profile, candidate_profiles, self.MAX_CANDIDATES_REQUEST
+            )
+        else:
+            error_response = None
+            try:
+                ai_ordered_user_ids, ai_match_data = request_ai_ranking(
+                    my_profile, candidate_profiles, self.MAX_CANDIDATES_REQUEST, cohort_key=cohort_key
+                )
+            except CircuitOpenError:
+                error_response = Response({"detail": "매칭 서버가 일시적으로 불안정합니다. 잠시 후 다시 시도해주세요."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            except requests.exceptions.Timeout:
+                logger.warning("AI Server Timeout")
+                error_response = Response({"detail": "매칭 서버 응답 시간이 초과되었습니다."}, status=status.HTTP_504_GATEWAY_TIMEOUT)
+            except requests.exceptions.ConnectionError:
+                logger.warning("AI Server Connection Failed")
+                error_response = Response({"detail": "매칭 서버와 연결할 수 없습니다."}, status=status.HTTP_502_BAD_GATEWAY)
+            except Exception as e:
+                logger.exception("AI Server Error: %s", e)
+                error_response = Response({"detail": f"매칭 결과를 처리하는 중 오류가 발생했습니다: {e}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+            if error_response is not None:
+                last_known = get_last_known_ranking(current_user.id, cohort_key)
+                if last_known is not None:
+                    ai_ordered_user_ids, ai_match_data = last_known['ordered_ids'], last_known['match_data']
+                elif settings.MATCHING_LOCAL_FALLBACK:
+                    # AI 서버 장애 시 로컬 엔진으로 대체
+                    ai_ordered_user_ids, ai_match_data = get_local_ranker().rank_topk(
+                        my_profile, candidate_profiles, self.MAX_CANDIDATES_REQUEST
+                    )
+                else:
+                    return error_response
+
+                # 대체 랭킹은 캐시하지 않고, 백그라운드에서 AI 랭킹을 다시 받아 캐시를 갱신
+                use_cache = False
+                stale = True
+                metrics.incr('matching.feed.stale_served')
+                schedule_ranking_refresh(current_user.id, self.MAX_CANDIDATES_REQUEST)
+
+        if use_cache:
+            set_cached_ranking(current_user.id, cohort_key, ai_ordered_user_ids, ai_match_data)
+
+        # AI가 정렬해준 ID 중 실제 후보자만 남김
+        candidate_ids = {profile.user_id for profile in candidate_profiles}
+        return [user_id for user_id in ai_ordered_user_ids if user_id in candidate_ids], ai_match_data, stale
+
+    def filter_members(self, cohort_key, ordered_ids, match_data, stale):
+        # 캐시/사전 계산 이후 코호트를 떠난 사용자를 제외 (id만 조회)
+        member_ids = set(DormInfo.objects.filter(cohort_key=cohort_key).values_list('user_id', flat=True))
+        return [user_id for user_id in ordered_ids if user_id in member_ids], match_data, stale
+
 class UserProfileDetailView(generics.RetrieveAPIView):
     permission_classes = [AllowAny]
     queryset = Profile.objects.select_related('user').all()
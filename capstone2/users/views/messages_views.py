@@ -1,10 +1,26 @@
-from django.db.models import Q, Max
-from rest_framework import generics, serializers
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework import generics, serializers, status
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import AllowAny
-
-from users.models import Message
-from users.serializers import MessageSerializer, ConversationSerializer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from users.conversations import (
+    decode_cursor, encode_conversation_cursor, encode_message_cursor, get_conversation, get_inbox_page,
+    get_pair_messages_page, mark_conversation_read, record_message, record_messages_bulk,
+)
+from users.message_search import search_messages
+from users.models import Message, UnreadCounter
+from users.realtime import get_broker, publish_message
+from users.serializers import BulkMessageSerializer, MessageSerializer, MessageSearchSerializer, ConversationSerializer
 from users.utils import get_user_from_header
 
 class MessageSendView(generics.CreateAPIView):
@@ -23,71 +39,212 @@ class MessageSendView(generics.CreateAPIView):
         if str(sender.id) == str(recipient_id):
             raise serializers.ValidationError("자기 자신에게 쪽지를 보낼 수 없습니다.")
 
-        serializer.save(sender=sender)
+        # 쪽지 저장과 대화방 요약 갱신을 한 트랜잭션으로 처리
+        with transaction.atomic():
+            message = serializer.save(sender=sender)
+            record_message(message)
+            publish_message(message, serializer.data)  # 커밋 후 SSE 구독자에게 전달
+
+class BulkMessageSendView(APIView):
+    """
+    같은 내용의 쪽지를 여러 명에게 보냅니다. (피드 상위 매칭 상대에게 연락, 운영진 공지)
+    쪽지는 bulk_create로, 대화방 요약/안 읽은 수는 한 번에 갱신하므로 받는 사람 수와 관계없이 쿼리 수가 일정합니다.
+    """
+    permission_classes = [AllowAny]
 
-class ConversationListView(ListAPIView):
+    def post(self, request):
+        sender = get_user_from_header(request)
+        if not sender:
+            return Response({"detail": "헤더에 유효한 X-User-ID가 없습니다."}, status=status.HTTP_401_UNAUTHORIZED)
+
+        serializer = BulkMessageSerializer(data=request.data, context={'sender': sender})
+        serializer.is_valid(raise_exception=True)
+        content = serializer.validated_data['content']
+
+        with transaction.atomic():
+            messages = Message.objects.bulk_create(
+                [Message(sender=sender, recipient=recipient, content=content)
+                 for recipient in serializer.validated_data['recipient_users']],
+                batch_size=500,
+            )
+            record_messages_bulk(sender.id, messages)
+            for message, message_data in zip(messages, MessageSerializer(messages, many=True).data):
+                publish_message(message, message_data)
+
+        return Response({
+            "sent": len(messages),
+            "message_ids": [message.id for message in messages],
+        }, status=status.HTTP_201_CREATED)
+
+class UnreadCountView(APIView):
+    """
+    전체 안 읽은 쪽지 수 (탭 배지용). 자주 폴링해도 되도록 UnreadCounter 기본 키 조회 한 번으로 응답합니다.
+    """
     permission_classes = [AllowAny]
-    serializer_class = ConversationSerializer
 
-    def get_queryset(self):
-        user = get_user_from_header(self.request)
+    def get(self, request):
+        try:
+            user_id = int(request.headers.get('X-User-ID', ''))
+        except ValueError:
+            user_id = None
+
+        unread_count = None
+        if user_id is not None:
+            unread_count = UnreadCounter.objects.filter(user_id=user_id).values_list('unread_count', flat=True).first()
+
+        # 카운터가 아직 없는 사용자(쪽지를 받은 적 없음)만 사용자 존재 여부를 확인
+        if unread_count is None:
+            if not get_user_from_header(request):
+                return Response({"detail": "헤더에 유효한 X-User-ID가 없습니다."}, status=status.HTTP_401_UNAUTHORIZED)
+            unread_count = 0
+
+        return Response({"unread_count": unread_count}, status=status.HTTP_200_OK)
+
+class MessageSearchView(APIView):
+    """
+    내가 참여한 대화방의 쪽지 내용 검색 (?q=검색어&page=N). 관련도순으로 PAGE_SIZE건씩 반환합니다.
+    """
+    permission_classes = [AllowAny]
+    PAGE_SIZE = 20
+
+    def get(self, request):
+        user = get_user_from_header(request)
         if not user:
-            return Message.objects.none()
+            return Response({"detail": "헤더에 유효한 X-User-ID가 없습니다."}, status=status.HTTP_401_UNAUTHORIZED)
 
-        all_messages = Message.objects.filter(
-            Q(sender=user) | Q(recipient=user)
-        ).select_related('sender', 'recipient')
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"detail": "검색어(q)가 필요합니다."}, status=status.HTTP_400_BAD_REQUEST)
 
-        opponent_ids = set()
-        for msg in all_messages:
-            if msg.sender_id == user.id:
-                opponent_ids.add(msg.recipient_id)
-            else:
-                opponent_ids.add(msg.sender_id)
+        try:
+            page_number = max(int(request.query_params.get('page', 1)), 1)
+        except ValueError:
+            page_number = 1
 
-        latest_message_ids = []
-        for opp_id in opponent_ids:
-            latest_msg_id = all_messages.filter(
-                Q(sender_id=user.id, recipient_id=opp_id) |
-                Q(sender_id=opp_id, recipient_id=user.id)
-            ).aggregate(Max('id')).get('id__max')
+        messages, has_next = search_messages(
+            user.id, query, self.PAGE_SIZE, offset=(page_number - 1) * self.PAGE_SIZE
+        )
+        serializer = MessageSearchSerializer(messages, many=True, context={'request_user': user})
 
-            if latest_msg_id:
-                latest_message_ids.append(latest_msg_id)
+        return Response({
+            "results": serializer.data,
+            "next_page": page_number + 1 if has_next else None,
+            "has_next": has_next,
+        }, status=status.HTTP_200_OK)
 
-        queryset = Message.objects.filter(
-            id__in=latest_message_ids
-        ).order_by('-timestamp')
+class ConversationListView(ListAPIView):
+    """
+    쪽지 리스트. 마지막 쪽지 시각 최신순으로 PAGE_SIZE개씩, 응답의 next cursor(before)로 이어서 조회합니다.
+    """
+    permission_classes = [AllowAny]
+    serializer_class = ConversationSerializer
+    PAGE_SIZE = 20
+    MAX_PAGE_SIZE = 50
+
+    def list(self, request, *args, **kwargs):
+        user = get_user_from_header(request)
+        if not user:
+            return Response({"detail": "헤더에 유효한 X-User-ID가 없습니다."}, status=status.HTTP_401_UNAUTHORIZED)
 
-        return queryset
+        try:
+            limit = min(max(int(request.query_params.get('limit', self.PAGE_SIZE)), 1), self.MAX_PAGE_SIZE)
+        except ValueError:
+            limit = self.PAGE_SIZE
 
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context['request_user'] = get_user_from_header(self.request)
-        return context
+        before = request.query_params.get('before')
+        try:
+            before = decode_cursor(before) if before else None
+        except ValueError:
+            return Response({"detail": "잘못된 cursor입니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        conversations, has_more = get_inbox_page(user.id, limit, before=before)
+        serializer = self.get_serializer(conversations, many=True, context={'request_user': user})
+
+        return Response({
+            "results": serializer.data,
+            "next": encode_conversation_cursor(conversations[-1]) if has_more else None,
+            "has_more": has_more,
+        }, status=status.HTTP_200_OK)
 
 class ConversationDetailView(generics.ListAPIView):
+    """
+    쪽지 대화방. 기본은 최신 PAGE_SIZE건이며, 응답의 before/after cursor로 이전 쪽지/새 쪽지를 이어서 조회합니다.
+    """
     permission_classes = [AllowAny]
     serializer_class = MessageSerializer
+    PAGE_SIZE = 30
+    MAX_PAGE_SIZE = 100
 
-    def get_queryset(self):
-        user = get_user_from_header(self.request)
+    def list(self, request, *args, **kwargs):
+        user = get_user_from_header(request)
         if not user:
-            return Message.objects.none()
+            return Response({"detail": "헤더에 유효한 X-User-ID가 없습니다."}, status=status.HTTP_401_UNAUTHORIZED)
 
         opponent_id = self.kwargs.get('user_id')
-        if not opponent_id:
-            return Message.objects.none()
-
-        Message.objects.filter(
-            sender_id=opponent_id,
-            recipient=user,
-            is_read=False
-        ).update(is_read=True)
 
-        queryset = Message.objects.filter(
-            (Q(sender=user) & Q(recipient_id=opponent_id)) |
-            (Q(sender_id=opponent_id) & Q(recipient=user))
-        ).select_related('sender', 'recipient').order_by('timestamp')
-
-        return queryset
\ No newline at end of file
+        try:
+            limit = min(max(int(request.query_params.get('limit', self.PAGE_SIZE)), 1), self.MAX_PAGE_SIZE)
+        except ValueError:
+            limit = self.PAGE_SIZE
+
+        before = request.query_params.get('before')
+        after = request.query_params.get('after')
+        if before and after:
+            return Response({"detail": "before와 after는 함께 사용할 수 없습니다."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            before = decode_cursor(before) if before else None
+            after = decode_cursor(after) if after else None
+        except ValueError:
+            return Response({"detail": "잘못된 cursor입니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 읽음 처리는 대화방 한 행의 읽음 cursor만 갱신 (쪽지별 UPDATE 없음)
+        conversation = get_conversation(user.id, opponent_id)
+        if conversation is not None:
+            mark_conversation_read(conversation, user.id)
+
+        messages, has_more = get_pair_messages_page(
+            user.id, opponent_id, limit, before=before, after=after, conversation=conversation
+        )
+        serializer = self.get_serializer(messages, many=True, context={'conversation': conversation})
+
+        return Response({
+            "results": serializer.data,  # 오래된 순
+            "before": encode_message_cursor(messages[0]) if messages else request.query_params.get('before'),
+            "after": encode_message_cursor(messages[-1]) if messages else request.query_params.get('after'),
+            "has_more": has_more,  # after 요청이면 더 최신 쪽지가, 그 외에는 더 오래된 쪽지가 남아 있는지
+        }, status=status.HTTP_200_OK)
+
+
+class MessageStreamView(View):
+    """
+    새 쪽지/읽음 확인을 Server-Sent Events로 전달합니다. (ASGI 서버에서 실행해야 연결이 워커를 점유하지 않음)
+    연결이 끊긴 동안의 쪽지는 재연결 후 대화방/쪽지 리스트의 after cursor로 다시 조회합니다.
+    MESSAGE_STREAM_ENABLED가 꺼져 있으면(WSGI 배포) 404를 응답합니다.
+    """
+
+    async def get(self, request):
+        if not settings.MESSAGE_STREAM_ENABLED:
+            return JsonResponse({"detail": "실시간 수신을 사용할 수 없습니다."}, status=404)
+
+        user = await sync_to_async(get_user_from_header)(request)
+        if not user:
+            return JsonResponse({"detail": "헤더에 유효한 X-User-ID가 없습니다."}, status=401)
+
+        response = StreamingHttpResponse(self.stream(user.id), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # nginx 버퍼링 비활성화
+        return response
+
+    async def stream(self, user_id):
+        subscription = get_broker().subscribe(user_id)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await subscription.get(settings.MESSAGE_STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"  # 프록시 유휴 타임아웃 방지
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event, cls=DjangoJSONEncoder, ensure_ascii=False)}\n\n"
+        finally:
+            subscription.close()
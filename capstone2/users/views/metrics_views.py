@@ -0,0 +1,16 @@
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from users import metrics
+from users.utils import get_user_from_header
+
+class MetricsView(APIView):
+    permission_classes = [AllowAny]  # X-User-ID 헤더로 인증 (운영진만)
+
+    def get(self, request, *args, **kwargs):
+        user = get_user_from_header(request)
+        if not user or not user.is_staff:
+            return Response({"detail": "운영진만 조회할 수 있습니다."}, status=status.HTTP_403_FORBIDDEN)
+        return Response(metrics.snapshot(), status=status.HTTP_200_OK)